@@ -0,0 +1,206 @@
+"""
+Benchmark suite for DuplicateFinder and FileTracker
+
+Usage:
+    python -m benchmarks.run_benchmarks --files 2000 --output results.json
+    python -m benchmarks.run_benchmarks --compare old.json new.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+
+# Allow running as a script from the repository root
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
+
+from benchmarks.tree_generator import TreeSpec, generate_tree, generate_history
+from core.duplicate_finder import DuplicateFinder
+
+def time_call(func, repeat):
+    """
+    Time a function over several runs
+
+    Returns:
+        Dictionary with per-run timings and summary statistics in seconds
+    """
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - start)
+    return {
+        'runs': runs,
+        'min': min(runs),
+        'mean': statistics.mean(runs),
+        'median': statistics.median(runs)
+    }
+
+def bench_duplicate_finder(tree_root, repeat, similar_limit):
+    """Benchmark each DuplicateFinder scan method on the synthetic tree"""
+    results = {}
+    finder = DuplicateFinder()
+
+    results['find_duplicates_by_hash'] = time_call(
+        lambda: finder.find_duplicates_by_hash([tree_root]), repeat)
+    results['find_duplicates_by_name_size'] = time_call(
+        lambda: finder.find_duplicates_by_name_size([tree_root]), repeat)
+    results['scan_directories'] = time_call(
+        lambda: finder.scan_directories([tree_root]), repeat)
+
+    # Fuzzy matching is quadratic, so it runs on the first subdirectory only
+    # when the full tree has more files than similar_limit
+    similar_root = tree_root
+    file_count = sum(len(files) for _, _, files in os.walk(tree_root))
+    if file_count > similar_limit:
+        subdirs = sorted(d.path for d in os.scandir(tree_root) if d.is_dir())
+        similar_root = subdirs[0] if subdirs else tree_root
+    results['find_similar_files'] = time_call(
+        lambda: finder.find_similar_files([similar_root]), repeat)
+    results['find_similar_files']['files'] = sum(
+        len(files) for _, _, files in os.walk(similar_root))
+    return results
+
+def bench_file_tracker(work_dir, repeat, events, history_days, history_files_per_day):
+    """Benchmark FileTracker event handling, queries and history loading"""
+    from watchdog.events import FileCreatedEvent
+    from core.file_tracker import FileTracker
+
+    results = {}
+
+    # on_created throughput with an empty history
+    history_file = os.path.join(work_dir, "events_history.json")
+
+    def run_events():
+        if os.path.exists(history_file):
+            os.remove(history_file)
+        tracker = FileTracker([], history_file)
+        for i in range(events):
+            tracker.on_created(FileCreatedEvent(f"/synthetic/events/file_{i}.txt"))
+
+    timing = time_call(run_events, repeat)
+    timing['events'] = events
+    timing['events_per_sec'] = events / timing['median'] if timing['median'] else 0
+    results['on_created'] = timing
+
+    # History load time and query latency on a large synthetic history
+    history_file = os.path.join(work_dir, "large_history.json")
+    dates = generate_history(history_file, history_days, history_files_per_day)
+    timing = time_call(lambda: FileTracker([], history_file), repeat)
+    timing['history_bytes'] = os.path.getsize(history_file)
+    results['load_history'] = timing
+
+    tracker = FileTracker([], history_file)
+    query_date = dates[len(dates) // 2]
+    selected = ["/synthetic/folder_1", "/synthetic/folder_2", "/synthetic/folder_3"]
+    results['get_files_for_date_all'] = time_call(
+        lambda: tracker.get_files_for_date(query_date), repeat)
+    results['get_files_for_date_filtered'] = time_call(
+        lambda: tracker.get_files_for_date(query_date, selected), repeat)
+    return results
+
+def run_suite(args):
+    """Run all benchmarks and return the results document"""
+    work_dir = tempfile.mkdtemp(prefix="file_tracker_bench_")
+    try:
+        spec = TreeSpec(num_files=args.files, seed=args.seed, mean_size=args.mean_size,
+                        duplicate_ratio=args.duplicate_ratio, hardlink_ratio=args.hardlink_ratio,
+                        similar_name_ratio=args.similar_ratio)
+        tree_root = os.path.join(work_dir, "tree")
+
+        start = time.perf_counter()
+        manifest = generate_tree(tree_root, spec)
+        manifest['generation_seconds'] = time.perf_counter() - start
+
+        results = {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'machine': platform.machine(),
+                'cpu_count': os.cpu_count()
+            },
+            'repeat': args.repeat,
+            'tree': manifest,
+            'benchmarks': {}
+        }
+        results['benchmarks']['duplicate_finder'] = bench_duplicate_finder(
+            tree_root, args.repeat, args.similar_limit)
+        try:
+            results['benchmarks']['file_tracker'] = bench_file_tracker(
+                work_dir, args.repeat, args.events, args.history_days, args.history_files)
+        except ImportError as e:
+            print(f"Skipping FileTracker benchmarks: {e}")
+        return results
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        else:
+            print(f"Kept benchmark data in {work_dir}")
+
+def flatten(results):
+    """Map 'group.benchmark' to median seconds"""
+    flat = {}
+    for group, benchmarks in results['benchmarks'].items():
+        for name, timing in benchmarks.items():
+            flat[f"{group}.{name}"] = timing['median']
+    return flat
+
+def compare(old_file, new_file):
+    """Print the relative change of every benchmark between two result files"""
+    with open(old_file, 'r') as f:
+        old = flatten(json.load(f))
+    with open(new_file, 'r') as f:
+        new = flatten(json.load(f))
+    for name in sorted(set(old) | set(new)):
+        if name in old and name in new:
+            change = (new[name] - old[name]) / old[name] * 100 if old[name] else 0.0
+            print(f"{name:55s} {old[name]:10.4f}s -> {new[name]:10.4f}s  {change:+7.1f}%")
+        else:
+            print(f"{name:55s} only in {'old' if name in old else 'new'} results")
+
+def print_summary(results):
+    """Print the median time of every benchmark"""
+    for name, median in flatten(results).items():
+        print(f"{name:55s} {median:10.4f}s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="File Tracker benchmark suite")
+    parser.add_argument('--files', type=int, default=2000, help="Files in the synthetic tree")
+    parser.add_argument('--seed', type=int, default=42, help="Seed for the tree generator")
+    parser.add_argument('--mean-size', type=int, default=16384, help="Mean file size in bytes")
+    parser.add_argument('--duplicate-ratio', type=float, default=0.2)
+    parser.add_argument('--hardlink-ratio', type=float, default=0.05)
+    parser.add_argument('--similar-ratio', type=float, default=0.1)
+    parser.add_argument('--similar-limit', type=int, default=500,
+                        help="Max files for the quadratic similarity benchmark")
+    parser.add_argument('--events', type=int, default=500, help="on_created events to dispatch")
+    parser.add_argument('--history-days', type=int, default=365)
+    parser.add_argument('--history-files', type=int, default=200, help="History entries per day")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per benchmark")
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    parser.add_argument('--keep', action='store_true', help="Keep the generated data")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help="Compare two result files instead of running")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    results = run_suite(args)
+    print_summary(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+        print(f"Results written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+import os
+import json
+import math
+import random
+import datetime
+
+# Name variants used to build clusters of similarly named files
+NAME_VARIANTS = ["{0}", "{0} (1)", "{0}_copy", "{0}-final", "{0}_v2", "Copy of {0}"]
+WORDS = ["report", "invoice", "photo", "backup", "notes", "draft", "budget", "scan",
+         "summary", "archive", "project", "meeting", "design", "export", "data"]
+EXTENSIONS = [".txt", ".jpg", ".pdf", ".csv", ".docx", ".png", ".log", ".bin", ""]
+
+class TreeSpec:
+    """Parameters for a synthetic file tree; equal specs produce identical trees"""
+    def __init__(self, num_files=1000, seed=42, max_depth=3, dirs_per_level=4,
+                 size_distribution='lognormal', mean_size=16384, max_size=4 * 1024 * 1024,
+                 duplicate_ratio=0.2, hardlink_ratio=0.05, similar_name_ratio=0.1):
+        """
+        Args:
+            num_files: Total number of file paths to create (including duplicates and hardlinks)
+            seed: Random seed; the same seed always produces the same tree
+            max_depth: Depth of the directory hierarchy
+            dirs_per_level: Subdirectories created in each directory
+            size_distribution: 'lognormal', 'uniform' or 'fixed'
+            mean_size: Mean file size in bytes
+            max_size: Upper bound for any file size in bytes
+            duplicate_ratio: Fraction of files that are byte-identical copies of another file
+            hardlink_ratio: Fraction of files that are hardlinks to another file
+            similar_name_ratio: Fraction of files named as variants of another file's name
+        """
+        self.num_files = num_files
+        self.seed = seed
+        self.max_depth = max_depth
+        self.dirs_per_level = dirs_per_level
+        self.size_distribution = size_distribution
+        self.mean_size = mean_size
+        self.max_size = max_size
+        self.duplicate_ratio = duplicate_ratio
+        self.hardlink_ratio = hardlink_ratio
+        self.similar_name_ratio = similar_name_ratio
+
+    def to_dict(self):
+        """Get the spec as a dictionary (for result files)"""
+        return dict(self.__dict__)
+
+def _random_size(rng, spec):
+    """Draw a file size from the spec's distribution"""
+    if spec.size_distribution == 'fixed':
+        size = spec.mean_size
+    elif spec.size_distribution == 'uniform':
+        size = rng.randint(0, 2 * spec.mean_size)
+    else:
+        # Lognormal with the requested mean: mean = exp(mu + sigma^2 / 2)
+        sigma = 1.5
+        mu = max(0.0, math.log(max(spec.mean_size, 1)) - sigma ** 2 / 2)
+        size = int(rng.lognormvariate(mu, sigma))
+    return max(0, min(size, spec.max_size))
+
+def _random_bytes(rng, size):
+    """Generate deterministic file content"""
+    return rng.getrandbits(size * 8).to_bytes(size, 'little') if size else b""
+
+def generate_tree(root, spec=None):
+    """
+    Generate a deterministic synthetic file tree
+
+    Args:
+        root: Directory to create the tree in (created if missing)
+        spec: TreeSpec describing the tree
+
+    Returns:
+        Manifest dictionary describing what was generated
+    """
+    spec = spec or TreeSpec()
+    rng = random.Random(spec.seed)
+    os.makedirs(root, exist_ok=True)
+
+    # Directory hierarchy
+    directories = [root]
+    level = [root]
+    for depth in range(spec.max_depth):
+        next_level = []
+        for parent in level:
+            for i in range(spec.dirs_per_level):
+                path = os.path.join(parent, f"dir_{depth}_{i}")
+                os.makedirs(path, exist_ok=True)
+                next_level.append(path)
+        directories.extend(next_level)
+        level = next_level
+
+    manifest = {
+        'spec': spec.to_dict(),
+        'directories': len(directories),
+        'unique_files': 0,
+        'duplicates': 0,
+        'hardlinks': 0,
+        'similar_names': 0,
+        'total_bytes': 0
+    }
+
+    created = []  # (path, base_name, ext)
+    used_paths = set()
+
+    def unique_path(directory, name):
+        path = os.path.join(directory, name)
+        counter = 1
+        base, ext = os.path.splitext(name)
+        while path in used_paths:
+            path = os.path.join(directory, f"{base}_{counter}{ext}")
+            counter += 1
+        used_paths.add(path)
+        return path
+
+    for index in range(spec.num_files):
+        directory = rng.choice(directories)
+        roll = rng.random()
+
+        if created and roll < spec.hardlink_ratio:
+            source = rng.choice(created)[0]
+            path = unique_path(directory, f"link_{index}_{os.path.basename(source)}")
+            try:
+                os.link(source, path)
+                manifest['hardlinks'] += 1
+                continue
+            except OSError:
+                used_paths.discard(path)  # hardlinks unsupported; fall through to a unique file
+
+        if created and roll < spec.hardlink_ratio + spec.duplicate_ratio:
+            source, base, ext = rng.choice(created)
+            path = unique_path(directory, f"{base}{ext}" if rng.random() < 0.5 else f"dup_{index}{ext}")
+            with open(source, 'rb') as src, open(path, 'wb') as dst:
+                data = src.read()
+                dst.write(data)
+            manifest['duplicates'] += 1
+            manifest['total_bytes'] += len(data)
+            created.append((path, base, ext))
+            continue
+
+        if created and roll < spec.hardlink_ratio + spec.duplicate_ratio + spec.similar_name_ratio:
+            _, base, ext = rng.choice(created)
+            base = rng.choice(NAME_VARIANTS[1:]).format(base)
+            manifest['similar_names'] += 1
+        else:
+            base = f"{rng.choice(WORDS)}_{rng.choice(WORDS)}_{index}"
+            ext = rng.choice(EXTENSIONS)
+            manifest['unique_files'] += 1
+
+        size = _random_size(rng, spec)
+        path = unique_path(directory, f"{base}{ext}")
+        with open(path, 'wb') as f:
+            f.write(_random_bytes(rng, size))
+        manifest['total_bytes'] += size
+        created.append((path, base, ext))
+
+    return manifest
+
+def generate_history(history_file, num_days=365, files_per_day=500, seed=42, root="/synthetic"):
+    """
+    Generate a deterministic FileTracker history file
+
+    Args:
+        history_file: Path of the JSON history file to write
+        num_days: Number of dates in the history
+        files_per_day: Number of file paths recorded per date
+        seed: Random seed
+        root: Path prefix for the generated file paths
+
+    Returns:
+        List of the generated date strings
+    """
+    rng = random.Random(seed)
+    start = datetime.date(2024, 1, 1)
+    history = {}
+    for day in range(num_days):
+        date_str = (start + datetime.timedelta(days=day)).strftime('%Y-%m-%d')
+        history[date_str] = [
+            os.path.join(root, f"folder_{rng.randrange(50)}", f"{rng.choice(WORDS)}_{i}{rng.choice(EXTENSIONS)}")
+            for i in range(files_per_day)
+        ]
+    with open(history_file, 'w') as f:
+        json.dump(history, f, indent=4)
+    return list(history)
@@ -0,0 +1,258 @@
+"""
+Headless command-line interface for DuplicateFinder
+
+Usage:
+    python cli.py hash /data /backup --format ndjson
+    python cli.py name-size /data --format csv --output groups.csv
+    python cli.py similar /data/docs --threshold 0.9
+    python cli.py stats /data
+
+Duplicate groups are written as they are found, one JSON object per line
+(ndjson) or one row per file (csv). Hash and name-size scans stream their
+file records through disk runs, so memory stays bounded by --memory-budget
+however large the tree is. With --checkpoint the hash scan is resumable
+instead and its groups are written when it completes.
+
+Exit codes:
+    0  scan completed without finding any groups (always for stats)
+    1  scan completed and found at least one group
+    2  invalid arguments or unreadable input
+    128 + signal number  interrupted by SIGINT or SIGTERM
+"""
+import os
+import sys
+import csv
+import json
+import signal
+import argparse
+
+# Allow running as a script from the repository root
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
+
+from core.duplicate_finder import DuplicateFinder
+from core.io_scheduler import IOScheduler
+from core.throttle import ScanThrottle
+
+EXIT_OK = 0
+EXIT_FOUND = 1
+EXIT_ERROR = 2
+
+GROUP_HEADER = ['group', 'key', 'size', 'path']
+STATS_HEADER = ['extension', 'count', 'size']
+
+class GroupWriter:
+    """Write groups to a stream as they arrive, flushing after each one"""
+    def __init__(self, stream, output_format):
+        """
+        Args:
+            stream: Text stream to write to
+            output_format: 'ndjson' or 'csv'
+        """
+        self.stream = stream
+        self.output_format = output_format
+        self.groups = 0
+        self.files = 0
+        self.header_written = False
+        self.csv_writer = None
+        if output_format == 'csv':
+            self.csv_writer = csv.writer(stream)
+
+    def _write_header(self, header):
+        """Write the CSV header before the first row"""
+        if self.csv_writer is not None and not self.header_written:
+            self.csv_writer.writerow(header)
+            self.header_written = True
+
+    @staticmethod
+    def group_size(paths):
+        """Get the size of a group's first file, or None if it is gone"""
+        try:
+            return os.path.getsize(paths[0])
+        except OSError:
+            return None
+
+    def write_group(self, key, paths):
+        """Write one group"""
+        size = self.group_size(paths)
+        self.groups += 1
+        self.files += len(paths)
+        if self.csv_writer is not None:
+            self._write_header(GROUP_HEADER)
+            for path in paths:
+                self.csv_writer.writerow([self.groups, key, size, path])
+        else:
+            record = {'group': self.groups, 'key': key, 'size': size,
+                      'count': len(paths), 'paths': paths}
+            self.stream.write(json.dumps(record) + "\n")
+        self.stream.flush()
+
+    def write_stats(self, stats):
+        """Write the result of a stats scan"""
+        if self.csv_writer is not None:
+            self._write_header(STATS_HEADER)
+            for ext, values in sorted(stats['extensions'].items(),
+                                      key=lambda item: item[1]['size'], reverse=True):
+                self.csv_writer.writerow([ext, values['count'], values['size']])
+        else:
+            self.stream.write(json.dumps(stats) + "\n")
+        self.stream.flush()
+
+    def finish(self):
+        """Write the CSV header of an empty result"""
+        self._write_header(GROUP_HEADER)
+        self.stream.flush()
+
+def load_ignore_patterns(args):
+    """Collect the --ignore patterns and the patterns of --ignore-file"""
+    patterns = list(args.ignore or [])
+    if args.ignore_file:
+        with open(args.ignore_file, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    patterns.append(line)
+    return patterns
+
+def create_finder(args):
+    """Create a DuplicateFinder from the tuning options"""
+    workers = args.workers
+    io_scheduler = IOScheduler(
+        ssd_workers=workers or 8,
+        hdd_workers=args.hdd_workers,
+        default_workers=workers or 2
+    )
+    throttle = ScanThrottle(args.max_mb_per_sec, args.max_files_per_sec)
+    memory_budget = args.memory_budget * 1024 * 1024 if args.memory_budget else None
+    if getattr(args, 'checkpoint', None):
+        # A memory budget would make the hash scan spill instead of checkpointing
+        memory_budget = None
+    return DuplicateFinder(
+        io_scheduler=io_scheduler,
+        throttle=throttle,
+        low_io_priority=args.low_io_priority,
+        checkpoint_file=getattr(args, 'checkpoint', None),
+        memory_budget=memory_budget,
+        spill_dir=args.spill_dir,
+        lockstep_max_files=getattr(args, 'lockstep_max_files', 3),
+        ignore_patterns=load_ignore_patterns(args)
+    )
+
+def iter_groups(finder, args, callback):
+    """Yield (key, paths) groups of the selected mode"""
+    if args.mode == 'hash':
+        if args.checkpoint:
+            if args.resume and finder.has_resumable_scan():
+                groups = finder.resume_last_scan(callback)
+            else:
+                groups = finder.find_duplicates_by_hash(args.directories, callback)
+            return iter(groups.items())
+        return finder.iter_duplicates_by_hash_external(args.directories, callback)
+    if args.mode == 'name-size':
+        return finder.iter_duplicates_by_name_size_external(args.directories, callback)
+    return iter(finder.find_similar_files(args.directories, args.threshold, callback).items())
+
+def build_parser():
+    """Create the argument parser"""
+    parser = argparse.ArgumentParser(description="Find duplicate files without the GUI")
+    subparsers = parser.add_subparsers(dest='mode', required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('directories', nargs='+', help="Directories to scan")
+    common.add_argument('--format', choices=['ndjson', 'csv'], default='ndjson',
+                        help="Output format (default: ndjson)")
+    common.add_argument('--output', '-o', help="Write results to this file instead of stdout")
+    common.add_argument('--progress', action='store_true', help="Print progress to stderr")
+    common.add_argument('--quiet', '-q', action='store_true', help="Do not print a summary to stderr")
+    common.add_argument('--workers', type=int, default=0,
+                        help="Concurrent readers per SSD or unknown device (default: 8 for SSDs, 2 otherwise)")
+    common.add_argument('--hdd-workers', type=int, default=1,
+                        help="Concurrent readers per rotational device")
+    common.add_argument('--max-mb-per-sec', type=float, default=0, help="Read bandwidth cap (0 = unlimited)")
+    common.add_argument('--max-files-per-sec', type=float, default=0, help="File rate cap (0 = unlimited)")
+    common.add_argument('--low-io-priority', action='store_true', help="Run in the idle I/O scheduling class")
+    common.add_argument('--memory-budget', type=int, default=64,
+                        help="MB of grouping state kept in memory before spilling to disk")
+    common.add_argument('--spill-dir', help="Directory for spilled runs (default: system temp directory)")
+    common.add_argument('--ignore', action='append', metavar='PATTERN',
+                        help="Skip files and directories whose name or path matches this glob (repeatable)")
+    common.add_argument('--ignore-file', help="File with one ignore glob per line")
+
+    hash_parser = subparsers.add_parser('hash', parents=[common], help="Duplicates by content")
+    hash_parser.add_argument('--lockstep-max-files', type=int, default=3,
+                             help="Compare groups of at most this many files byte by byte (0 = always hash)")
+    hash_parser.add_argument('--checkpoint', metavar='FILE',
+                             help="Resumable checkpoint file; groups are written when the scan completes")
+    hash_parser.add_argument('--resume', action='store_true',
+                             help="Resume the scan saved in --checkpoint")
+    subparsers.add_parser('name-size', parents=[common], help="Duplicates by name and size")
+    similar_parser = subparsers.add_parser('similar', parents=[common], help="Files with similar names")
+    similar_parser.add_argument('--threshold', type=float, default=0.8,
+                                help="Minimum name similarity ratio (0.0-1.0)")
+    subparsers.add_parser('stats', parents=[common], help="File statistics")
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    missing = [d for d in args.directories if not os.path.isdir(d)]
+    if missing:
+        print(f"Not a directory: {', '.join(missing)}", file=sys.stderr)
+        return EXIT_ERROR
+    if getattr(args, 'resume', False) and not args.checkpoint:
+        print("--resume requires --checkpoint", file=sys.stderr)
+        return EXIT_ERROR
+
+    try:
+        finder = create_finder(args)
+        stream = open(args.output, 'w', newline='') if args.output else sys.stdout
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+    # Stop the scan cleanly on Ctrl+C or a cron/systemd timeout
+    received = []
+    def handle_signal(signum, frame):
+        received.append(signum)
+        finder.stop_scan()
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    callback = None
+    if args.progress:
+        callback = lambda progress, message: print(message, file=sys.stderr, flush=True)
+
+    writer = GroupWriter(stream, args.format)
+    try:
+        if args.mode == 'stats':
+            stats = finder.scan_directories(args.directories, callback)
+            if not received:
+                writer.write_stats(stats)
+                if not args.quiet:
+                    print(f"{stats['total_files']} files, "
+                          f"{DuplicateFinder.format_file_size(stats['total_size'])}", file=sys.stderr)
+        else:
+            for key, paths in iter_groups(finder, args, callback):
+                writer.write_group(key, paths)
+            writer.finish()
+            if not args.quiet and not received:
+                print(f"{writer.groups} groups, {writer.files} files", file=sys.stderr)
+    except BrokenPipeError:
+        # The reader went away (e.g. piped into head); stop quietly
+        finder.stop_scan()
+        sys.stderr.close()
+        return EXIT_OK
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+
+    if received:
+        return 128 + received[0]
+    if args.mode != 'stats' and writer.groups:
+        return EXIT_FOUND
+    return EXIT_OK
+
+if __name__ == "__main__":
+    sys.exit(main())
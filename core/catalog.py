@@ -0,0 +1,212 @@
+import os
+from array import array
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; grouping falls back to pure Python
+    np = None
+
+# Stat fields kept per row; enough for scans that expect an os.stat_result
+CatalogStat = namedtuple('CatalogStat', ['st_size', 'st_mtime_ns', 'st_dev', 'st_ino'])
+
+class FileCatalog:
+    """Columnar in-memory catalog of scanned files
+
+    Each file is one row across compact typed columns (size, mtime, inode,
+    device, directory id, name id, extension id) instead of one Python object
+    per file. Directory names, file names and extensions are interned, so a
+    path costs a few integers. Columns are array.array buffers; when NumPy is
+    available they are viewed without copying and grouping, histograms and
+    top-N are computed vectorized.
+    """
+    def __init__(self):
+        self.sizes = array('q')
+        self.mtimes = array('q')      # st_mtime_ns
+        self.inodes = array('Q')
+        self.devices = array('Q')
+        self.dir_ids = array('i')
+        self.name_ids = array('i')
+        self.ext_ids = array('i')
+
+        self.dirs = []
+        self.names = []
+        self.extensions = []
+        self._dir_index = {}
+        self._name_index = {}
+        self._ext_index = {}
+
+    def __len__(self):
+        return len(self.sizes)
+
+    @staticmethod
+    def _intern(value, values, index):
+        """Get the id of a string in a string table, adding it if needed"""
+        value_id = index.get(value)
+        if value_id is None:
+            value_id = index[value] = len(values)
+            values.append(value)
+        return value_id
+
+    def add_directory(self, path):
+        """Register a directory and get its id"""
+        return self._intern(path, self.dirs, self._dir_index)
+
+    def add(self, dir_id, name, stat_info):
+        """
+        Add a file to the catalog
+
+        Args:
+            dir_id: Id returned by add_directory() for the file's directory
+            name: File name
+            stat_info: os.stat_result of the file
+
+        Returns:
+            Row index of the file
+        """
+        extension = os.path.splitext(name)[1].lower()
+        self.sizes.append(stat_info.st_size)
+        self.mtimes.append(stat_info.st_mtime_ns)
+        self.inodes.append(stat_info.st_ino)
+        self.devices.append(stat_info.st_dev)
+        self.dir_ids.append(dir_id)
+        self.name_ids.append(self._intern(name, self.names, self._name_index))
+        self.ext_ids.append(self._intern(extension, self.extensions, self._ext_index))
+        return len(self.sizes) - 1
+
+    def path(self, index):
+        """Get the full path of a row"""
+        return os.path.join(self.dirs[self.dir_ids[index]], self.names[self.name_ids[index]])
+
+    def paths(self, indices):
+        """Get the full paths of several rows"""
+        return [self.path(int(index)) for index in indices]
+
+    def name(self, index):
+        """Get the file name of a row"""
+        return self.names[self.name_ids[index]]
+
+    def stat(self, index):
+        """Get the recorded stat fields of a row as a CatalogStat"""
+        return CatalogStat(self.sizes[index], self.mtimes[index],
+                           self.devices[index], self.inodes[index])
+
+    def memory_usage(self):
+        """Approximate bytes used by the numeric columns"""
+        columns = (self.sizes, self.mtimes, self.inodes, self.devices,
+                   self.dir_ids, self.name_ids, self.ext_ids)
+        return sum(column.itemsize * len(column) for column in columns)
+
+    def total_size(self):
+        """Get the sum of all file sizes"""
+        if np is not None and len(self):
+            return int(np.frombuffer(self.sizes, dtype=np.int64).sum())
+        return sum(self.sizes)
+
+    def group_by_size(self, min_count=2):
+        """
+        Group rows by file size
+
+        Returns:
+            List of row index sequences, one per size shared by at least min_count files
+        """
+        if not len(self):
+            return []
+        if np is not None:
+            sizes = np.frombuffer(self.sizes, dtype=np.int64)
+            order = np.argsort(sizes, kind='stable')
+            _, starts, counts = np.unique(sizes[order], return_index=True, return_counts=True)
+            mask = counts >= min_count
+            return [order[start:start + count] for start, count in zip(starts[mask], counts[mask])]
+
+        groups = {}
+        for index, size in enumerate(self.sizes):
+            groups.setdefault(size, []).append(index)
+        return [indices for indices in groups.values() if len(indices) >= min_count]
+
+    def group_by_name_size(self, min_count=2):
+        """
+        Group rows by (file name, size)
+
+        Returns:
+            List of (name, size, row indices) tuples for keys shared by at least min_count files
+        """
+        if not len(self):
+            return []
+        if np is not None:
+            sizes = np.frombuffer(self.sizes, dtype=np.int64)
+            name_ids = np.frombuffer(self.name_ids, dtype=np.int32)
+            order = np.lexsort((sizes, name_ids))
+            sorted_sizes = sizes[order]
+            sorted_names = name_ids[order]
+            # A new group starts wherever the name or the size changes
+            boundaries = np.flatnonzero((np.diff(sorted_sizes) != 0) | (np.diff(sorted_names) != 0)) + 1
+            starts = np.concatenate(([0], boundaries))
+            ends = np.concatenate((boundaries, [len(order)]))
+            groups = []
+            for start, end in zip(starts[ends - starts >= min_count], ends[ends - starts >= min_count]):
+                first = order[start]
+                groups.append((self.names[name_ids[first]], int(sizes[first]), order[start:end]))
+            return groups
+
+        groups = {}
+        for index in range(len(self)):
+            groups.setdefault((self.name_ids[index], self.sizes[index]), []).append(index)
+        return [(self.names[name_id], size, indices)
+                for (name_id, size), indices in groups.items() if len(indices) >= min_count]
+
+    def extension_stats(self):
+        """
+        Get file count and total size per extension
+
+        Returns:
+            Dictionary with extension as key and {'count', 'size'} as value
+        """
+        if not len(self):
+            return {}
+        if np is not None:
+            ext_ids = np.frombuffer(self.ext_ids, dtype=np.int32)
+            sizes = np.frombuffer(self.sizes, dtype=np.int64)
+            counts = np.bincount(ext_ids, minlength=len(self.extensions))
+            totals = np.bincount(ext_ids, weights=sizes, minlength=len(self.extensions))
+            return {ext: {'count': int(counts[ext_id]), 'size': int(totals[ext_id])}
+                    for ext_id, ext in enumerate(self.extensions)}
+
+        stats = {ext: {'count': 0, 'size': 0} for ext in self.extensions}
+        for ext_id, size in zip(self.ext_ids, self.sizes):
+            ext_stats = stats[self.extensions[ext_id]]
+            ext_stats['count'] += 1
+            ext_stats['size'] += size
+        return stats
+
+    def largest(self, n=10):
+        """Get the n largest files as (path, size) tuples, largest first"""
+        if not len(self) or n <= 0:
+            return []
+        if np is not None:
+            sizes = np.frombuffer(self.sizes, dtype=np.int64)
+            if n < len(sizes):
+                candidates = np.argpartition(-sizes, n - 1)[:n]
+            else:
+                candidates = np.arange(len(sizes))
+            top = candidates[np.argsort(-sizes[candidates], kind='stable')]
+        else:
+            top = sorted(range(len(self)), key=lambda index: self.sizes[index], reverse=True)[:n]
+        return [(self.path(int(index)), int(self.sizes[int(index)])) for index in top]
+
+    def wasted_space(self, groups):
+        """
+        Get the bytes that could be reclaimed by keeping one copy per group
+
+        Hardlinks (rows sharing device and inode) within a group count once.
+
+        Args:
+            groups: Iterable of row index sequences
+        """
+        wasted = 0
+        for indices in groups:
+            inodes = {(self.devices[int(index)], self.inodes[int(index)])
+                      if self.inodes[int(index)] else int(index) for index in indices}
+            if len(inodes) > 1:
+                wasted += self.sizes[int(indices[0])] * (len(inodes) - 1)
+        return wasted
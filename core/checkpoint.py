@@ -0,0 +1,110 @@
+import os
+import time
+import json
+
+class ScanCheckpoint:
+    """Periodically saved state of a hash scan, used to resume it later
+
+    Holds the walker position (directories still to list), the files found so
+    far with their stat info, the size buckets that are fully hashed and the
+    digests computed so far. Without a checkpoint file it only lives in memory.
+    """
+    VERSION = 1
+
+    def __init__(self, checkpoint_file, directories, interval=30):
+        """
+        Args:
+            checkpoint_file: Path of the JSON checkpoint, or None to disable saving
+            directories: Directories being scanned
+            interval: Minimum seconds between periodic saves
+        """
+        self.checkpoint_file = checkpoint_file
+        self.directories = list(directories)
+        self.interval = interval
+        self.pending_dirs = list(reversed(self.directories))  # walker stack
+        self.walk_complete = False
+        self.files = {}        # path -> [size, mtime_ns, dev, ino]
+        self.digests = {}      # path -> [size, mtime_ns, ino, digest]
+        self.completed_buckets = set()
+        self.last_save = time.monotonic()
+
+    @staticmethod
+    def stat_record(stat_info):
+        """Get the stat fields stored for a file"""
+        return [stat_info.st_size, stat_info.st_mtime_ns, stat_info.st_dev, stat_info.st_ino]
+
+    def get_digest(self, filepath, stat_info):
+        """Get the saved digest of a file if its stat has not changed since"""
+        record = self.digests.get(filepath)
+        if record and record[:3] == [stat_info.st_size, stat_info.st_mtime_ns, stat_info.st_ino]:
+            return record[3]
+        return None
+
+    def set_digest(self, filepath, stat_info, digest):
+        """Record the digest of a file together with the stat it was computed for"""
+        self.digests[filepath] = [stat_info.st_size, stat_info.st_mtime_ns, stat_info.st_ino, digest]
+
+    def to_dict(self):
+        """Serialize the checkpoint"""
+        return {
+            'version': self.VERSION,
+            'saved': time.time(),
+            'directories': self.directories,
+            'pending_dirs': self.pending_dirs,
+            'walk_complete': self.walk_complete,
+            'files': self.files,
+            'digests': self.digests,
+            'completed_buckets': sorted(self.completed_buckets)
+        }
+
+    @classmethod
+    def load(cls, checkpoint_file, interval=30):
+        """
+        Load a checkpoint from file
+
+        Returns:
+            ScanCheckpoint, or None if there is no valid checkpoint
+        """
+        try:
+            if not checkpoint_file or not os.path.exists(checkpoint_file):
+                return None
+            with open(checkpoint_file, 'r') as f:
+                data = json.load(f)
+            if data.get('version') != cls.VERSION:
+                return None
+            checkpoint = cls(checkpoint_file, data['directories'], interval)
+            checkpoint.pending_dirs = data['pending_dirs']
+            checkpoint.walk_complete = data['walk_complete']
+            checkpoint.files = data['files']
+            checkpoint.digests = data['digests']
+            checkpoint.completed_buckets = set(data['completed_buckets'])
+            return checkpoint
+        except Exception as e:
+            print(f"Error loading scan checkpoint: {e}")
+            return None
+
+    def save(self):
+        """Write the checkpoint atomically (temp file, then rename)"""
+        self.last_save = time.monotonic()
+        if not self.checkpoint_file:
+            return
+        try:
+            temp_file = f"{self.checkpoint_file}.tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(self.to_dict(), f)
+            os.replace(temp_file, self.checkpoint_file)
+        except Exception as e:
+            print(f"Error saving scan checkpoint: {e}")
+
+    def maybe_save(self):
+        """Save the checkpoint if the interval has elapsed since the last save"""
+        if time.monotonic() - self.last_save >= self.interval:
+            self.save()
+
+    def clear(self):
+        """Delete the checkpoint file once the scan has completed"""
+        try:
+            if self.checkpoint_file and os.path.exists(self.checkpoint_file):
+                os.remove(self.checkpoint_file)
+        except Exception as e:
+            print(f"Error removing scan checkpoint: {e}")
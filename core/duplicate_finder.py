@@ -1,82 +1,634 @@
 import os
+import fnmatch
 import hashlib
 import datetime
+import itertools
 from difflib import SequenceMatcher
 
+from core.io_scheduler import IOScheduler
+from core.throttle import ScanThrottle, set_thread_io_priority_idle
+from core.scan_jobs import CancellationToken
+from core.checkpoint import ScanCheckpoint
+from core.instrumentation import ScanInstrumentation
+from core.catalog import FileCatalog
+from core.external_sort import ExternalGrouper
+from core.merkle import compute_directory_hashes
+from core.snapshot import ScanSnapshot
+from core.scan_session import ANALYZERS
+
+# Key prefix of quick scan groups matched on sampled blocks only
+PROBABLE_PREFIX = "probable_"
+
 class DuplicateFinder:
     """Class to handle duplicate file detection"""
-    def __init__(self):
+    def __init__(self, io_scheduler=None, throttle=None, low_io_priority=False, token=None,
+                 checkpoint_file=None, checkpoint_interval=30, instrumentation=None,
+                 memory_budget=None, spill_dir=None, lockstep_max_files=3, ignore_patterns=None,
+                 session=None):
+        """
+        Args:
+            io_scheduler: IOScheduler used for content reads
+            throttle: ScanThrottle limiting bandwidth and file rate
+            low_io_priority: Run scans in the idle I/O scheduling class
+            token: CancellationToken owned by a scan job; without one, every
+                scan gets a fresh token and stop_scan() cancels it
+            checkpoint_file: JSON file for resumable hash scan checkpoints
+            checkpoint_interval: Seconds between periodic checkpoint saves
+            instrumentation: ScanInstrumentation collecting timers and counters
+            memory_budget: Bytes of grouping state kept in memory before spilling
+                sorted runs to disk; None keeps everything in memory. The hash
+                and name/size scans then stream their records through disk and
+                hash scans are not checkpointed.
+            spill_dir: Directory for spilled runs (system temp directory by default)
+            lockstep_max_files: Size groups with at most this many distinct files
+                are compared byte by byte in lockstep instead of hashed; 0 always hashes
+            ignore_patterns: Glob patterns matched against the name and the full
+                path of files and directories; matching entries are skipped
+            session: ScanSession keeping the catalog of the last walk, so the
+                statistics, name/size and similarity scans reuse it instead of
+                walking the same folders again. Hash scans always walk, since
+                content must not be matched from file records that may be out
+                of date, and store their walk in the session.
+        """
         self.is_scanning = False
-        self.scan_stopped = False
+        self.io_scheduler = io_scheduler or IOScheduler()
+        self.throttle = throttle or ScanThrottle()
+        self.low_io_priority = low_io_priority
+        self.external_token = token is not None
+        self.token = token or CancellationToken()
+        self.checkpoint_file = checkpoint_file
+        self.checkpoint_interval = checkpoint_interval
+        self.instrumentation = instrumentation or ScanInstrumentation()
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.lockstep_max_files = lockstep_max_files
+        self.ignore_patterns = list(ignore_patterns or [])
+        self.session = session
+    
+    @property
+    def scan_stopped(self):
+        """Whether the scan should stop; blocks while the scan is paused"""
+        return self.token.checkpoint()
+    
+    def _begin_scan(self):
+        """Reset scan state and throttle statistics at the start of a scan"""
+        self.is_scanning = True
+        if not self.external_token:
+            self.token = CancellationToken()
+        self.throttle.reset_stats()
+        self.instrumentation.start()
+        if self.low_io_priority:
+            # Applies to the calling thread and the reader threads it starts
+            set_thread_io_priority_idle()
+    
+    def _end_scan(self):
+        """Mark the scan as finished and stop measuring it"""
+        self.is_scanning = False
+        self.instrumentation.stop()
+    
+    def _walk(self, directory):
+        """os.walk, recording time spent listing directories as the 'walk' phase"""
+        walker = os.walk(directory)
+        while True:
+            with self.instrumentation.phase('walk'):
+                entry = next(walker, None)
+            if entry is None:
+                return
+            self.instrumentation.count('scandir')
+            if self.ignore_patterns:
+                root, dirs, files = entry
+                # Pruning dirs in place keeps os.walk out of ignored directories
+                dirs[:] = [d for d in dirs if not self._is_ignored(os.path.join(root, d), d)]
+                entry = (root, dirs, [f for f in files if not self._is_ignored(os.path.join(root, f), f)])
+            yield entry
+    
+    def _is_ignored(self, path, name):
+        """Check a file or directory against the ignore patterns"""
+        return any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(path, pattern)
+                   for pattern in self.ignore_patterns)
+    
+    def _stat(self, filepath):
+        """os.stat, recorded as the 'stat' phase"""
+        with self.instrumentation.phase('stat'):
+            stat_info = os.stat(filepath)
+        self.instrumentation.count('stat')
+        return stat_info
+    
+    def _stop_requested(self):
+        """Check whether the current scan has been stopped"""
+        return self.scan_stopped
+    
+    @staticmethod
+    def _inode_key(filepath, stat_info):
+        """Identify the data behind a path; falls back to the path where inodes are unavailable"""
+        if stat_info.st_ino:
+            return (stat_info.st_dev, stat_info.st_ino)
+        return filepath
         
     def calculate_file_hash(self, filepath, blocksize=65536):
         """Calculate MD5 hash of file contents"""
         hasher = hashlib.md5()
+        instrumentation = self.instrumentation
         try:
             with open(filepath, 'rb') as file:
-                buf = file.read(blocksize)
-                while len(buf) > 0:
+                instrumentation.count('open')
+                while True:
+                    with instrumentation.phase('read'):
+                        buf = file.read(blocksize)
+                    instrumentation.count('read')
+                    if not buf:
+                        break
                     if self.scan_stopped:
                         return None
-                    hasher.update(buf)
-                    buf = file.read(blocksize)
+                    self.throttle.throttle_bytes(len(buf), self._stop_requested)
+                    with instrumentation.phase('hash'):
+                        hasher.update(buf)
+                    instrumentation.count('bytes', len(buf))
+            instrumentation.count('files_hashed')
             return hasher.hexdigest()
         except Exception as e:
             print(f"Error hashing file {filepath}: {e}")
             return None
     
-    def find_duplicates_by_hash(self, directories, callback=None):
+    def compare_files_lockstep(self, filepaths, blocksize=65536):
+        """
+        Compare files of equal size by reading them block by block in lockstep
+        
+        The group is split as soon as contents diverge and files left without a
+        match are dropped, so most non-duplicates stop after the first block.
+        No digest is computed: files reported identical were compared byte for byte.
+        
+        Args:
+            filepaths: Paths of files with the same size
+            blocksize: Bytes read from each file per step
+            
+        Returns:
+            List of lists of paths with identical contents, or None if the scan was stopped
+        """
+        instrumentation = self.instrumentation
+        files = {}
+        try:
+            for filepath in filepaths:
+                try:
+                    files[filepath] = open(filepath, 'rb')
+                    instrumentation.count('open')
+                except Exception as e:
+                    print(f"Error comparing file {filepath}: {e}")
+            
+            identical = []
+            pending = [list(files)] if len(files) > 1 else []
+            while pending:
+                group = pending.pop()
+                if self.scan_stopped:
+                    return None
+                
+                files_by_block = {}
+                for filepath in group:
+                    try:
+                        with instrumentation.phase('read'):
+                            buf = files[filepath].read(blocksize)
+                    except Exception as e:
+                        print(f"Error comparing file {filepath}: {e}")
+                        continue
+                    instrumentation.count('read')
+                    instrumentation.count('bytes', len(buf))
+                    self.throttle.throttle_bytes(len(buf), self._stop_requested)
+                    files_by_block.setdefault(buf, []).append(filepath)
+                
+                for block, matches in files_by_block.items():
+                    if len(matches) < 2:
+                        continue  # diverged from every other file
+                    if block:
+                        pending.append(matches)
+                    else:
+                        identical.append(matches)  # all reached the end together
+            
+            instrumentation.count('files_compared', len(files))
+            return identical
+        finally:
+            for file in files.values():
+                file.close()
+    
+    def _compare_groups(self, groups):
+        """
+        Run lockstep comparisons for several candidate groups, scheduled per device
+        
+        Args:
+            groups: List of candidate groups, each a list of (filepath, stat_result)
+            
+        Yields:
+            (group, list of identical path lists) tuples in completion order
+        """
+        groups_by_path = {group[0][0]: group for group in groups}
+        
+        def compare(filepath):
+            return self.compare_files_lockstep([path for path, _ in groups_by_path[filepath]])
+        
+        entries = [group[0] for group in groups]
+        for filepath, _, matches in self.io_scheduler.map(compare, entries, self._stop_requested):
+            yield groups_by_path[filepath], matches or []
+    
+    def calculate_sample_fingerprint(self, filepath, samples=8, blocksize=65536):
+        """
+        Fingerprint a file from its size and evenly spaced sampled blocks
+        
+        Files no larger than the sampled blocks together are hashed in full.
+        
+        Args:
+            filepath: Path of the file
+            samples: Number of blocks read, including the first and last block
+            blocksize: Size of each sampled block
+            
+        Returns:
+            (fingerprint, complete) tuple where complete is True if every byte
+            was read, or None on error or if the scan was stopped
+        """
+        try:
+            size = os.path.getsize(filepath)
+        except Exception as e:
+            print(f"Error hashing file {filepath}: {e}")
+            return None
+        
+        samples = max(2, samples)
+        if size <= samples * blocksize:
+            file_hash = self.calculate_file_hash(filepath, blocksize)
+            return (file_hash, True) if file_hash else None
+        
+        hasher = hashlib.md5(str(size).encode())
+        instrumentation = self.instrumentation
+        try:
+            with open(filepath, 'rb') as file:
+                instrumentation.count('open')
+                for i in range(samples):
+                    if self.scan_stopped:
+                        return None
+                    file.seek(i * (size - blocksize) // (samples - 1))
+                    with instrumentation.phase('read'):
+                        buf = file.read(blocksize)
+                    instrumentation.count('read')
+                    self.throttle.throttle_bytes(len(buf), self._stop_requested)
+                    with instrumentation.phase('hash'):
+                        hasher.update(buf)
+                    instrumentation.count('bytes', len(buf))
+            instrumentation.count('files_sampled')
+            return hasher.hexdigest(), False
+        except Exception as e:
+            print(f"Error hashing file {filepath}: {e}")
+            return None
+    
+    def _walk_checkpointed(self, checkpoint, stat_by_path):
+        """
+        Walk the checkpoint's pending directories, recording files into it
+        
+        A directory is only committed to the checkpoint once it has been fully
+        listed, so a stopped walk resumes at the directory it was in.
+        
+        Returns:
+            False if the scan was stopped, True when the walk is complete
+        """
+        while checkpoint.pending_dirs:
+            directory = checkpoint.pending_dirs.pop()
+            dir_files = {}
+            subdirs = []
+            try:
+                with self.instrumentation.phase('walk'):
+                    with os.scandir(directory) as it:
+                        entries = list(it)
+                self.instrumentation.count('scandir')
+            except Exception as e:
+                print(f"Error listing directory {directory}: {e}")
+                entries = []
+            
+            for entry in entries:
+                if self.scan_stopped:
+                    checkpoint.pending_dirs.append(directory)
+                    return False
+                if self.ignore_patterns and self._is_ignored(entry.path, entry.name):
+                    continue
+                
+                try:
+                    # Like os.walk, do not descend into symlinked directories
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            subdirs.append(entry.path)
+                        continue
+                except OSError:
+                    pass
+                
+                self.throttle.throttle_files(1, self._stop_requested)
+                try:
+                    stat_info = self._stat(entry.path)
+                except Exception as e:
+                    print(f"Error processing file {entry.path}: {e}")
+                    continue
+                dir_files[entry.path] = stat_info
+                self.instrumentation.count('files')
+            
+            for filepath, stat_info in dir_files.items():
+                checkpoint.files[filepath] = checkpoint.stat_record(stat_info)
+                stat_by_path[filepath] = stat_info
+            checkpoint.pending_dirs.extend(reversed(subdirs))
+            checkpoint.maybe_save()
+        
+        checkpoint.walk_complete = True
+        return True
+    
+    def find_duplicates_by_hash(self, directories, callback=None, resume=False):
         """
         Find duplicates by comparing file content hashes
         
+        Only files sharing their size with at least one other file are read.
+        Small size groups (up to lockstep_max_files files) are compared byte by
+        byte instead of hashed, so they do not depend on MD5 and usually stop
+        reading at the first differing block. When the finder has a checkpoint file, the scan state is saved
+        periodically and when the scan is stopped.
+        
         Args:
             directories: List of directory paths to scan
             callback: Function to call with progress updates (progress_percent, message)
+            resume: Continue from the last checkpoint if it covers the same directories
             
         Returns:
             Dictionary with hash as key and list of duplicate file paths as value
         """
-        self.is_scanning = True
-        self.scan_stopped = False
+        if self.memory_budget:
+            return self._collect_groups(self.iter_duplicates_by_hash_external(directories, callback))
+        
+        self._begin_scan()
+        callback = self.instrumentation.wrap_callback(callback)
+        
+        checkpoint = None
+        if resume:
+            checkpoint = ScanCheckpoint.load(self.checkpoint_file, self.checkpoint_interval)
+            if checkpoint and checkpoint.directories != list(directories):
+                checkpoint = None
+        resumed = checkpoint is not None
+        if not resumed:
+            checkpoint = ScanCheckpoint(self.checkpoint_file, directories, self.checkpoint_interval)
+        
+        stat_by_path = {}
+        if resumed:
+            # Revalidate files found before the checkpoint; digests are only
+            # reused below for files whose stat is unchanged
+            if callback:
+                callback(0, f"Resuming scan: revalidating {len(checkpoint.files)} files...")
+            for filepath in list(checkpoint.files):
+                if self.scan_stopped:
+                    break
+                try:
+                    stat_info = self._stat(filepath)
+                    stat_by_path[filepath] = stat_info
+                    checkpoint.files[filepath] = checkpoint.stat_record(stat_info)
+                except OSError:
+                    del checkpoint.files[filepath]
+                    checkpoint.digests.pop(filepath, None)
+        
+        # First pass: Collect files with their stat info. Content is never
+        # matched from the session's catalog, which may predate changes; the
+        # completed walk is stored for the stat-only analyses that follow
+        if self.scan_stopped or not self._walk_checkpointed(checkpoint, stat_by_path):
+            checkpoint.save()
+            self._end_scan()
+            return {}
+        if self.session is not None:
+            with self.instrumentation.phase('group'):
+                catalog = self._catalog_from_stats(stat_by_path)
+            self.session.store(directories, self.ignore_patterns, catalog)
         
         # Dictionary to store files by hash
         files_by_hash = {}
-        total_files = 0
+        inodes_by_hash = {}
+        # Hardlinked paths share one (st_dev, st_ino): hash each inode only once
+        paths_by_inode = {}
+        inodes_by_size = {}
+        with self.instrumentation.phase('group'):
+            for filepath, stat_info in stat_by_path.items():
+                inode_key = self._inode_key(filepath, stat_info)
+                if inode_key not in paths_by_inode:
+                    paths_by_inode[inode_key] = []
+                    inodes_by_size.setdefault(stat_info.st_size, []).append(inode_key)
+                paths_by_inode[inode_key].append(filepath)
+        
+        total_files = len(stat_by_path)
         processed_files = 0
         
-        # First pass: Count total files for progress reporting
-        for directory in directories:
-            for root, _, files in os.walk(directory):
-                total_files += len(files)
+        # Files with a unique size cannot have duplicates
+        entries = []
+        lockstep_groups = []
+        remaining_by_size = {}
+        for size, inode_keys in inodes_by_size.items():
+            if len(inode_keys) < 2:
+                processed_files += len(paths_by_inode[inode_keys[0]])
+                continue
+            if len(inode_keys) <= self.lockstep_max_files:
+                lockstep_groups.append([(paths_by_inode[inode_key][0],
+                                         stat_by_path[paths_by_inode[inode_key][0]])
+                                        for inode_key in inode_keys])
+                continue
+            remaining_by_size[size] = len(inode_keys)
+            for inode_key in inode_keys:
+                aliases = paths_by_inode[inode_key]
+                stat_info = stat_by_path[aliases[0]]
+                file_hash = None
+                for filepath in aliases:
+                    file_hash = checkpoint.get_digest(filepath, stat_by_path[filepath])
+                    if file_hash:
+                        break
+                if file_hash:
+                    # Digest from a previous run of this scan, stat unchanged
+                    if file_hash not in files_by_hash:
+                        files_by_hash[file_hash] = []
+                        inodes_by_hash[file_hash] = set()
+                    files_by_hash[file_hash].extend(aliases)
+                    inodes_by_hash[file_hash].add(inode_key)
+                    processed_files += len(aliases)
+                    remaining_by_size[size] -= 1
+                else:
+                    entries.append((aliases[0], stat_info))
+        
+        checkpoint.completed_buckets = {size for size, remaining in remaining_by_size.items()
+                                        if remaining == 0}
+        if callback and resumed:
+            callback((processed_files / max(total_files, 1)) * 100,
+                     f"Resumed: {len(checkpoint.completed_buckets)} size buckets already complete")
         
-        # Process files
+        # Small groups: read in lockstep until they diverge, no digests
+        for group, matches in self._compare_groups(lockstep_groups):
+            if self.scan_stopped:
+                break
+            
+            size = group[0][1].st_size
+            for match in matches:
+                group_key = f"identical_{size}_{match[0]}"
+                files_by_hash[group_key] = []
+                inodes_by_hash[group_key] = set()
+                for filepath in match:
+                    inode_key = self._inode_key(filepath, stat_by_path[filepath])
+                    files_by_hash[group_key].extend(paths_by_inode[inode_key])
+                    inodes_by_hash[group_key].add(inode_key)
+            
+            processed_files += sum(len(paths_by_inode[self._inode_key(filepath, stat_info)])
+                                   for filepath, stat_info in group)
+            if callback:
+                progress = (processed_files / total_files) * 100
+                callback(progress, f"Processing files: {processed_files}/{total_files}")
+        
+        # Process files: one read per inode, scheduled per physical device
+        for filepath, stat_info, file_hash in self.io_scheduler.map(
+                self.calculate_file_hash, entries, self._stop_requested):
+            if self.scan_stopped:
+                break
+            
+            inode_key = self._inode_key(filepath, stat_info)
+            aliases = paths_by_inode[inode_key]
+            if file_hash:
+                checkpoint.set_digest(filepath, stat_info, file_hash)
+                if file_hash not in files_by_hash:
+                    files_by_hash[file_hash] = []
+                    inodes_by_hash[file_hash] = set()
+                files_by_hash[file_hash].extend(aliases)
+                inodes_by_hash[file_hash].add(inode_key)
+            
+            remaining_by_size[stat_info.st_size] -= 1
+            if remaining_by_size[stat_info.st_size] == 0:
+                checkpoint.completed_buckets.add(stat_info.st_size)
+            checkpoint.maybe_save()
+            
+            processed_files += len(aliases)
+            if callback:
+                progress = (processed_files / total_files) * 100
+                callback(progress, f"Processing files: {processed_files}/{total_files}")
+        
+        if self.scan_stopped:
+            checkpoint.save()
+            self._end_scan()
+            return {}
+        
+        checkpoint.clear()
+        
+        # Filter to keep only duplicate sets; groups made up purely of hardlinks
+        # to a single inode are not duplicates since deleting them frees nothing
+        duplicates = {h: files for h, files in files_by_hash.items()
+                      if len(inodes_by_hash[h]) > 1}
+        
+        self._end_scan()
+        return duplicates
+    
+    def has_resumable_scan(self):
+        """Check whether an interrupted hash scan can be resumed"""
+        return ScanCheckpoint.load(self.checkpoint_file) is not None
+    
+    def resume_last_scan(self, callback=None):
+        """
+        Resume the last interrupted hash scan from its checkpoint
+        
+        Args:
+            callback: Function to call with progress updates (progress_percent, message)
+            
+        Returns:
+            Dictionary with hash as key and list of duplicate file paths as value
+        """
+        checkpoint = ScanCheckpoint.load(self.checkpoint_file)
+        if checkpoint is None:
+            return {}
+        return self.find_duplicates_by_hash(checkpoint.directories, callback, resume=True)
+    
+    def _build_catalog(self, directories, callback=None):
+        """
+        Walk directories into a columnar FileCatalog
+        
+        Args:
+            directories: List of directory paths to scan
+            callback: Function to call with progress updates
+            
+        Returns:
+            FileCatalog with the files found (partial if the scan was stopped)
+        """
+        catalog = FileCatalog()
         for directory in directories:
-            for root, _, files in os.walk(directory):
+            for root, _, files in self._walk(directory):
+                dir_id = catalog.add_directory(root)
                 for filename in files:
                     if self.scan_stopped:
-                        self.is_scanning = False
-                        return {}
+                        return catalog
                     
                     filepath = os.path.join(root, filename)
+                    self.throttle.throttle_files(1, self._stop_requested)
                     try:
-                        file_hash = self.calculate_file_hash(filepath)
-                        if file_hash:
-                            if file_hash not in files_by_hash:
-                                files_by_hash[file_hash] = []
-                            files_by_hash[file_hash].append(filepath)
+                        catalog.add(dir_id, filename, self._stat(filepath))
+                        self.instrumentation.count('files')
                     except Exception as e:
                         print(f"Error processing file {filepath}: {e}")
                     
-                    processed_files += 1
-                    if callback:
-                        progress = (processed_files / total_files) * 100
-                        callback(progress, f"Processing files: {processed_files}/{total_files}")
+                    if callback and len(catalog) % 100 == 0:
+                        callback(0, f"Scanned {len(catalog)} files...")
+        return catalog
+    
+    @staticmethod
+    def _catalog_from_stats(stat_by_path):
+        """Build a FileCatalog from a dictionary of path -> stat_info"""
+        catalog = FileCatalog()
+        for filepath, stat_info in stat_by_path.items():
+            directory, filename = os.path.split(filepath)
+            catalog.add(catalog.add_directory(directory), filename, stat_info)
+        return catalog
+    
+    def get_catalog(self, directories, callback=None):
+        """
+        Get the catalog of directories, walking them only if the session has none
         
-        # Filter to keep only duplicate sets
-        duplicates = {h: files for h, files in files_by_hash.items() if len(files) > 1}
+        Args:
+            directories: List of directory paths to scan
+            callback: Function to call with progress updates
+            
+        Returns:
+            FileCatalog with the files found (partial if the scan was stopped)
+        """
+        if self.session is not None:
+            catalog = self.session.get_catalog(directories, self.ignore_patterns)
+            if catalog is not None:
+                self.instrumentation.count('catalog_reused')
+                if callback:
+                    callback(0, f"Reusing the list of {len(catalog)} files from the last scan")
+                return catalog
         
-        self.is_scanning = False
-        return duplicates
+        catalog = self._build_catalog(directories, callback)
+        if self.session is not None and not self.token.is_cancelled():
+            self.session.store(directories, self.ignore_patterns, catalog)
+        return catalog
+    
+    def analyze(self, directories, analyzers, callback=None):
+        """
+        Walk directories once and run several analyses on the same file records
+        
+        Args:
+            directories: List of directory paths to scan
+            analyzers: Names of analyses registered in core.scan_session.ANALYZERS
+            callback: Function to call with progress updates
+            
+        Returns:
+            Dictionary with analyzer name as key and its result as value, empty
+            if the scan was stopped
+        """
+        self._begin_scan()
+        callback = self.instrumentation.wrap_callback(callback)
+        results = self._run_analyzers(directories, analyzers, callback)
+        if results is not None and callback:
+            callback(100, "Analysis complete")
+        self._end_scan()
+        return results if results is not None else {}
+    
+    def _run_analyzers(self, directories, analyzers, callback=None):
+        """Get the catalog and run analyses on it within the current scan; None if stopped"""
+        catalog = self.get_catalog(directories, callback)
+        if self.scan_stopped:
+            return None
+        
+        results = {}
+        with self.instrumentation.phase('group'):
+            for name in analyzers:
+                results[name] = ANALYZERS[name](catalog)
+        return results
     
     def find_duplicates_by_name_size(self, directories, callback=None):
         """
@@ -89,48 +641,576 @@ class DuplicateFinder:
         Returns:
             Dictionary with name_size as key and list of duplicate file paths as value
         """
-        self.is_scanning = True
-        self.scan_stopped = False
+        if self.memory_budget:
+            return self._collect_groups(self.iter_duplicates_by_name_size_external(directories, callback))
+        
+        # Group files by name and size in bulk, keeping only duplicate sets
+        return self.analyze(directories, ['name_size'], callback).get('name_size', {})
+    
+    def find_duplicates_quick(self, directories, callback=None, samples=8):
+        """
+        Find likely duplicates by fingerprinting sampled blocks of each file
+        
+        Only files sharing their size with another file are read, and files
+        larger than the sampled blocks are only partially read. Groups matched
+        on samples are keyed with PROBABLE_PREFIX and should be confirmed with
+        verify_probable_groups() before acting on them; groups of small files
+        were fully hashed and are keyed by their MD5 like find_duplicates_by_hash().
         
-        # Dictionary to store files by name and size
-        files_by_name_size = {}
-        total_files = 0
+        Args:
+            directories: List of directory paths to scan
+            callback: Function to call with progress updates
+            samples: Number of blocks sampled per large file
+            
+        Returns:
+            Dictionary with group key as key and list of duplicate file paths as value
+        """
+        self._begin_scan()
+        callback = self.instrumentation.wrap_callback(callback)
+        
+        # Hardlinked paths share one (st_dev, st_ino): read each inode only once
+        paths_by_inode = {}
+        inodes_by_size = {}
+        stat_by_inode = {}
+        with self.instrumentation.phase('group'):
+            for filepath, _, stat_info in self._walk_files(directories, callback):
+                inode_key = self._inode_key(filepath, stat_info)
+                if inode_key not in paths_by_inode:
+                    paths_by_inode[inode_key] = []
+                    stat_by_inode[inode_key] = stat_info
+                    inodes_by_size.setdefault(stat_info.st_size, []).append(inode_key)
+                paths_by_inode[inode_key].append(filepath)
+        if self.scan_stopped:
+            self._end_scan()
+            return {}
+        
+        entries = [(paths_by_inode[inode_key][0], stat_by_inode[inode_key])
+                   for inode_keys in inodes_by_size.values() if len(inode_keys) > 1
+                   for inode_key in inode_keys]
+        
+        files_by_key = {}
+        inodes_by_key = {}
         processed_files = 0
+        for filepath, stat_info, result in self.io_scheduler.map(
+                lambda path: self.calculate_sample_fingerprint(path, samples), 
+                entries, self._stop_requested):
+            if self.scan_stopped:
+                break
+            
+            processed_files += 1
+            if result:
+                fingerprint, complete = result
+                group_key = fingerprint if complete else f"{PROBABLE_PREFIX}{fingerprint}"
+                inode_key = self._inode_key(filepath, stat_info)
+                if group_key not in files_by_key:
+                    files_by_key[group_key] = []
+                    inodes_by_key[group_key] = set()
+                files_by_key[group_key].extend(paths_by_inode[inode_key])
+                inodes_by_key[group_key].add(inode_key)
+            
+            if callback:
+                progress = (processed_files / len(entries)) * 100
+                callback(progress, f"Fingerprinting files: {processed_files}/{len(entries)}")
         
-        # First pass: Count total files for progress reporting
-        for directory in directories:
-            for root, _, files in os.walk(directory):
-                total_files += len(files)
+        if self.scan_stopped:
+            self._end_scan()
+            return {}
+        
+        duplicates = {key: files for key, files in files_by_key.items()
+                      if len(inodes_by_key[key]) > 1}
         
-        # Process files
+        self._end_scan()
+        return duplicates
+    
+    @staticmethod
+    def is_probable_group(group_key):
+        """Check whether a group was matched on sampled blocks only"""
+        return group_key.startswith(PROBABLE_PREFIX)
+    
+    def verify_probable_groups(self, duplicates, callback=None):
+        """
+        Confirm quick scan groups by comparing their files' full contents
+        
+        Probable groups may split or disappear; other groups are kept as they are.
+        
+        Args:
+            duplicates: Dictionary returned by find_duplicates_quick()
+            callback: Function to call with progress updates
+            
+        Returns:
+            Dictionary of content-verified duplicate groups, empty if the scan was stopped
+        """
+        self._begin_scan()
+        callback = self.instrumentation.wrap_callback(callback)
+        
+        verified = {key: files for key, files in duplicates.items()
+                    if not self.is_probable_group(key)}
+        probable = [files for key, files in duplicates.items() if self.is_probable_group(key)]
+        
+        for index, files in enumerate(probable):
+            if self.scan_stopped:
+                break
+            
+            bucket = []
+            for filepath in files:
+                try:
+                    stat_info = self._stat(filepath)
+                except Exception as e:
+                    print(f"Error processing file {filepath}: {e}")
+                    continue
+                bucket.append([filepath, stat_info.st_dev, stat_info.st_ino])
+            
+            for group_key, paths in self._hash_buckets([bucket]):
+                verified[group_key] = paths
+            
+            if callback:
+                callback(((index + 1) / len(probable)) * 100, 
+                         f"Verifying groups: {index + 1}/{len(probable)}")
+        
+        if self.scan_stopped:
+            self._end_scan()
+            return {}
+        
+        self._end_scan()
+        return verified
+    
+    def _collect_groups(self, groups):
+        """Collect streamed duplicate groups into a dictionary; empty if the scan was stopped"""
+        duplicates = dict(groups)
+        if self.token.is_cancelled():
+            return {}
+        return duplicates
+    
+    def _walk_files(self, directories, callback=None):
+        """
+        Stream (filepath, filename, stat_info) for every file without keeping them
+        
+        Stops early when the scan is stopped.
+        """
+        files_seen = 0
         for directory in directories:
-            for root, _, files in os.walk(directory):
+            for root, _, files in self._walk(directory):
                 for filename in files:
                     if self.scan_stopped:
-                        self.is_scanning = False
-                        return {}
+                        return
                     
                     filepath = os.path.join(root, filename)
+                    self.throttle.throttle_files(1, self._stop_requested)
                     try:
-                        file_size = os.path.getsize(filepath)
-                        key = (filename, file_size)
-                        
-                        if key not in files_by_name_size:
-                            files_by_name_size[key] = []
-                        files_by_name_size[key].append(filepath)
+                        stat_info = self._stat(filepath)
                     except Exception as e:
                         print(f"Error processing file {filepath}: {e}")
+                        continue
+                    self.instrumentation.count('files')
                     
-                    processed_files += 1
-                    if callback:
-                        progress = (processed_files / total_files) * 100
-                        callback(progress, f"Processing files: {processed_files}/{total_files}")
+                    files_seen += 1
+                    if callback and files_seen % 100 == 0:
+                        callback(0, f"Scanned {files_seen} files...")
+                    yield filepath, filename, stat_info
+    
+    def iter_duplicates_by_name_size_external(self, directories, callback=None):
+        """
+        Find duplicates by name and size with memory bounded by memory_budget
+        
+        Args:
+            directories: List of directory paths to scan
+            callback: Function to call with progress updates
+            
+        Yields:
+            (name_size, list of duplicate file paths) tuples
+        """
+        self._begin_scan()
+        callback = self.instrumentation.wrap_callback(callback)
+        grouper = ExternalGrouper(self.memory_budget or 64 * 1024 * 1024, self.spill_dir)
+        try:
+            for filepath, filename, stat_info in self._walk_files(directories, callback):
+                grouper.add((filename, stat_info.st_size), filepath)
+            if self.token.is_cancelled():
+                return
+            
+            self.instrumentation.count('spilled_runs', len(grouper.runs))
+            for (name, size), paths in grouper.groups():
+                if self.scan_stopped:
+                    return
+                yield f"{name}_{size}", paths
+        finally:
+            grouper.close()
+            self._end_scan()
+    
+    def iter_duplicates_by_hash_external(self, directories, callback=None, batch_size=256):
+        """
+        Find duplicates by content hash with memory bounded by memory_budget
         
-        # Filter to keep only duplicate sets
-        duplicates = {f"{name}_{size}": files for (name, size), files in files_by_name_size.items() if len(files) > 1}
+        Files are streamed into size-keyed runs on disk. The merged runs are then
+        read size bucket by size bucket, and each bucket is hashed and grouped
+        on its own, so only one batch of buckets is held in memory at a time.
+        Hardlinks share a size, so they always meet in the same bucket.
         
-        self.is_scanning = False
-        return duplicates
+        Args:
+            directories: List of directory paths to scan
+            callback: Function to call with progress updates
+            batch_size: Files collected from several buckets before hashing them together
+            
+        Yields:
+            (hash, list of duplicate file paths) tuples
+        """
+        self._begin_scan()
+        callback = self.instrumentation.wrap_callback(callback)
+        grouper = ExternalGrouper(self.memory_budget or 64 * 1024 * 1024, self.spill_dir)
+        try:
+            for filepath, _, stat_info in self._walk_files(directories, callback):
+                grouper.add(stat_info.st_size, [filepath, stat_info.st_dev, stat_info.st_ino])
+            if self.token.is_cancelled():
+                return
+            self.instrumentation.count('spilled_runs', len(grouper.runs))
+            
+            processed_files = 0
+            batch = []
+            for size, records in itertools.chain(grouper.groups(), [(None, None)]):
+                if size is not None:
+                    batch.append(records)
+                    if sum(len(bucket) for bucket in batch) < batch_size:
+                        continue
+                if not batch:
+                    continue
+                
+                for file_hash, paths in self._hash_buckets(batch):
+                    yield file_hash, paths
+                if self.scan_stopped:
+                    return
+                
+                processed_files += sum(len(bucket) for bucket in batch)
+                batch = []
+                if callback:
+                    callback(0, f"Hashed {processed_files} candidate files...")
+        finally:
+            grouper.close()
+            self._end_scan()
+    
+    def _hash_buckets(self, buckets):
+        """
+        Hash a batch of same-size buckets and return their duplicate groups
+        
+        Buckets with at most lockstep_max_files distinct files are compared in
+        lockstep instead of hashed.
+        
+        Args:
+            buckets: List of buckets, each a list of [filepath, st_dev, st_ino] records
+            
+        Returns:
+            List of (hash, paths) tuples for groups spanning more than one inode
+        """
+        paths_by_inode = {}
+        inode_by_path = {}
+        entries = []
+        lockstep_groups = []
+        for bucket in buckets:
+            bucket_inodes = set()
+            for filepath, device, inode in bucket:
+                inode_key = (device, inode) if inode else filepath
+                bucket_inodes.add(inode_key)
+            if len(bucket_inodes) < 2:
+                continue  # only hardlinks to a single inode
+            bucket_entries = []
+            for filepath, device, inode in bucket:
+                inode_key = (device, inode) if inode else filepath
+                if inode_key not in paths_by_inode:
+                    paths_by_inode[inode_key] = []
+                    inode_by_path[filepath] = inode_key
+                    try:
+                        bucket_entries.append((filepath, self._stat(filepath)))
+                    except Exception as e:
+                        print(f"Error processing file {filepath}: {e}")
+                paths_by_inode[inode_key].append(filepath)
+            if len(bucket_entries) <= self.lockstep_max_files:
+                lockstep_groups.append(bucket_entries)
+            else:
+                entries.extend(bucket_entries)
+        
+        files_by_hash = {}
+        inodes_by_hash = {}
+        for group, matches in self._compare_groups(lockstep_groups):
+            size = group[0][1].st_size
+            for match in matches:
+                group_key = f"identical_{size}_{match[0]}"
+                files_by_hash[group_key] = []
+                inodes_by_hash[group_key] = set()
+                for filepath in match:
+                    files_by_hash[group_key].extend(paths_by_inode[inode_by_path[filepath]])
+                    inodes_by_hash[group_key].add(inode_by_path[filepath])
+        
+        for filepath, stat_info, file_hash in self.io_scheduler.map(
+                self.calculate_file_hash, entries, self._stop_requested):
+            if not file_hash:
+                continue
+            inode_key = self._inode_key(filepath, stat_info)
+            if file_hash not in files_by_hash:
+                files_by_hash[file_hash] = []
+                inodes_by_hash[file_hash] = set()
+            files_by_hash[file_hash].extend(paths_by_inode.get(inode_key, [filepath]))
+            inodes_by_hash[file_hash].add(inode_key)
+        
+        return [(file_hash, paths) for file_hash, paths in files_by_hash.items()
+                if len(inodes_by_hash[file_hash]) > 1]
+    
+    def find_duplicate_directories(self, directories, callback=None):
+        """
+        Find identical directory trees using Merkle hashes of their contents
+        
+        Every directory gets a hash of its children's names and content digests,
+        computed bottom-up in one pass. Each inode is hashed once, and files whose
+        size no other file has are not hashed at all: their directories (and all
+        ancestors) cannot have a duplicate. Only the largest duplicated trees are
+        reported, not each of their duplicated subdirectories.
+        
+        Args:
+            directories: List of directory paths to scan
+            callback: Function to call with progress updates
+            
+        Returns:
+            Dictionary with directory hash as key and {'paths', 'size', 'files'} as
+            value, where size is the total size of one copy; largest first
+        """
+        self._begin_scan()
+        callback = self.instrumentation.wrap_callback(callback)
+        
+        # First pass: record every directory's files and subdirectories
+        tree = {}
+        order = []
+        stat_by_path = {}
+        digest_by_path = {}
+        files_seen = 0
+        for directory in directories:
+            for root, dirs, files in self._walk(directory):
+                if self.scan_stopped:
+                    self._end_scan()
+                    return {}
+                
+                dir_files = []
+                subdirs = []
+                for name in dirs:
+                    dirpath = os.path.join(root, name)
+                    if os.path.islink(dirpath):
+                        # os.walk does not descend into symlinks; compare their targets
+                        try:
+                            digest_by_path[dirpath] = f"symlink:{os.readlink(dirpath)}"
+                        except OSError:
+                            pass
+                        dir_files.append((name, 0, dirpath))
+                    else:
+                        subdirs.append(name)
+                
+                for name in files:
+                    filepath = os.path.join(root, name)
+                    self.throttle.throttle_files(1, self._stop_requested)
+                    try:
+                        stat_info = self._stat(filepath)
+                    except Exception as e:
+                        print(f"Error processing file {filepath}: {e}")
+                        dir_files.append((name, 0, None))
+                        continue
+                    self.instrumentation.count('files')
+                    stat_by_path[filepath] = stat_info
+                    dir_files.append((name, stat_info.st_size, filepath))
+                    
+                    files_seen += 1
+                    if callback and files_seen % 100 == 0:
+                        callback(0, f"Scanned {files_seen} files...")
+                
+                tree[root] = (dir_files, subdirs)
+                order.append(root)
+        
+        # Hash each inode once, for sizes shared by more than one path
+        paths_by_size = {}
+        with self.instrumentation.phase('group'):
+            for filepath, stat_info in stat_by_path.items():
+                paths_by_size.setdefault(stat_info.st_size, []).append(filepath)
+        
+        paths_by_inode = {}
+        for size, paths in paths_by_size.items():
+            if len(paths) < 2:
+                continue
+            for filepath in paths:
+                paths_by_inode.setdefault(self._inode_key(filepath, stat_by_path[filepath]), []).append(filepath)
+        entries = [(paths[0], stat_by_path[paths[0]]) for paths in paths_by_inode.values()]
+        hashed_files = 0
+        
+        for filepath, stat_info, file_hash in self.io_scheduler.map(
+                self.calculate_file_hash, entries, self._stop_requested):
+            if self.scan_stopped:
+                break
+            if file_hash:
+                for alias in paths_by_inode[self._inode_key(filepath, stat_info)]:
+                    digest_by_path[alias] = file_hash
+            if callback:
+                hashed_files += 1
+                progress = (hashed_files / len(entries)) * 100
+                callback(progress, f"Hashing files: {hashed_files}/{len(entries)}")
+        
+        if self.scan_stopped:
+            self._end_scan()
+            return {}
+        
+        # Second pass: directory hashes bottom-up from the file digests
+        with self.instrumentation.phase('group'):
+            for dirpath, (dir_files, subdirs) in tree.items():
+                tree[dirpath] = ([(name, size, digest_by_path.get(path))
+                                  for name, size, path in dir_files], subdirs)
+            dir_hashes = compute_directory_hashes(tree, order)
+            
+            dirs_by_hash = {}
+            for dirpath, (dir_hash, total_size, file_count) in dir_hashes.items():
+                if dir_hash is not None and file_count:
+                    dirs_by_hash.setdefault(dir_hash, []).append(dirpath)
+            duplicated = {dir_hash: paths for dir_hash, paths in dirs_by_hash.items() if len(paths) > 1}
+            duplicated_dirs = {dirpath for paths in duplicated.values() for dirpath in paths}
+            
+            duplicates = {}
+            for dir_hash, paths in duplicated.items():
+                # Skip groups that are entirely inside larger duplicated trees
+                if all(os.path.dirname(dirpath) in duplicated_dirs for dirpath in paths):
+                    continue
+                _, total_size, file_count = dir_hashes[paths[0]]
+                duplicates[dir_hash] = {'paths': sorted(paths), 'size': total_size, 'files': file_count}
+        
+        if callback:
+            callback(100, f"Found {len(duplicates)} duplicated directories")
+        
+        self._end_scan()
+        return dict(sorted(duplicates.items(), key=lambda x: x[1]['size'], reverse=True))
+    
+    def index_directories(self, directories, callback=None):
+        """
+        Collect the records of a DuplicateIndex for the directories
+        
+        Like find_duplicates_by_hash(), only inodes sharing their size with
+        another inode are hashed.
+        
+        Args:
+            directories: List of directory paths to scan
+            callback: Function to call with progress updates
+            
+        Returns:
+            Dictionary with path as key and [size, mtime_ns, dev, ino, digest] as
+            value (digest None for unique sizes), or None if the scan was stopped
+        """
+        self._begin_scan()
+        callback = self.instrumentation.wrap_callback(callback)
+        
+        records = {}
+        paths_by_inode = {}
+        inodes_by_size = {}
+        for filepath, _, stat_info in self._walk_files(directories, callback):
+            records[filepath] = [stat_info.st_size, stat_info.st_mtime_ns, 
+                                 stat_info.st_dev, stat_info.st_ino, None]
+            inode_key = self._inode_key(filepath, stat_info)
+            if inode_key not in paths_by_inode:
+                paths_by_inode[inode_key] = []
+                inodes_by_size.setdefault(stat_info.st_size, []).append((inode_key, stat_info))
+            paths_by_inode[inode_key].append(filepath)
+        if self.scan_stopped:
+            self._end_scan()
+            return None
+        
+        entries = [(paths_by_inode[inode_key][0], stat_info)
+                   for inodes in inodes_by_size.values() if len(inodes) > 1
+                   for inode_key, stat_info in inodes]
+        hashed_files = 0
+        for filepath, stat_info, file_hash in self.io_scheduler.map(
+                self.calculate_file_hash, entries, self._stop_requested):
+            if self.scan_stopped:
+                break
+            for alias in paths_by_inode[self._inode_key(filepath, stat_info)]:
+                records[alias][4] = file_hash
+            hashed_files += 1
+            if callback:
+                progress = (hashed_files / len(entries)) * 100
+                callback(progress, f"Hashing files: {hashed_files}/{len(entries)}")
+        
+        if self.scan_stopped:
+            self._end_scan()
+            return None
+        
+        self._end_scan()
+        return records
+    
+    def create_snapshot(self, directories, callback=None, digests=False):
+        """
+        Record the current state of the directories for later comparison
+        
+        Args:
+            directories: List of directory paths to scan
+            callback: Function to call with progress updates
+            digests: Also record a content digest per file (reads every file once
+                per inode; enables content comparison and move detection by content)
+            
+        Returns:
+            ScanSnapshot, or None if the scan was stopped
+        """
+        self._begin_scan()
+        callback = self.instrumentation.wrap_callback(callback)
+        snapshot = ScanSnapshot(directories, has_digests=digests)
+        
+        records = {}
+        for directory in directories:
+            for root, dirs, files in self._walk(directory):
+                if self.scan_stopped:
+                    self._end_scan()
+                    return None
+                
+                dir_files = {}
+                for name in files:
+                    filepath = os.path.join(root, name)
+                    self.throttle.throttle_files(1, self._stop_requested)
+                    try:
+                        stat_info = self._stat(filepath)
+                    except Exception as e:
+                        print(f"Error processing file {filepath}: {e}")
+                        continue
+                    self.instrumentation.count('files')
+                    record = [stat_info.st_size, stat_info.st_mtime_ns, 
+                              stat_info.st_dev, stat_info.st_ino, None]
+                    dir_files[name] = record
+                    records[filepath] = (record, stat_info)
+                    
+                    if callback and len(records) % 100 == 0:
+                        callback(0, f"Scanned {len(records)} files...")
+                
+                # Like os.walk, symlinked directories are not followed
+                snapshot.add_directory(root, dir_files, 
+                                       [name for name in dirs if not os.path.islink(os.path.join(root, name))])
+        
+        if digests:
+            # Hash each inode once
+            paths_by_inode = {}
+            for filepath, (_, stat_info) in records.items():
+                paths_by_inode.setdefault(self._inode_key(filepath, stat_info), []).append(filepath)
+            entries = [(paths[0], records[paths[0]][1]) for paths in paths_by_inode.values()]
+            
+            hashed_files = 0
+            for filepath, stat_info, file_hash in self.io_scheduler.map(
+                    self.calculate_file_hash, entries, self._stop_requested):
+                if self.scan_stopped:
+                    break
+                for alias in paths_by_inode[self._inode_key(filepath, stat_info)]:
+                    records[alias][0][4] = file_hash
+                hashed_files += 1
+                if callback:
+                    progress = (hashed_files / len(entries)) * 100
+                    callback(progress, f"Hashing files: {hashed_files}/{len(entries)}")
+            
+            if self.scan_stopped:
+                self._end_scan()
+                return None
+        
+        with self.instrumentation.phase('group'):
+            snapshot.compute_hashes()
+        
+        if callback:
+            callback(100, f"Snapshot of {len(records)} files complete")
+        
+        self._end_scan()
+        return snapshot
     
     def find_similar_files(self, directories, similarity_threshold=0.8, callback=None):
         """
@@ -144,16 +1224,15 @@ class DuplicateFinder:
         Returns:
             Dictionary with group_id as key and list of similar file paths as value
         """
-        self.is_scanning = True
-        self.scan_stopped = False
+        self._begin_scan()
+        callback = self.instrumentation.wrap_callback(callback)
         
         # Get all files
-        all_files = []
-        for directory in directories:
-            for root, _, files in os.walk(directory):
-                for filename in files:
-                    filepath = os.path.join(root, filename)
-                    all_files.append((filepath, filename))
+        results = self._run_analyzers(directories, ['names'], callback)
+        if results is None:
+            self._end_scan()
+            return {}
+        all_files = results['names']
         
         total_comparisons = len(all_files) * (len(all_files) - 1) // 2
         processed_comparisons = 0
@@ -162,47 +1241,50 @@ class DuplicateFinder:
         similar_files = {}
         group_count = 0
         
-        # Compare each file with every other file
-        for i in range(len(all_files)):
-            filepath1, filename1 = all_files[i]
-            
-            for j in range(i + 1, len(all_files)):
-                if self.scan_stopped:
-                    self.is_scanning = False
-                    return {}
+        # Compare each file with every other file; the phase includes progress callbacks
+        with self.instrumentation.phase('compare'):
+            for i in range(len(all_files)):
+                filepath1, filename1 = all_files[i]
                 
-                filepath2, filename2 = all_files[j]
-                
-                # Compare filenames using sequence matcher
-                similarity = SequenceMatcher(None, filename1, filename2).ratio()
-                
-                if similarity >= similarity_threshold:
-                    group_key = f"group_{group_count}"
+                for j in range(i + 1, len(all_files)):
+                    if self.scan_stopped:
+                        self._end_scan()
+                        return {}
                     
-                    # Check if either file is already in a group
-                    existing_group = None
-                    for key, files in similar_files.items():
-                        if filepath1 in files or filepath2 in files:
-                            existing_group = key
-                            break
+                    filepath2, filename2 = all_files[j]
                     
-                    if existing_group:
-                        # Add to existing group
-                        if filepath1 not in similar_files[existing_group]:
-                            similar_files[existing_group].append(filepath1)
-                        if filepath2 not in similar_files[existing_group]:
-                            similar_files[existing_group].append(filepath2)
-                    else:
-                        # Create a new group
-                        similar_files[group_key] = [filepath1, filepath2]
-                        group_count += 1
-                
-                processed_comparisons += 1
-                if callback and processed_comparisons % 100 == 0:  # Update less frequently
-                    progress = (processed_comparisons / total_comparisons) * 100
-                    callback(progress, f"Comparing files: {processed_comparisons}/{total_comparisons}")
+                    # Compare filenames using sequence matcher
+                    similarity = SequenceMatcher(None, filename1, filename2).ratio()
+                    
+                    if similarity >= similarity_threshold:
+                        group_key = f"group_{group_count}"
+                        
+                        # Check if either file is already in a group
+                        existing_group = None
+                        for key, files in similar_files.items():
+                            if filepath1 in files or filepath2 in files:
+                                existing_group = key
+                                break
+                        
+                        if existing_group:
+                            # Add to existing group
+                            if filepath1 not in similar_files[existing_group]:
+                                similar_files[existing_group].append(filepath1)
+                            if filepath2 not in similar_files[existing_group]:
+                                similar_files[existing_group].append(filepath2)
+                        else:
+                            # Create a new group
+                            similar_files[group_key] = [filepath1, filepath2]
+                            group_count += 1
+                    
+                    processed_comparisons += 1
+                    if callback and processed_comparisons % 100 == 0:  # Update less frequently
+                        progress = (processed_comparisons / total_comparisons) * 100
+                        callback(progress, f"Comparing files: {processed_comparisons}/{total_comparisons}")
         
-        self.is_scanning = False
+        self.instrumentation.count('comparisons', processed_comparisons)
+        
+        self._end_scan()
         return similar_files
     
     def scan_directories(self, directories, callback=None):
@@ -216,60 +1298,30 @@ class DuplicateFinder:
         Returns:
             Dictionary with statistics
         """
-        self.is_scanning = True
-        self.scan_stopped = False
+        self._begin_scan()
+        callback = self.instrumentation.wrap_callback(callback)
         
-        stats = {
-            'total_files': 0,
-            'total_size': 0,
-            'extensions': {},
-            'largest_files': []
-        }
+        catalog = self.get_catalog(directories, callback)
         
-        # Process files
-        for directory in directories:
-            for root, _, files in os.walk(directory):
-                for filename in files:
-                    if self.scan_stopped:
-                        self.is_scanning = False
-                        return stats
-                    
-                    filepath = os.path.join(root, filename)
-                    try:
-                        # Get file size
-                        file_size = os.path.getsize(filepath)
-                        stats['total_files'] += 1
-                        stats['total_size'] += file_size
-                        
-                        # Track file extension
-                        _, extension = os.path.splitext(filename)
-                        extension = extension.lower()
-                        if extension in stats['extensions']:
-                            stats['extensions'][extension]['count'] += 1
-                            stats['extensions'][extension]['size'] += file_size
-                        else:
-                            stats['extensions'][extension] = {
-                                'count': 1,
-                                'size': file_size
-                            }
-                        
-                        # Track largest files
-                        stats['largest_files'].append((filepath, file_size))
-                        stats['largest_files'].sort(key=lambda x: x[1], reverse=True)
-                        stats['largest_files'] = stats['largest_files'][:10]  # Keep only top 10
-                        
-                    except Exception as e:
-                        print(f"Error processing file {filepath}: {e}")
-                    
-                    if callback and stats['total_files'] % 100 == 0:
-                        callback(0, f"Scanned {stats['total_files']} files...")
+        # Compute statistics in bulk from the catalog (partial if stopped)
+        with self.instrumentation.phase('group'):
+            stats = ANALYZERS['stats'](catalog)
         
-        self.is_scanning = False
+        stats['throttle'] = self.throttle.get_stats()
+        self._end_scan()
         return stats
     
     def stop_scan(self):
         """Stop the current scan"""
-        self.scan_stopped = True
+        self.token.cancel()
+    
+    def pause_scan(self):
+        """Pause the current scan at its next checkpoint"""
+        self.token.pause()
+    
+    def resume_scan(self):
+        """Resume a paused scan"""
+        self.token.resume()
         
     @staticmethod
     def format_file_size(size_bytes):
@@ -0,0 +1,325 @@
+import os
+import time
+import json
+import threading
+from watchdog.events import FileSystemEventHandler
+
+class DuplicateIndex(FileSystemEventHandler):
+    """Persistent size/hash index of files, kept current from file system events
+
+    Every indexed file is grouped by size; files whose size is shared with
+    another inode also carry a content digest and are grouped by it. Created
+    and modified files are queued and, once they have not changed for
+    settle_delay seconds, re-stat'ed and re-hashed on a worker thread, along
+    with any file in their size group that still needs a digest. Deletes and
+    moves only update the records. Duplicate groups can therefore be read at
+    any time without rescanning.
+    """
+    VERSION = 1
+
+    def __init__(self, index_file, finder, settle_delay=1.0, save_interval=30):
+        """
+        Args:
+            index_file: JSON file the index is persisted to
+            finder: DuplicateFinder used to hash files
+            settle_delay: Seconds a file must be unchanged before it is re-hashed
+            save_interval: Minimum seconds between saves after changes
+        """
+        self.index_file = index_file
+        self.finder = finder
+        self.settle_delay = settle_delay
+        self.save_interval = save_interval
+        self.lock = threading.RLock()
+        self.condition = threading.Condition(self.lock)
+        self.directories = []
+        self.files = {}            # path -> [size, mtime_ns, dev, ino, digest]
+        self.paths_by_size = {}    # size -> set of paths
+        self.paths_by_hash = {}    # digest -> set of paths
+        self.pending = {}          # path -> monotonic time of the last event
+        self.listeners = []
+        self.worker = None
+        self.running = False
+        self.dirty = False
+        self.last_save = time.monotonic()
+
+    @staticmethod
+    def _inode_key(filepath, record):
+        """Identify the data behind a path; falls back to the path where inodes are unavailable"""
+        return (record[2], record[3]) if record[3] else filepath
+
+    def _add_record(self, filepath, record):
+        """Add a file record to the groups; call with the lock held"""
+        self.files[filepath] = record
+        self.paths_by_size.setdefault(record[0], set()).add(filepath)
+        if record[4]:
+            self.paths_by_hash.setdefault(record[4], set()).add(filepath)
+
+    def _remove_record(self, filepath):
+        """Remove a file record from the groups; call with the lock held"""
+        record = self.files.pop(filepath, None)
+        if record is None:
+            return None
+        for groups, key in ((self.paths_by_size, record[0]), (self.paths_by_hash, record[4])):
+            paths = groups.get(key)
+            if paths is not None:
+                paths.discard(filepath)
+                if not paths:
+                    del groups[key]
+        return record
+
+    def _set_digest(self, filepath, digest):
+        """Record the digest of an indexed file; call with the lock held"""
+        record = self.files[filepath]
+        self._remove_record(filepath)
+        record[4] = digest
+        self._add_record(filepath, record)
+
+    def replace(self, directories, records):
+        """
+        Replace the whole index, e.g. with the result of DuplicateFinder.index_directories()
+
+        Args:
+            directories: Directories the index covers
+            records: Dictionary with path as key and [size, mtime_ns, dev, ino, digest] as value
+        """
+        with self.lock:
+            self.directories = list(directories)
+            self.files = {}
+            self.paths_by_size = {}
+            self.paths_by_hash = {}
+            self.pending = {}
+            for filepath, record in records.items():
+                self._add_record(filepath, list(record))
+            self.save()
+        self._notify()
+
+    def get_duplicates(self):
+        """
+        Get the current duplicate groups
+
+        Returns:
+            Dictionary with hash as key and list of duplicate file paths as value
+        """
+        with self.lock:
+            duplicates = {}
+            for digest, paths in self.paths_by_hash.items():
+                inodes = {self._inode_key(filepath, self.files[filepath]) for filepath in paths}
+                if len(inodes) > 1:
+                    duplicates[digest] = sorted(paths)
+            return duplicates
+
+    def add_listener(self, listener):
+        """Register a function called (from a worker thread) after the groups change"""
+        self.listeners.append(listener)
+
+    def _notify(self):
+        """Call the change listeners"""
+        for listener in list(self.listeners):
+            try:
+                listener()
+            except Exception as e:
+                print(f"Error in duplicate index listener: {e}")
+
+    def _covers(self, path):
+        """Check whether a path is inside the indexed directories"""
+        return any(path == directory or path.startswith(directory.rstrip(os.sep) + os.sep)
+                   for directory in self.directories)
+
+    def _paths_under(self, path):
+        """Get indexed paths equal to or below a path; call with the lock held"""
+        if path in self.files:
+            return [path]
+        prefix = path.rstrip(os.sep) + os.sep
+        return [filepath for filepath in self.files if filepath.startswith(prefix)]
+
+    def queue(self, path):
+        """Queue a file (or a directory's files) for re-stat and re-hash"""
+        with self.condition:
+            self.pending[path] = time.monotonic()
+            self.condition.notify()
+
+    def revalidate(self):
+        """Queue every indexed file, to pick up changes made while nothing was watching"""
+        with self.condition:
+            now = time.monotonic() - self.settle_delay
+            for filepath in self.files:
+                self.pending[filepath] = now
+            self.condition.notify()
+
+    def on_created(self, event):
+        """Handle created file event"""
+        self.queue(event.src_path)
+
+    def on_modified(self, event):
+        """Handle modified file event"""
+        if not event.is_directory:
+            self.queue(event.src_path)
+
+    def on_deleted(self, event):
+        """Handle deleted file event"""
+        with self.lock:
+            removed = [self._remove_record(filepath) for filepath in self._paths_under(event.src_path)]
+            self.pending.pop(event.src_path, None)
+            self.dirty = self.dirty or bool(removed)
+        if removed:
+            self._notify()
+
+    def on_moved(self, event):
+        """Handle moved file event; content is unchanged so records move without re-hashing"""
+        with self.lock:
+            moved = 0
+            for filepath in self._paths_under(event.src_path):
+                record = self._remove_record(filepath)
+                new_path = event.dest_path + filepath[len(event.src_path):]
+                if self._covers(new_path):
+                    self._remove_record(new_path)
+                    self._add_record(new_path, record)
+                moved += 1
+            self.pending.pop(event.src_path, None)
+            self.dirty = self.dirty or bool(moved)
+        # The destination may have been replaced by a file that was never indexed
+        if self._covers(event.dest_path):
+            self.queue(event.dest_path)
+        if moved:
+            self._notify()
+
+    def _take_settled(self):
+        """Wait for queued paths that have not changed for settle_delay seconds"""
+        with self.condition:
+            while self.running:
+                now = time.monotonic()
+                settled = [path for path, last_event in self.pending.items()
+                           if now - last_event >= self.settle_delay]
+                if settled:
+                    for path in settled:
+                        del self.pending[path]
+                    return settled
+                if self.dirty and time.monotonic() - self.last_save >= self.save_interval:
+                    self.save()
+                self.condition.wait(self.settle_delay if self.pending or self.dirty else None)
+            return []
+
+    def _refresh(self, paths):
+        """Bring the records of paths up to date; hashes outside the lock"""
+        files_to_check = []
+        for path in paths:
+            if os.path.isdir(path):
+                for root, _, files in os.walk(path):
+                    files_to_check.extend(os.path.join(root, name) for name in files)
+            else:
+                files_to_check.append(path)
+
+        changed = False
+        to_hash = set()
+        with self.lock:
+            for filepath in files_to_check:
+                try:
+                    stat_info = os.stat(filepath)
+                except OSError:
+                    changed = self._remove_record(filepath) is not None or changed
+                    continue
+                record = [stat_info.st_size, stat_info.st_mtime_ns, stat_info.st_dev, stat_info.st_ino, None]
+                old_record = self.files.get(filepath)
+                if old_record is not None and old_record[:4] == record[:4]:
+                    continue
+                self._remove_record(filepath)
+                self._add_record(filepath, record)
+                changed = True
+
+                # A size shared by several inodes needs digests for all of them
+                paths = self.paths_by_size[record[0]]
+                if len({self._inode_key(p, self.files[p]) for p in paths}) > 1:
+                    to_hash.update(p for p in paths if not self.files[p][4])
+
+        # Hash each inode once; hardlinked paths get the same digest
+        digests = {}
+        for filepath in sorted(to_hash):
+            with self.lock:
+                record = self.files.get(filepath)
+                if record is None:
+                    continue
+                inode_key = self._inode_key(filepath, record)
+                expected = list(record[:4])
+            if inode_key not in digests:
+                digests[inode_key] = self.finder.calculate_file_hash(filepath)
+            digest = digests[inode_key]
+            with self.lock:
+                record = self.files.get(filepath)
+                # Skip files changed while hashing; their own event re-queues them
+                if digest and record is not None and record[:4] == expected:
+                    self._set_digest(filepath, digest)
+                    changed = True
+
+        if changed:
+            with self.lock:
+                self.dirty = True
+            self._notify()
+
+    def _run(self):
+        """Worker loop processing queued paths"""
+        while self.running:
+            paths = self._take_settled()
+            if paths:
+                try:
+                    self._refresh(paths)
+                except Exception as e:
+                    print(f"Error updating duplicate index: {e}")
+
+    def start(self):
+        """Start the worker thread"""
+        if self.worker is None:
+            self.running = True
+            self.worker = threading.Thread(target=self._run, daemon=True)
+            self.worker.start()
+
+    def stop(self):
+        """Stop the worker thread and save the index"""
+        if self.worker is not None:
+            with self.condition:
+                self.running = False
+                self.condition.notify()
+            self.worker.join()
+            self.worker = None
+        with self.lock:
+            if self.dirty:
+                self.save()
+
+    def save(self):
+        """Write the index atomically (temp file, then rename)"""
+        with self.lock:
+            self.last_save = time.monotonic()
+            self.dirty = False
+            try:
+                temp_file = f"{self.index_file}.tmp"
+                with open(temp_file, 'w') as f:
+                    json.dump({'version': self.VERSION, 'directories': self.directories,
+                               'files': self.files}, f)
+                os.replace(temp_file, self.index_file)
+            except Exception as e:
+                print(f"Error saving duplicate index: {e}")
+
+    def load(self):
+        """
+        Load the index from file
+
+        Returns:
+            True if an index was loaded, False otherwise
+        """
+        try:
+            if not os.path.exists(self.index_file):
+                return False
+            with open(self.index_file, 'r') as f:
+                data = json.load(f)
+            if data.get('version') != self.VERSION:
+                return False
+            with self.lock:
+                self.directories = data['directories']
+                self.files = {}
+                self.paths_by_size = {}
+                self.paths_by_hash = {}
+                for filepath, record in data['files'].items():
+                    self._add_record(filepath, record)
+            return True
+        except Exception as e:
+            print(f"Error loading duplicate index: {e}")
+            return False
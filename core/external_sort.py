@@ -0,0 +1,138 @@
+import os
+import json
+import heapq
+import shutil
+import tempfile
+import itertools
+
+def estimate_size(obj):
+    """Rough number of bytes a record occupies in memory"""
+    if isinstance(obj, str):
+        return 49 + len(obj)
+    if isinstance(obj, (tuple, list)):
+        return 56 + 8 * len(obj) + sum(estimate_size(item) for item in obj)
+    return 28
+
+def _to_tuple(value):
+    """Turn JSON lists back into tuples so decoded keys compare like the originals"""
+    if isinstance(value, list):
+        return tuple(_to_tuple(item) for item in value)
+    return value
+
+class ExternalGrouper:
+    """Memory-bounded grouping of (key, value) records
+
+    Records are buffered in memory until the buffer reaches the memory budget,
+    then sorted by key and written to a run file on disk. groups() k-way merges
+    the runs (and the remaining buffer) and yields the values of each key, so
+    peak memory is bounded by the budget plus one group, however many records
+    are added. Keys must be strings, numbers or (nested) tuples of them.
+    """
+    def __init__(self, memory_budget=64 * 1024 * 1024, temp_dir=None, max_merge_fanin=64):
+        """
+        Args:
+            memory_budget: Approximate bytes of buffered records before spilling a run
+            temp_dir: Directory for run files (system temp directory by default)
+            max_merge_fanin: Maximum number of runs opened at once while merging
+        """
+        self.memory_budget = memory_budget
+        self.temp_dir = temp_dir
+        self.max_merge_fanin = max(2, max_merge_fanin)
+        self.buffer = []
+        self.buffer_bytes = 0
+        self.runs = []
+        self.run_dir = None
+        self.records = 0
+        self.spilled_records = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add(self, key, value):
+        """Add a record, spilling the buffer to disk if over the memory budget"""
+        self.buffer.append((key, value))
+        self.buffer_bytes += estimate_size(key) + estimate_size(value) + 64
+        self.records += 1
+        if self.buffer_bytes >= self.memory_budget:
+            self._spill()
+
+    def _new_run_path(self):
+        """Get a path for a new run file"""
+        if self.run_dir is None:
+            self.run_dir = tempfile.mkdtemp(prefix="file_tracker_runs_", dir=self.temp_dir)
+        return os.path.join(self.run_dir, f"run_{len(self.runs)}_{self.spilled_records}.jsonl")
+
+    def _write_run(self, records):
+        """Write sorted records to a new run file and return its path"""
+        path = self._new_run_path()
+        with open(path, 'w', encoding='utf-8') as f:
+            for key, value in records:
+                f.write(json.dumps([key, value]))
+                f.write("\n")
+        return path
+
+    def _spill(self):
+        """Sort the buffer and write it as a run"""
+        if not self.buffer:
+            return
+        self.buffer.sort(key=lambda record: record[0])
+        self.runs.append(self._write_run(self.buffer))
+        self.spilled_records += len(self.buffer)
+        self.buffer = []
+        self.buffer_bytes = 0
+
+    @staticmethod
+    def _read_run(path):
+        """Stream the records of a run file"""
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                key, value = json.loads(line)
+                yield _to_tuple(key), value
+
+    def _reduce_runs(self):
+        """Merge runs in batches until they can all be opened at once"""
+        while len(self.runs) > self.max_merge_fanin:
+            batch = self.runs[:self.max_merge_fanin]
+            merged = heapq.merge(*(self._read_run(path) for path in batch),
+                                 key=lambda record: record[0])
+            merged_path = self._write_run(merged)
+            for path in batch:
+                os.remove(path)
+            self.runs = self.runs[self.max_merge_fanin:] + [merged_path]
+
+    def groups(self, min_count=2):
+        """
+        Merge all records and yield them grouped by key, in key order
+
+        Args:
+            min_count: Only yield keys with at least this many values
+
+        Yields:
+            (key, list of values) tuples
+        """
+        if self.runs:
+            # Spill the rest so every source is read from disk in key order
+            self._spill()
+            self._reduce_runs()
+            merged = heapq.merge(*(self._read_run(path) for path in self.runs),
+                                 key=lambda record: record[0])
+        else:
+            self.buffer.sort(key=lambda record: record[0])
+            merged = iter(self.buffer)
+
+        for key, records in itertools.groupby(merged, key=lambda record: record[0]):
+            values = [value for _, value in records]
+            if len(values) >= min_count:
+                yield key, values
+
+    def close(self):
+        """Delete all run files"""
+        self.buffer = []
+        self.buffer_bytes = 0
+        self.runs = []
+        if self.run_dir is not None:
+            shutil.rmtree(self.run_dir, ignore_errors=True)
+            self.run_dir = None
@@ -1,43 +1,131 @@
 import os
 import datetime
 import json
-from watchdog.observers import Observer
+import threading
 from watchdog.events import FileSystemEventHandler
 
+from core.instrumentation import ScanInstrumentation
+from core.history_archive import HistoryArchive
+from core.path_search import PathSearchIndex
+
 class FileTracker(FileSystemEventHandler):
     """Class to track file activity and maintain history"""
     
-    def __init__(self, watch_paths, history_file):
-        """Initialize the file tracker"""
+    def __init__(self, watch_paths, history_file, instrumentation=None, state_file=None,
+                 retention_days=None, max_age_days=None, archive_dir=None, compression='gzip',
+                 load=True):
+        """
+        Initialize the file tracker
+        
+        Args:
+            watch_paths: Folders to watch
+            history_file: JSON file with the file history per date
+            instrumentation: ScanInstrumentation collecting timers and counters
+            state_file: JSON file with the directory state used to catch up on
+                changes made while the tracker was not running (defaults to
+                the history file name with a _dirstate suffix)
+            retention_days: Days kept in the history file; older dates are
+                moved to compressed archive segments (None keeps everything)
+            max_age_days: Days after which dates are deleted, archived or not
+                (None keeps them forever)
+            archive_dir: Directory for the archive segments (defaults to the
+                history file name with an _archive suffix)
+            compression: 'gzip' or 'lzma' for the archive segments
+            load: Load the history now; pass False to call load() later, e.g.
+                from a background thread after the window has appeared
+        """
         self.watch_paths = watch_paths
         self.history_file = history_file
+        self.state_file = state_file or f"{os.path.splitext(history_file)[0]}_dirstate.json"
+        self.instrumentation = instrumentation or ScanInstrumentation()
+        self.retention_days = retention_days
+        self.max_age_days = max_age_days
+        self.archive = HistoryArchive(
+            archive_dir or f"{os.path.splitext(history_file)[0]}_archive", compression)
         self.today = datetime.datetime.now().strftime('%Y-%m-%d')
         self.today_files = set()
         self.history = {}
         self.observer = None
-        self.load_history()
+        self.handlers = []  # (handler, path) sharing this tracker's observer
+        self.handler_watches = {}
+        self.lock = threading.RLock()
+        self.dir_state = {}  # dirpath -> [dir mtime_ns, {file name: mtime_ns}, [subdir names]]
+        self.changed_dirs = set()  # Directories with events since the state was last refreshed
+        self.reconcile_thread = None
+        self.reconcile_stopped = threading.Event()
+        self.on_reconciled = None  # Called with the number of back-filled files
+        self.change_listeners = []
+        self.search_index = None  # PathSearchIndex, built on the first search
+        self.loaded = threading.Event()  # Set once the history and directory state are loaded
+        if load:
+            self.load()
+
+    def load(self):
+        """
+        Load the history and directory state
+        
+        Files recorded before loading (e.g. folders added while the history
+        was loading in the background) are merged into the loaded history.
+        """
+        with self.lock:
+            pending_history, pending_today = self.history, self.today_files
+            self.history, self.today_files = {}, set()
+            self.load_history()
+            self.load_dir_state()
+            for date_str, files in pending_history.items():
+                if date_str != self.today and files:
+                    self.history[date_str] = list(set(self.history.get(date_str, [])) | set(files))
+            self.today_files |= pending_today
+            self.loaded.set()
+        if pending_history or pending_today:
+            self.save_history()
+        self._notify_change(None)
 
     def load_history(self):
         """Load existing history from file"""
         try:
             if os.path.exists(self.history_file):
-                with open(self.history_file, 'r') as f:
-                    self.history = json.load(f)
-                    if self.today in self.history:
-                        self.today_files = set(self.history[self.today])
+                with self.instrumentation.phase('load_history'):
+                    with open(self.history_file, 'r') as f:
+                        self.history = json.load(f)
+                        if self.today in self.history:
+                            self.today_files = set(self.history[self.today])
+                self.instrumentation.count('history_bytes_loaded', os.path.getsize(self.history_file))
         except Exception as e:
             print(f"Error loading history: {e}")
             self.history = {}
 
     def save_history(self):
         """Save current history to file"""
+        if not self.loaded.is_set():
+            return  # Would overwrite the file before it has been read; load() saves
         try:
-            self.history[self.today] = list(self.today_files)
-            with open(self.history_file, 'w') as f:
-                json.dump(self.history, f, indent=4)
+            with self.lock, self.instrumentation.phase('save_history'):
+                self.history[self.today] = list(self.today_files)
+                with open(self.history_file, 'w') as f:
+                    json.dump(self.history, f, indent=4)
+            self.instrumentation.count('history_saves')
         except Exception as e:
             print(f"Error saving history: {e}")
 
+    def add_change_listener(self, listener):
+        """
+        Register a function called with (date_str, added paths, removed paths)
+        whenever the history of a date changes; date_str is None if any date
+        may have changed. Called from the thread making the change.
+        """
+        self.change_listeners.append(listener)
+
+    def _notify_change(self, date_str, added=(), removed=()):
+        """Call the change listeners"""
+        if not added and not removed and date_str is not None:
+            return
+        for listener in list(self.change_listeners):
+            try:
+                listener(date_str, list(added), list(removed))
+            except Exception as e:
+                print(f"Error in history change listener: {e}")
+
     def add_current_files_for_date(self, date_str, path):
         """Add currently existing files in the path to history for a specific date"""
         try:
@@ -46,10 +134,14 @@ class FileTracker(FileSystemEventHandler):
 
             current_files = set()
             for root, _, files in os.walk(path):
+                self.instrumentation.count('scandir')
                 for file in files:
                     try:
                         full_path = os.path.join(root, file)
-                        file_modified = datetime.datetime.fromtimestamp(os.path.getmtime(full_path))
+                        with self.instrumentation.phase('stat'):
+                            file_mtime = os.path.getmtime(full_path)
+                        self.instrumentation.count('stat')
+                        file_modified = datetime.datetime.fromtimestamp(file_mtime)
                         file_date_str = file_modified.strftime('%Y-%m-%d')
                         if file_date_str == date_str:
                             current_files.add(full_path)
@@ -57,62 +149,438 @@ class FileTracker(FileSystemEventHandler):
                         print(f"Error processing file {file}: {e}")
                         continue
 
-            if date_str in self.history:
-                existing_files = set(self.history[date_str])
+            with self.lock:
+                if date_str == self.today:
+                    existing_files = self.today_files
+                else:
+                    existing_files = set(self.history.get(date_str, []))
+                    current_files -= set(self.archive.get_files(date_str))
+                new_files = current_files - existing_files
                 existing_files.update(current_files)
                 self.history[date_str] = list(existing_files)
-            else:
-                self.history[date_str] = list(current_files)
 
             self.save_history()
+            self._notify_change(date_str, new_files)
             return True
             
         except Exception as e:
             print(f"Error adding current files: {e}")
             return False
 
+    def load_dir_state(self):
+        """Load the directory state saved at the last shutdown"""
+        try:
+            if os.path.exists(self.state_file):
+                with open(self.state_file, 'r') as f:
+                    self.dir_state = json.load(f)
+        except Exception as e:
+            print(f"Error loading directory state: {e}")
+            self.dir_state = {}
+
+    def save_dir_state(self):
+        """Save the directory state for catching up at the next start"""
+        if not self.loaded.is_set():
+            return
+        try:
+            with self.lock:
+                temp_file = f"{self.state_file}.tmp"
+                with open(temp_file, 'w') as f:
+                    json.dump(self.dir_state, f)
+                os.replace(temp_file, self.state_file)
+        except Exception as e:
+            print(f"Error saving directory state: {e}")
+
+    def _list_directory(self, dirpath):
+        """
+        List a directory for the directory state
+        
+        Returns:
+            ({file name: mtime_ns}, [subdirectory names]) tuple, or None on error
+        """
+        try:
+            with os.scandir(dirpath) as it:
+                entries = list(it)
+            self.instrumentation.count('scandir')
+        except OSError as e:
+            print(f"Error listing directory {dirpath}: {e}")
+            return None
+        
+        files = {}
+        subdirs = []
+        for entry in entries:
+            try:
+                # Like os.walk, do not descend into symlinked directories
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        subdirs.append(entry.name)
+                    continue
+                files[entry.name] = entry.stat().st_mtime_ns
+            except OSError:
+                continue
+        return files, subdirs
+
+    def refresh_dir_state(self):
+        """
+        List the directories changed while running again into the directory state
+        
+        The state loaded or reconciled at startup would otherwise be saved at
+        shutdown with the old mtimes, and the next start would list these
+        directories and back-fill their files again. Directories created
+        while running are added with everything below them.
+        """
+        with self.lock:
+            changed_dirs, self.changed_dirs = self.changed_dirs, set()
+        
+        roots = [os.path.join(path, '') for path in self.watch_paths]
+        updates = {}
+        stack = [dirpath for dirpath in changed_dirs
+                 if any(os.path.join(dirpath, '').startswith(root) for root in roots)]
+        while stack:
+            dirpath = stack.pop()
+            if dirpath in updates:
+                continue
+            try:
+                with self.instrumentation.phase('stat'):
+                    dir_mtime = os.stat(dirpath).st_mtime_ns
+                self.instrumentation.count('stat')
+            except OSError:
+                continue  # Removed; dropped from the state by the next reconcile
+            listing = self._list_directory(dirpath)
+            if listing is None:
+                continue
+            files, subdirs = listing
+            updates[dirpath] = [dir_mtime, files, subdirs]
+            stack.extend(os.path.join(dirpath, name) for name in subdirs
+                         if os.path.join(dirpath, name) not in self.dir_state)
+        
+        with self.lock:
+            self.dir_state.update(updates)
+
+    def reconcile(self):
+        """
+        Back-fill history with changes made while the tracker was not running
+        
+        Compares the watched folders with the saved directory state. Only
+        directories whose mtime changed are listed again, and files in them
+        that are new or have a new mtime are added to the history under the
+        date of their mtime; an unchanged directory costs one stat. Files
+        rewritten in place (leaving their directory's mtime unchanged) are not
+        detected. Folders without saved state are only recorded.
+        
+        Returns:
+            Number of files back-filled, or None if stopped
+        """
+        backfilled = {}  # date -> set of paths
+        new_state = {}
+        for path in list(self.watch_paths):
+            if not os.path.isdir(path):
+                continue
+            has_baseline = path in self.dir_state
+            
+            stack = [path]
+            while stack:
+                if self.reconcile_stopped.is_set():
+                    return None
+                dirpath = stack.pop()
+                try:
+                    with self.instrumentation.phase('stat'):
+                        dir_mtime = os.stat(dirpath).st_mtime_ns
+                    self.instrumentation.count('stat')
+                except OSError:
+                    continue
+                
+                old_state = self.dir_state.get(dirpath)
+                if old_state is not None and old_state[0] == dir_mtime:
+                    # No entries added, removed or renamed: reuse the saved listing
+                    new_state[dirpath] = old_state
+                    stack.extend(os.path.join(dirpath, name) for name in old_state[2])
+                    continue
+                
+                listing = self._list_directory(dirpath)
+                if listing is None:
+                    continue
+                files, subdirs = listing
+                
+                if has_baseline:
+                    for name, file_mtime in files.items():
+                        old_mtime = old_state[1].get(name) if old_state else None
+                        if old_mtime != file_mtime:
+                            file_date_str = datetime.datetime.fromtimestamp(
+                                file_mtime / 1e9).strftime('%Y-%m-%d')
+                            backfilled.setdefault(file_date_str, set()).add(os.path.join(dirpath, name))
+                
+                new_state[dirpath] = [dir_mtime, files, subdirs]
+                stack.extend(os.path.join(dirpath, name) for name in subdirs)
+        
+        with self.lock:
+            for date_str, paths in backfilled.items():
+                if date_str == self.today:
+                    existing_files = self.today_files
+                else:
+                    existing_files = set(self.history.get(date_str, []))
+                    paths -= set(self.archive.get_files(date_str))
+                backfilled[date_str] = paths - existing_files
+                existing_files.update(paths)
+                self.history[date_str] = list(existing_files)
+            self.dir_state = new_state
+        
+        backfilled_count = sum(len(paths) for paths in backfilled.values())
+        if backfilled_count:
+            self.save_history()
+            for date_str, paths in backfilled.items():
+                self._notify_change(date_str, paths)
+        self.save_dir_state()
+        self.instrumentation.count('reconciled_files', backfilled_count)
+        return backfilled_count
+
+    def apply_retention(self):
+        """
+        Move dates older than retention_days to the archive and delete dates
+        older than max_age_days
+        
+        Dates are only removed from the history file once their archive
+        segment has been written. Archived dates stay available through
+        get_files_for_date().
+        
+        Returns:
+            (number of dates archived, number of dates deleted) tuple
+        """
+        if self.retention_days is None and self.max_age_days is None:
+            return 0, 0
+        
+        today = datetime.date.today()
+        drop_before = archive_before = None
+        if self.max_age_days is not None:
+            drop_before = (today - datetime.timedelta(days=self.max_age_days)).strftime('%Y-%m-%d')
+        if self.retention_days is not None:
+            archive_before = (today - datetime.timedelta(days=self.retention_days)).strftime('%Y-%m-%d')
+        
+        with self.lock:
+            dropped = []
+            if drop_before is not None:
+                dropped = [d for d in self.history if d < drop_before and d != self.today]
+                for date_str in dropped:
+                    del self.history[date_str]
+            old = {}
+            if archive_before is not None:
+                old = {d: list(files) for d, files in self.history.items()
+                       if d < archive_before and d != self.today}
+        
+        dropped_count = len(dropped)
+        if drop_before is not None:
+            dropped_count += self.archive.drop_before(drop_before)
+        
+        archived = 0
+        if old and self.archive.add(old):
+            with self.lock:
+                for date_str, files in old.items():
+                    # Files added since the copy was taken stay in the history file
+                    remaining = set(self.history.get(date_str, [])) - set(files)
+                    if remaining:
+                        self.history[date_str] = list(remaining)
+                    else:
+                        self.history.pop(date_str, None)
+            archived = len(old)
+        
+        if archived or dropped:
+            self.save_history()
+        if dropped_count:
+            self._notify_change(None)
+        self.instrumentation.count('archived_dates', archived)
+        self.instrumentation.count('dropped_dates', dropped_count)
+        return archived, dropped_count
+
+    def _run_reconcile(self):
+        """Apply the retention policy, then run the startup reconciliation and report its result"""
+        try:
+            self.apply_retention()
+        except Exception as e:
+            print(f"Error applying history retention: {e}")
+        try:
+            count = self.reconcile()
+        except Exception as e:
+            print(f"Error reconciling history: {e}")
+            return
+        if count is not None and self.on_reconciled:
+            self.on_reconciled(count)
+
     def start(self):
         """Start the file observer"""
         if self.observer is None:
+            from watchdog.observers import Observer  # Loads the platform backend; deferred until needed
             self.observer = Observer()
             for path in self.watch_paths:
                 if os.path.exists(path):
                     self.observer.schedule(self, path, recursive=True)
+            for handler, path in self.handlers:
+                self._schedule_handler(handler, path)
             self.observer.start()
+            
+            # Catch up on changes made while not running, after the observer
+            # has started so nothing falls in between
+            self.reconcile_stopped.clear()
+            self.reconcile_thread = threading.Thread(target=self._run_reconcile, daemon=True)
+            self.reconcile_thread.start()
 
     def stop(self):
-        """Stop the file observer"""
+        """Stop the file observer and save the directory state"""
         if self.observer is not None:
+            self.reconcile_stopped.set()
+            if self.reconcile_thread is not None:
+                self.reconcile_thread.join()
+                self.reconcile_thread = None
             self.observer.stop()
             self.observer.join()
             self.observer = None
+            self.handler_watches = {}
+            self.refresh_dir_state()
+            self.save_dir_state()
+
+    def set_watch_paths(self, watch_paths):
+        """Change the watched folders, restarting the observer if it is running"""
+        running = self.observer is not None
+        if running:
+            self.stop()
+        self.watch_paths = list(watch_paths)
+        if running:
+            self.start()
+
+    def get_history_stats(self):
+        """
+        Get the size of the history
+        
+        Returns:
+            Dictionary with the number of hot dates, hot entries, files seen
+            today, archive segments and the watched folders
+        """
+        with self.lock:
+            return {
+                'dates': len(self.history),
+                'entries': sum(len(files) for date, files in self.history.items() if date != self.today)
+                           + len(self.today_files),
+                'today': len(self.today_files),
+                'archive_segments': len(self.archive.segments()),
+                'watch_paths': list(self.watch_paths)
+            }
+
+    def _schedule_handler(self, handler, path):
+        """Schedule an extra handler on the running observer"""
+        if self.observer is not None and os.path.exists(path):
+            try:
+                self.handler_watches[(id(handler), path)] = self.observer.schedule(
+                    handler, path, recursive=True)
+            except Exception as e:
+                print(f"Error watching {path}: {e}")
+
+    def add_handler(self, handler, path):
+        """
+        Deliver file system events below a path to another handler as well
+
+        The handler shares this tracker's observer and is scheduled whenever
+        the tracker is started.
+        """
+        if (handler, path) not in self.handlers:
+            self.handlers.append((handler, path))
+            self._schedule_handler(handler, path)
+
+    def remove_handler(self, handler):
+        """Stop delivering events to a handler added with add_handler()"""
+        for path in [path for h, path in self.handlers if h is handler]:
+            self.handlers.remove((handler, path))
+            watch = self.handler_watches.pop((id(handler), path), None)
+            if watch is not None and self.observer is not None:
+                try:
+                    self.observer.unschedule(watch)
+                except Exception as e:
+                    print(f"Error unwatching {path}: {e}")
+
+    def on_any_event(self, event):
+        """Note the directories whose entries or files an event changed"""
+        if event.event_type in ('opened', 'closed_no_write'):
+            return
+        changed = [os.path.dirname(event.src_path)]
+        if event.is_directory:
+            changed.append(event.src_path)
+        dest_path = getattr(event, 'dest_path', '')
+        if dest_path:
+            changed.append(os.path.dirname(dest_path))
+            if event.is_directory:
+                changed.append(dest_path)
+        with self.lock:
+            self.changed_dirs.update(changed)
 
     def on_modified(self, event):
         """Handle modified file event"""
         if not event.is_directory:
-            self.today_files.add(event.src_path)
-            self.save_history()
+            with self.lock, self.instrumentation.phase('event'):
+                is_new = event.src_path not in self.today_files
+                self.today_files.add(event.src_path)
+                self.save_history()
+            self.instrumentation.count('events')
+            if is_new:
+                self._notify_change(self.today, [event.src_path])
 
     def on_created(self, event):
         """Handle created file event"""
         if not event.is_directory:
-            self.today_files.add(event.src_path)
-            self.save_history()
+            with self.lock, self.instrumentation.phase('event'):
+                is_new = event.src_path not in self.today_files
+                self.today_files.add(event.src_path)
+                self.save_history()
+            self.instrumentation.count('events')
+            if is_new:
+                self._notify_change(self.today, [event.src_path])
 
     def get_files_for_date(self, date_str, selected_paths=None):
         """Get files for a specific date from history, filtered by selected paths"""
-        all_files = self.history.get(date_str, [])
-        if not selected_paths:
-            return all_files
-        return [f for f in all_files if any(f.startswith(path) for path in selected_paths)]
+        with self.instrumentation.phase('query'):
+            all_files = self.history.get(date_str, [])
+            if date_str != self.today and self.archive.has_segment(date_str):
+                archived_files = self.archive.get_files(date_str)
+                if archived_files:
+                    all_files = list(dict.fromkeys(archived_files + all_files))
+            if not selected_paths:
+                return all_files
+            return [f for f in all_files if any(f.startswith(path) for path in selected_paths)]
+
+    def search_paths(self, query, limit=1000):
+        """
+        Find files matching a substring or glob across all dates
+        
+        The first search builds the index over the whole history, including
+        the archive, in a background thread and waits for it; later searches
+        use it as it is kept current.
+        
+        Returns:
+            List of (path, sorted list of dates) tuples, most recently changed first
+        """
+        search_index = self._get_search_index()
+        with self.instrumentation.phase('search'):
+            return search_index.search(query, limit)
+    
+    def _get_search_index(self):
+        """Get the path search index, starting its build if it does not exist yet"""
+        with self.lock:
+            if self.search_index is None:
+                self.search_index = PathSearchIndex(self)
+                self.search_index.start_build()
+            return self.search_index
 
     def clean_history_for_path(self, removed_path):
         """Remove files from history that were in the removed folder"""
         try:
-            for date in self.history:
-                self.history[date] = [f for f in self.history[date]
-                                    if not f.startswith(removed_path)]
+            removed = {}
+            with self.lock:
+                for date in self.history:
+                    removed[date] = [f for f in self.history[date] if f.startswith(removed_path)]
+                    self.history[date] = [f for f in self.history[date]
+                                        if not f.startswith(removed_path)]
+                self.today_files = {f for f in self.today_files if not f.startswith(removed_path)}
+            for date, files in self.archive.remove_prefix(removed_path).items():
+                removed[date] = removed.get(date, []) + files
             self.save_history()
+            for date, files in removed.items():
+                self._notify_change(date, (), files)
             return True
         except Exception as e:
             print(f"Error cleaning history: {e}")
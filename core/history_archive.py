@@ -0,0 +1,205 @@
+import os
+import re
+import gzip
+import json
+import threading
+from collections import OrderedDict
+
+try:
+    import lzma
+except ImportError:  # Python builds without liblzma; gzip is always available
+    lzma = None
+
+# Compression name -> (file extension, open function)
+COMPRESSORS = {'gzip': ('.json.gz', gzip.open)}
+if lzma is not None:
+    COMPRESSORS['lzma'] = ('.json.xz', lzma.open)
+
+SEGMENT_PATTERN = re.compile(r'^history_(\d{4}-\d{2})(\.json\.gz|\.json\.xz)$')
+
+class HistoryArchive:
+    """Compressed monthly segments of old FileTracker history
+
+    Each segment file holds the dates of one month as compressed JSON.
+    Segments are only decompressed when a date in them is queried, and the
+    most recently used ones are kept in memory.
+    """
+    def __init__(self, archive_dir, compression='gzip', cache_size=4):
+        """
+        Args:
+            archive_dir: Directory holding the segment files
+            compression: 'gzip' or 'lzma' for newly written segments
+            cache_size: Number of decompressed segments kept in memory
+        """
+        if compression not in COMPRESSORS:
+            print(f"Compression {compression} is not available, using gzip")
+            compression = 'gzip'
+        self.archive_dir = archive_dir
+        self.compression = compression
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # segment -> {date: [files]}
+        self.lock = threading.RLock()
+        self.segment_files = None   # segment -> path, listed on first use
+
+    @staticmethod
+    def segment_of(date_str):
+        """Get the segment (YYYY-MM) of a date"""
+        return date_str[:7]
+
+    def _list_segments(self):
+        """Get the segment files in the archive directory"""
+        with self.lock:
+            if self.segment_files is None:
+                self.segment_files = {}
+                if os.path.isdir(self.archive_dir):
+                    for name in os.listdir(self.archive_dir):
+                        match = SEGMENT_PATTERN.match(name)
+                        if match:
+                            self.segment_files[match.group(1)] = os.path.join(self.archive_dir, name)
+            return self.segment_files
+
+    def segments(self):
+        """Get the archived segments, oldest first"""
+        return sorted(self._list_segments())
+
+    def has_segment(self, date_str):
+        """Check whether the month of a date has been archived"""
+        return self.segment_of(date_str) in self._list_segments()
+
+    def load_segment(self, segment):
+        """
+        Get the dates of a segment, decompressing it if not cached
+
+        Returns:
+            Dictionary with date as key and list of files as value
+        """
+        with self.lock:
+            data = self.cache.get(segment)
+            if data is not None:
+                self.cache.move_to_end(segment)
+                return data
+
+            path = self._list_segments().get(segment)
+            data = {}
+            if path is not None:
+                opener = gzip.open if path.endswith('.gz') else lzma.open
+                try:
+                    with opener(path, 'rt', encoding='utf-8') as f:
+                        data = json.load(f)
+                except Exception as e:
+                    print(f"Error loading history segment {path}: {e}")
+
+            self.cache[segment] = data
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+            return data
+
+    def get_files(self, date_str):
+        """Get the archived files of a date (empty if not archived)"""
+        if not self.has_segment(date_str):
+            return []
+        return self.load_segment(self.segment_of(date_str)).get(date_str, [])
+
+    def dates(self):
+        """Get all archived dates (decompresses every segment)"""
+        dates = []
+        for segment in self.segments():
+            dates.extend(self.load_segment(segment))
+        return sorted(dates)
+
+    def _write_segment(self, segment, data):
+        """Write a segment atomically with the current compression"""
+        extension, opener = COMPRESSORS[self.compression]
+        path = os.path.join(self.archive_dir, f"history_{segment}{extension}")
+        os.makedirs(self.archive_dir, exist_ok=True)
+        temp_file = f"{path}.tmp"
+        with opener(temp_file, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(temp_file, path)
+
+        old_path = self._list_segments().get(segment)
+        if old_path is not None and old_path != path:
+            os.remove(old_path)  # written before the compression was changed
+        self.segment_files[segment] = path
+        self.cache[segment] = data
+
+    def add(self, history):
+        """
+        Merge dates into the archive
+
+        Args:
+            history: Dictionary with date as key and list of files as value
+
+        Returns:
+            True if all segments were written, False otherwise
+        """
+        by_segment = {}
+        for date_str, files in history.items():
+            by_segment.setdefault(self.segment_of(date_str), {})[date_str] = files
+
+        with self.lock:
+            try:
+                for segment, dates in by_segment.items():
+                    data = dict(self.load_segment(segment))
+                    for date_str, files in dates.items():
+                        if date_str in data:
+                            files = list(dict.fromkeys(data[date_str] + list(files)))
+                        data[date_str] = list(files)
+                    self._write_segment(segment, data)
+                return True
+            except Exception as e:
+                print(f"Error archiving history: {e}")
+                return False
+
+    def drop_before(self, cutoff_date):
+        """
+        Delete archived dates older than a date
+
+        Returns:
+            Number of dates deleted
+        """
+        cutoff_segment = self.segment_of(cutoff_date)
+        dropped = 0
+        with self.lock:
+            try:
+                for segment in self.segments():
+                    if segment > cutoff_segment:
+                        break
+                    data = self.load_segment(segment)
+                    kept = {date_str: files for date_str, files in data.items() if date_str >= cutoff_date}
+                    if len(kept) == len(data):
+                        continue
+                    dropped += len(data) - len(kept)
+                    if kept:
+                        self._write_segment(segment, kept)
+                    else:
+                        os.remove(self.segment_files.pop(segment))
+                        self.cache.pop(segment, None)
+            except Exception as e:
+                print(f"Error deleting archived history: {e}")
+        return dropped
+
+    def remove_prefix(self, prefix):
+        """
+        Delete archived files below a path (decompresses every segment)
+
+        Returns:
+            Dictionary with date as key and list of removed files as value
+        """
+        removed = {}
+        with self.lock:
+            try:
+                for segment in self.segments():
+                    data = self.load_segment(segment)
+                    changed = False
+                    kept = {}
+                    for date_str, files in data.items():
+                        kept[date_str] = [f for f in files if not f.startswith(prefix)]
+                        if len(kept[date_str]) != len(files):
+                            removed[date_str] = [f for f in files if f.startswith(prefix)]
+                            changed = True
+                    if changed:
+                        self._write_segment(segment, kept)
+            except Exception as e:
+                print(f"Error cleaning archived history: {e}")
+        return removed
@@ -0,0 +1,126 @@
+import threading
+from collections import OrderedDict
+
+class HistoryQuery:
+    """Cached per-date file queries over a FileTracker's history, with change pushes
+
+    Results are cached per (date, selected folders) and kept current from the
+    tracker's change notifications: a change to one date only touches the
+    cached results of that date, and subscribers receive the added and
+    removed paths rather than the whole list.
+    """
+    def __init__(self, tracker, max_entries=32):
+        """
+        Args:
+            tracker: FileTracker whose history is queried
+            max_entries: Unsubscribed results kept in the cache
+        """
+        self.tracker = tracker
+        self.max_entries = max_entries
+        self.lock = threading.RLock()
+        self.cache = OrderedDict()  # (date, folders) -> (list of paths, set of paths)
+        self.subscribers = {}       # subscription id -> (key, callback)
+        self.next_id = 1
+        self.hits = 0
+        self.misses = 0
+        tracker.add_change_listener(self.on_history_changed)
+
+    @staticmethod
+    def make_key(date_str, selected_paths=None):
+        """Get the cache key of a query; no selected folders means all files"""
+        return (date_str, frozenset(selected_paths) if selected_paths else None)
+
+    @staticmethod
+    def _matches(filepath, folders):
+        """Apply the same folder filter as FileTracker.get_files_for_date()"""
+        return folders is None or any(filepath.startswith(path) for path in folders)
+
+    def _entry(self, key):
+        """Get the cached result of a key, computing it on a miss; call with the lock held"""
+        entry = self.cache.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return entry
+
+        self.misses += 1
+        date_str, folders = key
+        files = list(dict.fromkeys(self.tracker.get_files_for_date(date_str, list(folders or []))))
+        entry = self.cache[key] = (files, set(files))
+
+        # Evict the least recently used results nobody is subscribed to
+        subscribed = {sub_key for sub_key, _ in self.subscribers.values()}
+        for old_key in list(self.cache):
+            if len(self.cache) <= self.max_entries + len(subscribed):
+                break
+            if old_key not in subscribed and old_key != key:
+                del self.cache[old_key]
+        return entry
+
+    def get(self, date_str, selected_paths=None):
+        """
+        Get the files of a date, filtered by selected folders
+
+        Returns:
+            List of file paths
+        """
+        with self.lock:
+            return list(self._entry(self.make_key(date_str, selected_paths))[0])
+
+    def subscribe(self, date_str, selected_paths, callback):
+        """
+        Get the files of a query and receive its changes from then on
+
+        Args:
+            date_str: Date in YYYY-MM-DD format
+            selected_paths: Folders to filter by (None or empty for all files)
+            callback: Function called with (added paths, removed paths) from the
+                thread that changed the history, or (None, None) when the whole
+                result must be fetched again
+
+        Returns:
+            (subscription id, list of file paths) tuple
+        """
+        with self.lock:
+            key = self.make_key(date_str, selected_paths)
+            subscription_id = self.next_id
+            self.next_id += 1
+            self.subscribers[subscription_id] = (key, callback)
+            return subscription_id, list(self._entry(key)[0])
+
+    def unsubscribe(self, subscription_id):
+        """Stop receiving changes for a subscription"""
+        with self.lock:
+            self.subscribers.pop(subscription_id, None)
+
+    def on_history_changed(self, date_str, added, removed):
+        """Update cached results of a date and push the changes to subscribers"""
+        pushes = []
+        with self.lock:
+            if date_str is None:
+                self.cache.clear()
+                pushes = [(callback, None, None) for _, callback in self.subscribers.values()]
+            else:
+                removed_set = set(removed)
+                for key, (files, members) in self.cache.items():
+                    if key[0] != date_str:
+                        continue
+                    key_added = [f for f in dict.fromkeys(added)
+                                 if f not in members and self._matches(f, key[1])]
+                    key_removed = [f for f in removed if f in members]
+                    if not key_added and not key_removed:
+                        continue
+
+                    files.extend(key_added)
+                    members.update(key_added)
+                    if key_removed:
+                        members.difference_update(removed_set)
+                        files[:] = [f for f in files if f not in removed_set]
+                    pushes.extend((callback, key_added, key_removed)
+                                  for sub_key, callback in self.subscribers.values() if sub_key == key)
+
+        for callback, key_added, key_removed in pushes:
+            try:
+                callback(key_added, key_removed)
+            except Exception as e:
+                print(f"Error in history subscriber: {e}")
@@ -0,0 +1,184 @@
+import io
+import time
+import json
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+# tracemalloc is process-wide; concurrent scans share one tracing session
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+class ScanInstrumentation:
+    """Per-phase timers, throughput counters and optional memory/CPU profiling
+
+    Phases record wall time and CPU time of the calling thread, so phases
+    running on several reader threads add up to thread-seconds rather than
+    elapsed time. Syscall counters are counted at the call sites (stat,
+    scandir, open, read), not traced from the kernel.
+    """
+    def __init__(self, enabled=True, trace_memory=False, profile=False, profile_limit=25):
+        """
+        Args:
+            enabled: Collect timers and counters
+            trace_memory: Track peak Python memory with tracemalloc (slows allocation)
+            profile: Capture a cProfile of the scanning thread
+            profile_limit: Number of functions kept in the profile summary
+        """
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.profile = profile
+        self.profile_limit = profile_limit
+        self.lock = threading.Lock()
+        self.profiler = None
+        self.reset()
+
+    def reset(self):
+        """Clear all measurements"""
+        with self.lock:
+            self.phases = {}
+            self.counters = {}
+            self.started = time.perf_counter()
+            self.started_cpu = time.process_time()
+            self.finished = None
+            self.finished_cpu = None
+            self.peak_memory = None
+            self.profile_stats = None
+
+    def start(self):
+        """Start measuring a scan; call from the scanning thread"""
+        global _tracemalloc_users
+        self.reset()
+        if not self.enabled:
+            return
+        if self.trace_memory:
+            with _tracemalloc_lock:
+                if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                else:
+                    tracemalloc.reset_peak()
+                _tracemalloc_users += 1
+        if self.profile:
+            self.profiler = cProfile.Profile()
+            try:
+                self.profiler.enable()
+            except ValueError:
+                # Another profiler is already active in this thread
+                self.profiler = None
+
+    def stop(self):
+        """Finish measuring a scan; call from the thread that called start()"""
+        global _tracemalloc_users
+        self.finished = time.perf_counter()
+        self.finished_cpu = time.process_time()
+        if not self.enabled:
+            return
+        if self.trace_memory:
+            with _tracemalloc_lock:
+                if tracemalloc.is_tracing():
+                    self.peak_memory = tracemalloc.get_traced_memory()[1]
+                _tracemalloc_users = max(0, _tracemalloc_users - 1)
+                if _tracemalloc_users == 0 and tracemalloc.is_tracing():
+                    tracemalloc.stop()
+        if self.profiler is not None:
+            self.profiler.disable()
+            output = io.StringIO()
+            stats = pstats.Stats(self.profiler, stream=output)
+            stats.sort_stats('cumulative').print_stats(self.profile_limit)
+            self.profile_stats = output.getvalue()
+            self.profiler = None
+
+    def add_time(self, name, wall, cpu):
+        """Add a measurement to a phase"""
+        with self.lock:
+            phase = self.phases.get(name)
+            if phase is None:
+                phase = self.phases[name] = {'wall': 0.0, 'cpu': 0.0, 'calls': 0}
+            phase['wall'] += wall
+            phase['cpu'] += cpu
+            phase['calls'] += 1
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block of code as part of a named phase"""
+        if not self.enabled:
+            yield
+            return
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - wall, time.thread_time() - cpu)
+
+    def count(self, name, amount=1):
+        """Increment a counter"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def wrap_callback(self, callback):
+        """Wrap a progress callback so the time spent in it is recorded as UI updates"""
+        if callback is None or not self.enabled:
+            return callback
+
+        def timed_callback(*args, **kwargs):
+            with self.phase('ui_callback'):
+                return callback(*args, **kwargs)
+        return timed_callback
+
+    def summary(self):
+        """
+        Get all measurements
+
+        Returns:
+            Dictionary with elapsed/CPU time, phases, counters, throughput,
+            peak memory (if traced) and profile text (if captured)
+        """
+        with self.lock:
+            end = self.finished if self.finished is not None else time.perf_counter()
+            end_cpu = self.finished_cpu if self.finished_cpu is not None else time.process_time()
+            elapsed = max(end - self.started, 1e-9)
+            counters = dict(self.counters)
+            return {
+                'elapsed': elapsed,
+                'cpu': end_cpu - self.started_cpu,
+                'phases': {name: dict(phase) for name, phase in self.phases.items()},
+                'counters': counters,
+                'files_per_sec': counters.get('files', 0) / elapsed,
+                'bytes_per_sec': counters.get('bytes', 0) / elapsed,
+                'peak_memory': self.peak_memory,
+                'profile': self.profile_stats
+            }
+
+    def format_summary(self):
+        """Get a human-readable multi-line summary"""
+        summary = self.summary()
+        lines = [
+            f"Elapsed: {summary['elapsed']:.2f}s (process CPU {summary['cpu']:.2f}s)",
+            f"Throughput: {summary['files_per_sec']:.0f} files/s, "
+            f"{summary['bytes_per_sec'] / (1024 * 1024):.2f} MB/s"
+        ]
+        if summary['peak_memory'] is not None:
+            lines.append(f"Peak traced memory: {summary['peak_memory'] / (1024 * 1024):.2f} MB")
+        lines.append("")
+        lines.append("Phase             wall (s)    cpu (s)      calls")
+        for name, phase in sorted(summary['phases'].items(), key=lambda x: x[1]['wall'], reverse=True):
+            lines.append(f"{name:15s} {phase['wall']:10.3f} {phase['cpu']:10.3f} {phase['calls']:10d}")
+        if summary['counters']:
+            lines.append("")
+            lines.append("Counters")
+            for name, value in sorted(summary['counters'].items()):
+                lines.append(f"  {name}: {value}")
+        if summary['profile']:
+            lines.append("")
+            lines.append(summary['profile'])
+        return "\n".join(lines)
+
+    def dump_json(self, path):
+        """Write the summary as JSON"""
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=4)
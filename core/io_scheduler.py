@@ -0,0 +1,116 @@
+import os
+import queue
+import threading
+
+class IOScheduler:
+    """Class to schedule per-file I/O work across physical devices
+
+    Work is grouped by st_dev so that each device is read in parallel with the
+    others, while the number of concurrent readers on one device depends on
+    its type: a single reader for spinning disks (to avoid seek thrashing),
+    several for SSDs. Within a device, files are processed in inode order,
+    which approximates their physical layout on most filesystems.
+    """
+    def __init__(self, ssd_workers=8, hdd_workers=1, default_workers=2, device_workers=None):
+        """
+        Args:
+            ssd_workers: Concurrent readers for non-rotational devices
+            hdd_workers: Concurrent readers for rotational devices
+            default_workers: Concurrent readers when the device type is unknown
+            device_workers: Optional dict of st_dev -> readers overriding detection
+        """
+        self.ssd_workers = ssd_workers
+        self.hdd_workers = hdd_workers
+        self.default_workers = default_workers
+        self.device_workers = dict(device_workers or {})
+        self._rotational_cache = {}
+
+    @staticmethod
+    def is_rotational(device):
+        """
+        Detect whether a device is a spinning disk using /sys/block
+
+        Args:
+            device: st_dev value of a file on the device
+
+        Returns:
+            True for rotational, False for non-rotational, None if unknown
+        """
+        try:
+            sys_path = os.path.realpath(f"/sys/dev/block/{os.major(device)}:{os.minor(device)}")
+        except (AttributeError, ValueError, OSError):
+            return None
+
+        # Partitions have no queue/ directory; it lives on the parent disk
+        for candidate in (sys_path, os.path.dirname(sys_path)):
+            rotational_file = os.path.join(candidate, 'queue', 'rotational')
+            try:
+                with open(rotational_file, 'r') as f:
+                    return f.read().strip() == '1'
+            except OSError:
+                continue
+        return None
+
+    def get_device_concurrency(self, device):
+        """Get the number of concurrent readers to use for a device"""
+        if device in self.device_workers:
+            return max(1, self.device_workers[device])
+
+        if device not in self._rotational_cache:
+            self._rotational_cache[device] = self.is_rotational(device)
+        rotational = self._rotational_cache[device]
+
+        if rotational is None:
+            return max(1, self.default_workers)
+        return max(1, self.hdd_workers if rotational else self.ssd_workers)
+
+    def map(self, func, entries, should_stop=None):
+        """
+        Apply func to every file, scheduling reads per device
+
+        Args:
+            func: Function called with a file path
+            entries: List of (filepath, stat_result) tuples
+            should_stop: Optional function returning True to abandon remaining work
+
+        Yields:
+            (filepath, stat_result, result) tuples in completion order
+        """
+        by_device = {}
+        for filepath, stat_info in entries:
+            by_device.setdefault(stat_info.st_dev, []).append((filepath, stat_info))
+
+        results = queue.Queue()
+        workers = []
+
+        for device, device_entries in by_device.items():
+            # Read in inode order to approximate on-disk layout
+            device_entries.sort(key=lambda entry: entry[1].st_ino)
+            pending = iter(device_entries)
+            pending_lock = threading.Lock()
+
+            def worker(pending=pending, pending_lock=pending_lock):
+                try:
+                    while not (should_stop and should_stop()):
+                        with pending_lock:
+                            entry = next(pending, None)
+                        if entry is None:
+                            break
+                        filepath, stat_info = entry
+                        results.put((filepath, stat_info, func(filepath)))
+                finally:
+                    results.put(None)
+
+            for _ in range(min(self.get_device_concurrency(device), len(device_entries))):
+                workers.append(threading.Thread(target=worker, daemon=True))
+
+        for thread in workers:
+            thread.start()
+
+        running = len(workers)
+        while running:
+            item = results.get()
+            if item is None:
+                running -= 1
+            else:
+                yield item
@@ -0,0 +1,54 @@
+import os
+import hashlib
+
+def _encode(name):
+    """Encode a file name for hashing, keeping undecodable bytes intact"""
+    return name.encode('utf-8', 'surrogateescape')
+
+def compute_directory_hashes(tree, order):
+    """
+    Compute a Merkle hash per directory from its children's names and digests
+
+    A directory's hash covers the names and content digests of its files and
+    the names and hashes of its subdirectories, so two directories have the
+    same hash exactly when their whole subtrees are identical. Directories are
+    processed bottom-up in one pass.
+
+    Args:
+        tree: Dictionary with directory path as key and (files, subdirs) as value,
+            where files is a list of (name, size, digest) tuples (digest None if
+            unknown) and subdirs is a list of subdirectory names
+        order: Directory paths in top-down walk order (parents before children)
+
+    Returns:
+        Dictionary with directory path as key and (hash, total size, file count)
+        as value; the hash is None when any file below the directory has no digest
+    """
+    results = {}
+    for dirpath in reversed(order):
+        files, subdirs = tree[dirpath]
+        hasher = hashlib.md5()
+        complete = True
+        total_size = 0
+        file_count = 0
+
+        for name, size, digest in sorted(files):
+            total_size += size
+            file_count += 1
+            if digest is None:
+                complete = False
+            elif complete:
+                hasher.update(b"F\0" + _encode(name) + b"\0" + digest.encode() + b"\n")
+
+        for name in sorted(subdirs):
+            # Unreadable subdirectories are missing from the walk
+            sub_hash, sub_size, sub_count = results.get(os.path.join(dirpath, name), (None, 0, 0))
+            total_size += sub_size
+            file_count += sub_count
+            if sub_hash is None:
+                complete = False
+            elif complete:
+                hasher.update(b"D\0" + _encode(name) + b"\0" + sub_hash.encode() + b"\n")
+
+        results[dirpath] = (hasher.hexdigest() if complete else None, total_size, file_count)
+    return results
@@ -0,0 +1,284 @@
+import re
+import sys
+import heapq
+import itertools
+import fnmatch
+import threading
+from array import array
+from collections import defaultdict
+
+GLOB_CHARS = re.compile(r'[*?\[]')
+
+class PathSearchIndex:
+    """Trigram index over every path in a FileTracker's history
+
+    Each path gets an id; every trigram of its lowercased text maps to the
+    ids containing it, in increasing order. A build hands out ids newest
+    first, so every id list is also in order of the paths' latest dates: a
+    search walks the rarest list of its query and stops as soon as it has
+    enough matches, so broad queries cost no more than selective ones. Paths
+    whose latest date changed since the build are checked separately. Glob
+    queries use the trigrams of their literal parts the same way. The build
+    runs in a background thread and the index is kept current from the
+    tracker's change notifications.
+    """
+    def __init__(self, tracker):
+        """
+        Args:
+            tracker: FileTracker whose history (hot and archived) is indexed
+        """
+        self.tracker = tracker
+        self.lock = threading.RLock()
+        self.built = threading.Event()
+        self.building = False
+        self.pending = None  # Changes notified during a build, replayed after it
+        self._reset()
+        tracker.add_change_listener(self.on_history_changed)
+
+    def _reset(self):
+        """Clear the index; call with the lock held"""
+        self.paths = []        # id -> path, None once the path has no dates left
+        self.path_ids = {}     # path -> id
+        self.dates = []        # id -> set of dates
+        self.latest = []       # id -> most recent date, for ordering results
+        self.postings = defaultdict(lambda: array('I'))  # trigram -> ids in increasing order
+        self.ordered = 0       # Ids below this were handed out newest first by the build
+        self.dirty = set()     # Ordered ids whose latest date changed since the build
+
+    @staticmethod
+    def trigrams(text):
+        """Get the distinct trigrams of a lowercased text"""
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def start_build(self):
+        """Build the index in a background thread unless a build is running"""
+        with self.lock:
+            if self.building:
+                return
+            self.building = True
+            self.pending = []
+        threading.Thread(target=self._build_loop, daemon=True).start()
+
+    def _build_loop(self):
+        """Build until no bulk change arrived during the build"""
+        try:
+            while self._build():
+                pass
+        except Exception as e:
+            print(f"Error building the path search index: {e}")
+        finally:
+            with self.lock:
+                self.building = False
+                self.pending = None
+                self.built.set()  # Do not leave searches waiting after a failure
+
+    def _build(self):
+        """
+        Index the whole history, including archived dates
+
+        Searches keep using the previous index until the new one is swapped
+        in; changes notified meanwhile are applied to the new one.
+
+        Returns:
+            True if dates were dropped in bulk during the build, so it has to run again
+        """
+        tracker = self.tracker
+        with self.lock:
+            if self.pending is None:
+                self.pending = []
+        with tracker.lock:
+            history = {date_str: list(files) for date_str, files in tracker.history.items()}
+            history[tracker.today] = list(tracker.today_files)
+        for date_str in tracker.archive.dates():
+            history[date_str] = tracker.archive.get_files(date_str) + history.get(date_str, [])
+
+        # _add() inlined: this loop runs for every history entry
+        paths, path_ids, dates, latest = [], {}, [], []
+        postings = defaultdict(lambda: array('I'))
+        for date_str in sorted(history, reverse=True):
+            newest = sys.intern(date_str)
+            for path in history[date_str]:
+                path_id = path_ids.get(path)
+                if path_id is not None:
+                    dates[path_id].add(newest)
+                    continue
+                path_id = len(paths)
+                paths.append(path)
+                path_ids[path] = path_id
+                dates.append({newest})
+                latest.append(newest)  # Dates are visited newest first
+                lower = path.lower()
+                for trigram in {lower[i:i + 3] for i in range(len(lower) - 2)}:
+                    postings[trigram].append(path_id)
+        del history
+
+        with self.lock:
+            self.paths, self.path_ids, self.dates, self.latest, self.postings = (
+                paths, path_ids, dates, latest, postings)
+            self.ordered = len(paths)
+            self.dirty = set()
+            pending, self.pending = self.pending, []
+            rebuild = False
+            for date_str, added, removed in pending:
+                if date_str is None:
+                    rebuild = True
+                    continue
+                self._apply(date_str, added, removed)
+            if not rebuild:
+                self.pending = None
+                self.built.set()
+            return rebuild
+
+    def ensure_built(self):
+        """Wait for the index, starting its build if nothing did yet"""
+        if not self.built.is_set():
+            self.start_build()
+            self.built.wait()
+
+    def _add(self, path, date_str):
+        """Record that a path changed on a date; call with the lock held"""
+        path_id = self.path_ids.get(path)
+        if path_id is None:
+            path_id = len(self.paths)
+            self.paths.append(path)
+            self.path_ids[path] = path_id
+            self.dates.append({date_str})
+            self.latest.append(date_str)
+            for trigram in self.trigrams(path.lower()):
+                self.postings[trigram].append(path_id)
+            return
+        if self.paths[path_id] is None:
+            self.paths[path_id] = path  # Re-added after removal; postings were kept
+        self.dates[path_id].add(date_str)
+        self._update_latest(path_id)
+
+    def _remove(self, path, date_str):
+        """Forget that a path changed on a date; call with the lock held"""
+        path_id = self.path_ids.get(path)
+        if path_id is None:
+            return
+        self.dates[path_id].discard(date_str)
+        if not self.dates[path_id]:
+            self.paths[path_id] = None  # Tombstone; its postings are skipped
+        else:
+            self._update_latest(path_id)
+
+    def _update_latest(self, path_id):
+        """Recompute the latest date of a path, noting when it leaves the build order"""
+        newest = max(self.dates[path_id])
+        if newest != self.latest[path_id]:
+            self.latest[path_id] = newest
+            if path_id < self.ordered:
+                self.dirty.add(path_id)
+
+    def _apply(self, date_str, added, removed):
+        """Apply one history change; call with the lock held"""
+        date_str = sys.intern(date_str)
+        for path in added:
+            self._add(path, date_str)
+        for path in removed:
+            self._remove(path, date_str)
+
+    def on_history_changed(self, date_str, added, removed):
+        """Keep the index current with the tracker's history"""
+        with self.lock:
+            if self.pending is not None:
+                self.pending.append((date_str, added, removed))  # Replayed after the build
+                return
+            if not self.built.is_set():
+                return  # The first build reads the current history anyway
+            if date_str is None:
+                # Dates were dropped in bulk; answer from this index until rebuilt
+                self.start_build()
+                return
+            self._apply(date_str, added, removed)
+            unordered = len(self.dirty) + len(self.paths) - self.ordered
+            if unordered > max(50000, self.ordered // 4):
+                self.start_build()  # Restore the order searches rely on
+
+    def _source(self, literals):
+        """
+        Get the ids to check for literal fragments, in increasing order
+
+        Returns:
+            Iterable of ids containing the fragments (and possibly others)
+        """
+        trigrams = set()
+        for literal in literals:
+            trigrams.update(self.trigrams(literal))
+        if trigrams:
+            return min((self.postings.get(trigram, ()) for trigram in trigrams), key=len)
+
+        short = max(literals, key=len, default="")
+        if not short:
+            return range(self.ordered)
+        # Shorter than a trigram: the paths containing it are those in the
+        # postings of the trigrams containing it (paths are longer than two
+        # characters); merge them lazily so the search can stop early
+        merged = heapq.merge(*[posting for trigram, posting in self.postings.items()
+                               if short in trigram])
+        return (path_id for path_id, _ in itertools.groupby(merged))
+
+    def search(self, query, limit=1000):
+        """
+        Find tracked paths by substring or glob, across all dates
+
+        A query containing *, ? or [ is a glob: without a path separator it
+        must match the file name, otherwise the whole path. Any other query
+        matches paths containing it. Matching ignores case.
+
+        Args:
+            query: Substring or glob pattern
+            limit: Maximum number of results
+
+        Returns:
+            List of (path, sorted list of dates) tuples, most recently changed first
+        """
+        query = query.strip().lower()
+        if not query or limit <= 0:
+            return []
+        self.ensure_built()
+
+        if GLOB_CHARS.search(query):
+            # Bracket expressions are not literal text; treat them as wildcards
+            literal_text = re.sub(r'\[[^\]]*\]?', '*', query)
+            literals = [part for part in re.split(r'[*?]', literal_text) if part]
+            pattern_match = re.compile(fnmatch.translate(query), re.DOTALL).match
+            if '/' in query or '\\' in query:
+                def matches(path):
+                    return pattern_match(path.lower()) is not None
+            else:
+                def matches(path):
+                    name_start = max(path.rfind('/'), path.rfind('\\')) + 1
+                    return pattern_match(path[name_start:].lower()) is not None
+            exact = False
+        else:
+            literals = [query]
+            exact = len(query) <= 3  # Every id from the trigram postings contains it
+            def matches(path):
+                return query in path.lower()
+
+        with self.lock:
+            paths, latest, dirty, ordered = self.paths, self.latest, self.dirty, self.ordered
+            source = self._source(literals)
+
+            # Paths added or re-dated since the build are out of order: check all
+            found = [(latest[path_id], path_id)
+                     for path_id in itertools.chain(dirty, range(ordered, len(paths)))
+                     if paths[path_id] is not None and matches(paths[path_id])]
+
+            # The rest are newest first; the first limit matches are the newest
+            count = 0
+            for path_id in source:
+                if path_id >= ordered:
+                    break
+                path = paths[path_id]
+                if path is None or path_id in dirty:
+                    continue
+                if exact or matches(path):
+                    found.append((latest[path_id], path_id))
+                    count += 1
+                    if count >= limit:
+                        break
+            return [(paths[path_id], sorted(self.dates[path_id]))
+                    for _, path_id in heapq.nlargest(limit, found)]
@@ -0,0 +1,231 @@
+import time
+import itertools
+import threading
+
+from core.io_scheduler import IOScheduler
+from core.throttle import ScanThrottle
+
+# Job states
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_PAUSED = 'paused'
+JOB_CANCELLED = 'cancelled'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+
+FINISHED_STATES = (JOB_CANCELLED, JOB_COMPLETED, JOB_FAILED)
+
+class CancellationToken:
+    """Thread-safe cancellation and pause/resume signal for one scan"""
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+
+    def cancel(self):
+        """Request cancellation; also wakes up a paused scan so it can exit"""
+        self._cancelled.set()
+        self._running.set()
+
+    def pause(self):
+        """Make the scan block at its next checkpoint"""
+        if not self._cancelled.is_set():
+            self._running.clear()
+
+    def resume(self):
+        """Let a paused scan continue"""
+        self._running.set()
+
+    def is_cancelled(self):
+        """Check whether cancellation was requested, without blocking"""
+        return self._cancelled.is_set()
+
+    def is_paused(self):
+        """Check whether the scan is paused"""
+        return not self._running.is_set()
+
+    def checkpoint(self):
+        """
+        Block while paused, then report whether the scan should stop
+
+        Returns:
+            True if cancellation was requested
+        """
+        self._running.wait()
+        return self._cancelled.is_set()
+
+class ScanJob:
+    """A single scan running in its own thread with its own token and limits"""
+    def __init__(self, job_id, name, limits):
+        self.job_id = job_id
+        self.name = name
+        self.limits = limits
+        self.state = JOB_PENDING
+        self.token = CancellationToken()
+        self.throttle = ScanThrottle(limits['max_mb_per_sec'], limits['max_files_per_sec'])
+        self.progress = 0
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.thread = None
+        self.finder = None
+
+    def pause(self):
+        """Pause the job at its next checkpoint"""
+        if self.state == JOB_RUNNING:
+            self.token.pause()
+            self.state = JOB_PAUSED
+
+    def resume(self):
+        """Resume a paused job"""
+        if self.state == JOB_PAUSED:
+            self.token.resume()
+            self.state = JOB_RUNNING
+
+    def cancel(self):
+        """Cancel the job; a pending job never starts"""
+        if self.state not in FINISHED_STATES:
+            self.token.cancel()
+
+    def is_finished(self):
+        """Check whether the job has reached a final state"""
+        return self.state in FINISHED_STATES
+
+class ScanJobManager:
+    """Class to run several DuplicateFinder scans concurrently as independent jobs"""
+    DEFAULT_LIMITS = {
+        'max_mb_per_sec': 0,
+        'max_files_per_sec': 0,
+        'low_io_priority': False,
+        'max_workers': 8
+    }
+
+    def __init__(self, finder_factory, max_concurrent_jobs=4, finder_kwargs=None):
+        """
+        Args:
+            finder_factory: Callable creating a DuplicateFinder-like object; called
+                with io_scheduler, throttle, low_io_priority and token keywords
+            max_concurrent_jobs: Jobs beyond this limit wait in the pending state
+            finder_kwargs: Extra keyword arguments passed to finder_factory
+        """
+        self.finder_factory = finder_factory
+        self.finder_kwargs = dict(finder_kwargs or {})
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.slots = threading.Semaphore(max_concurrent_jobs)
+        self.job_ids = itertools.count(1)
+
+    def submit(self, name, method_name, *args, limits=None, on_progress=None,
+               on_finished=None, finder_kwargs=None, **kwargs):
+        """
+        Start a scan as a new job
+
+        Args:
+            name: Human-readable job name
+            method_name: Name of the DuplicateFinder scan method to run
+            *args, **kwargs: Arguments for the scan method
+            limits: Optional dict overriding DEFAULT_LIMITS for this job
+            on_progress: Function called with (job, progress_percent, message)
+            on_finished: Function called with the job once it is finished
+            finder_kwargs: Extra finder_factory arguments for this job only
+
+        Returns:
+            The ScanJob
+        """
+        job_limits = dict(self.DEFAULT_LIMITS)
+        job_limits.update(limits or {})
+        job_finder_kwargs = dict(self.finder_kwargs)
+        job_finder_kwargs.update(finder_kwargs or {})
+
+        with self.lock:
+            job = ScanJob(next(self.job_ids), name, job_limits)
+            self.jobs[job.job_id] = job
+
+        def progress(percent, message):
+            job.progress = percent
+            job.message = message
+            if on_progress:
+                on_progress(job, percent, message)
+
+        def run():
+            with self.slots:
+                if job.token.is_cancelled():
+                    job.state = JOB_CANCELLED
+                else:
+                    job.state = JOB_RUNNING
+                    job.started = time.time()
+                    try:
+                        workers = max(1, job_limits['max_workers'])
+                        finder = job.finder = self.finder_factory(
+                            io_scheduler=IOScheduler(ssd_workers=workers,
+                                                     default_workers=min(2, workers)),
+                            throttle=job.throttle,
+                            low_io_priority=job_limits['low_io_priority'],
+                            token=job.token,
+                            **job_finder_kwargs)
+                        job.result = getattr(finder, method_name)(*args, callback=progress, **kwargs)
+                        job.state = JOB_CANCELLED if job.token.is_cancelled() else JOB_COMPLETED
+                    except Exception as e:
+                        print(f"Error in scan job {job.job_id} ({job.name}): {e}")
+                        job.error = e
+                        job.state = JOB_FAILED
+                job.finished = time.time()
+            if on_finished:
+                on_finished(job)
+
+        job.thread = threading.Thread(target=run, daemon=True)
+        job.thread.start()
+        return job
+
+    def get_job(self, job_id):
+        """Get a job by its ID"""
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self):
+        """Get all jobs, oldest first"""
+        with self.lock:
+            return [self.jobs[job_id] for job_id in sorted(self.jobs)]
+
+    def active_jobs(self):
+        """Get jobs that have not finished yet"""
+        return [job for job in self.list_jobs() if not job.is_finished()]
+
+    def pause(self, job_id):
+        """Pause a job"""
+        job = self.get_job(job_id)
+        if job:
+            job.pause()
+
+    def resume(self, job_id):
+        """Resume a job"""
+        job = self.get_job(job_id)
+        if job:
+            job.resume()
+
+    def cancel(self, job_id):
+        """Cancel a job"""
+        job = self.get_job(job_id)
+        if job:
+            job.cancel()
+
+    def cancel_all(self):
+        """Cancel every job that has not finished"""
+        for job in self.active_jobs():
+            job.cancel()
+
+    def set_limits(self, max_mb_per_sec=None, max_files_per_sec=None, job_id=None):
+        """Change throttle limits of one job, or of all active jobs, while they run"""
+        jobs = [self.get_job(job_id)] if job_id is not None else self.active_jobs()
+        for job in jobs:
+            if job:
+                job.throttle.set_limits(max_mb_per_sec, max_files_per_sec)
+
+    def clear_finished(self):
+        """Forget jobs that have finished"""
+        with self.lock:
+            for job_id in [job_id for job_id, job in self.jobs.items() if job.is_finished()]:
+                del self.jobs[job_id]
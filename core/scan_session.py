@@ -0,0 +1,101 @@
+import time
+import threading
+
+def analyze_stats(catalog):
+    """File count, total size, per-extension totals and the largest files"""
+    return {
+        'total_files': len(catalog),
+        'total_size': catalog.total_size(),
+        'extensions': catalog.extension_stats(),
+        'largest_files': catalog.largest(10)
+    }
+
+def analyze_name_size(catalog):
+    """Duplicate sets by name and size, keyed 'name_size'"""
+    return {f"{name}_{size}": catalog.paths(indices)
+            for name, size, indices in catalog.group_by_name_size()}
+
+def analyze_names(catalog):
+    """Every file as a (filepath, filename) tuple, for name similarity"""
+    return [(catalog.path(index), catalog.name(index)) for index in range(len(catalog))]
+
+# Analyses DuplicateFinder.analyze() can run by name on one catalog
+ANALYZERS = {
+    'stats': analyze_stats,
+    'name_size': analyze_name_size,
+    'names': analyze_names
+}
+
+def register_analyzer(name, analyzer):
+    """
+    Add an analysis that DuplicateFinder.analyze() can run
+
+    Args:
+        name: Name to request the analysis by
+        analyzer: Function taking a FileCatalog and returning the result
+    """
+    ANALYZERS[name] = analyzer
+
+class ScanSession:
+    """Catalog of the last walk, reused by the next analyses of the same folders
+
+    A DuplicateFinder given a session looks here before walking and stores
+    the catalog of every walk that completes, so statistics, name/size and
+    similarity scans run back to back walk the folders only once. Content
+    scans (hash, quick) always walk: matching content from stale records
+    would silently miss duplicates.
+    A catalog is only reused for the same directories and ignore patterns,
+    and for at most max_age seconds since files change in the meantime.
+    One session can be shared by the finders of several jobs.
+    """
+    def __init__(self, max_age=600):
+        """
+        Args:
+            max_age: Seconds a catalog is reused for; None keeps it until cleared
+        """
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.key = None
+        self.catalog = None
+        self.created = None
+
+    @staticmethod
+    def _key(directories, ignore_patterns):
+        return (tuple(directories), tuple(ignore_patterns or ()))
+
+    def get_catalog(self, directories, ignore_patterns=None):
+        """
+        Get the stored catalog if it covers the same scan and is recent enough
+
+        Returns:
+            FileCatalog, or None if the folders have to be walked
+        """
+        with self.lock:
+            if self.catalog is None or self.key != self._key(directories, ignore_patterns):
+                return None
+            if self.max_age is not None and time.time() - self.created > self.max_age:
+                self.catalog = None
+                return None
+            return self.catalog
+
+    def store(self, directories, ignore_patterns, catalog):
+        """Keep the catalog of a completed walk, replacing the previous one"""
+        with self.lock:
+            self.key = self._key(directories, ignore_patterns)
+            self.catalog = catalog
+            self.created = time.time()
+
+    def clear(self):
+        """Forget the stored catalog so the next scan walks again"""
+        with self.lock:
+            self.key = None
+            self.catalog = None
+            self.created = None
+
+    def describe(self):
+        """Describe the stored catalog for display"""
+        with self.lock:
+            if self.catalog is None:
+                return "No file list kept"
+            listed = time.strftime('%H:%M:%S', time.localtime(self.created))
+            return f"{len(self.catalog)} files listed at {listed}"
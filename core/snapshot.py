@@ -0,0 +1,213 @@
+import os
+import time
+import gzip
+import json
+
+from core.merkle import compute_directory_hashes
+
+class ScanSnapshot:
+    """Compact record of a scanned tree at one point in time
+
+    Files are stored per directory by name with their stat fields and, if
+    requested, their content digest. Every directory also carries a Merkle
+    hash of its subtree so diff() can skip unchanged subtrees without looking
+    at their files. With digests the hash covers file contents; without them
+    it covers size and modification time.
+    """
+    VERSION = 1
+
+    def __init__(self, directories, has_digests=False):
+        """
+        Args:
+            directories: Root directories of the scan
+            has_digests: Whether file content digests are recorded
+        """
+        self.directories = list(directories)
+        self.has_digests = has_digests
+        self.created = time.time()
+        # dirpath -> {'files': {name: [size, mtime_ns, dev, ino, digest]},
+        #             'subdirs': [names], 'hash': str or None, 'size': int, 'count': int}
+        self.dirs = {}
+
+    def add_directory(self, dirpath, files, subdirs):
+        """
+        Record one directory of the walk; directories must be added top-down
+
+        Args:
+            dirpath: Directory path
+            files: Dictionary with file name as key and [size, mtime_ns, dev, ino, digest] as value
+            subdirs: List of subdirectory names
+        """
+        self.dirs[dirpath] = {'files': files, 'subdirs': list(subdirs),
+                              'hash': None, 'size': 0, 'count': 0}
+
+    def compute_hashes(self):
+        """Compute the directory Merkle hashes once all directories are added"""
+        tree = {}
+        for dirpath, entry in self.dirs.items():
+            files = []
+            for name, record in entry['files'].items():
+                size, mtime_ns, _, _, digest = record
+                if not self.has_digests:
+                    digest = f"{size}:{mtime_ns}"
+                files.append((name, size, digest))
+            tree[dirpath] = (files, entry['subdirs'])
+
+        for dirpath, (dir_hash, total_size, file_count) in compute_directory_hashes(tree, list(self.dirs)).items():
+            self.dirs[dirpath].update({'hash': dir_hash, 'size': total_size, 'count': file_count})
+
+    def file_count(self):
+        """Get the number of files in the snapshot"""
+        return sum(len(entry['files']) for entry in self.dirs.values())
+
+    def to_dict(self):
+        """Serialize the snapshot"""
+        return {
+            'version': self.VERSION,
+            'created': self.created,
+            'directories': self.directories,
+            'has_digests': self.has_digests,
+            'dirs': self.dirs
+        }
+
+    def save(self, snapshot_file):
+        """
+        Write the snapshot as gzipped JSON atomically (temp file, then rename)
+
+        Returns:
+            True if saved successfully, False otherwise
+        """
+        try:
+            temp_file = f"{snapshot_file}.tmp"
+            with gzip.open(temp_file, 'wt', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, separators=(',', ':'))
+            os.replace(temp_file, snapshot_file)
+            return True
+        except Exception as e:
+            print(f"Error saving snapshot: {e}")
+            return False
+
+    @classmethod
+    def load(cls, snapshot_file):
+        """
+        Load a snapshot from file
+
+        Returns:
+            ScanSnapshot, or None if the file is not a valid snapshot
+        """
+        try:
+            with gzip.open(snapshot_file, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != cls.VERSION:
+                return None
+            snapshot = cls(data['directories'], data['has_digests'])
+            snapshot.created = data['created']
+            snapshot.dirs = data['dirs']
+            return snapshot
+        except Exception as e:
+            print(f"Error loading snapshot {snapshot_file}: {e}")
+            return None
+
+    def iter_files(self, dirpath):
+        """Yield (filepath, record) for every file below a directory"""
+        stack = [dirpath]
+        while stack:
+            current = stack.pop()
+            entry = self.dirs.get(current)
+            if entry is None:
+                continue
+            for name, record in entry['files'].items():
+                yield os.path.join(current, name), record
+            stack.extend(os.path.join(current, name) for name in entry['subdirs'])
+
+def _same_content(old_record, new_record, compare_digests):
+    """Check whether two file records describe unchanged content"""
+    if compare_digests:
+        return old_record[4] == new_record[4]
+    return old_record[:2] == new_record[:2]
+
+def _move_key(record, compare_digests):
+    """Key identifying a file's data across a move, or None if it cannot be matched"""
+    if compare_digests:
+        return (record[0], record[4]) if record[4] else None
+    # A rename keeps the inode and the modification time
+    return (record[2], record[3], record[0], record[1]) if record[3] else None
+
+def diff_snapshots(old, new):
+    """
+    Compare two snapshots of the same directories
+
+    Subtrees whose directory hash is unchanged are skipped. Files removed from
+    one place and added in another with the same content (or, without digests,
+    the same inode, size and modification time) are reported as moved.
+
+    Args:
+        old: Earlier ScanSnapshot
+        new: Later ScanSnapshot
+
+    Returns:
+        Dictionary with 'added', 'removed' and 'modified' lists of paths,
+        'moved' list of (old path, new path) tuples and the number of
+        'skipped_dirs' whose subtrees were not compared
+    """
+    compare_digests = old.has_digests and new.has_digests
+    comparable_hashes = old.has_digests == new.has_digests
+    added = {}
+    removed = {}
+    modified = []
+    skipped_dirs = 0
+
+    stack = sorted(set(old.directories) | set(new.directories), reverse=True)
+    while stack:
+        dirpath = stack.pop()
+        old_entry = old.dirs.get(dirpath)
+        new_entry = new.dirs.get(dirpath)
+
+        if old_entry is None:
+            added.update(new.iter_files(dirpath))
+            continue
+        if new_entry is None:
+            removed.update(old.iter_files(dirpath))
+            continue
+        if comparable_hashes and old_entry['hash'] and old_entry['hash'] == new_entry['hash']:
+            skipped_dirs += 1
+            continue
+
+        old_files = old_entry['files']
+        new_files = new_entry['files']
+        for name, record in old_files.items():
+            filepath = os.path.join(dirpath, name)
+            if name not in new_files:
+                removed[filepath] = record
+            elif not _same_content(record, new_files[name], compare_digests):
+                modified.append(filepath)
+        for name, record in new_files.items():
+            if name not in old_files:
+                added[os.path.join(dirpath, name)] = record
+
+        subdirs = set(old_entry['subdirs']) | set(new_entry['subdirs'])
+        stack.extend(os.path.join(dirpath, name) for name in sorted(subdirs, reverse=True))
+
+    # Match removed files to added files with the same data
+    removed_by_key = {}
+    for filepath, record in removed.items():
+        key = _move_key(record, compare_digests)
+        if key is not None:
+            removed_by_key.setdefault(key, []).append(filepath)
+
+    moved = []
+    for filepath, record in list(added.items()):
+        candidates = removed_by_key.get(_move_key(record, compare_digests))
+        if candidates:
+            old_path = candidates.pop(0)
+            moved.append((old_path, filepath))
+            del removed[old_path]
+            del added[filepath]
+
+    return {
+        'added': sorted(added),
+        'removed': sorted(removed),
+        'modified': sorted(modified),
+        'moved': sorted(moved),
+        'skipped_dirs': skipped_dirs
+    }
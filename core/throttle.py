@@ -0,0 +1,163 @@
+import os
+import time
+import ctypes
+import platform
+import threading
+
+# ioprio_set(2) syscall numbers; Python has no wrapper for it
+IOPRIO_SYSCALLS = {'x86_64': 251, 'i686': 289, 'i386': 289, 'aarch64': 30, 'armv7l': 314}
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_IDLE = 3
+IOPRIO_CLASS_SHIFT = 13
+
+class TokenBucket:
+    """Thread-safe token bucket whose rate can be changed while in use"""
+    def __init__(self, rate=0, capacity=None):
+        """
+        Args:
+            rate: Tokens added per second (0 means unlimited)
+            capacity: Maximum burst size (defaults to one second worth of tokens)
+        """
+        self.lock = threading.Lock()
+        self.rate = 0
+        self.capacity = 0
+        self.tokens = 0
+        self.last_refill = time.monotonic()
+        self.set_rate(rate, capacity)
+
+    def set_rate(self, rate, capacity=None):
+        """Change the rate; takes effect immediately, even for callers already waiting"""
+        with self.lock:
+            self.rate = max(0, rate or 0)
+            self.capacity = capacity if capacity else self.rate
+            self.tokens = min(self.tokens, self.capacity)
+            self.last_refill = time.monotonic()
+
+    def _refill(self):
+        """Add tokens for the time elapsed since the last refill (lock must be held)"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def consume(self, amount, should_stop=None):
+        """
+        Take tokens from the bucket, sleeping while it is in debt
+
+        Args:
+            amount: Number of tokens to take
+            should_stop: Optional function returning True to abort waiting
+
+        Returns:
+            Seconds spent waiting
+        """
+        with self.lock:
+            if self.rate <= 0:
+                return 0.0
+            self._refill()
+            self.tokens -= amount
+
+        waited = 0.0
+        while True:
+            with self.lock:
+                if self.rate <= 0:
+                    self.tokens = 0
+                    break
+                self._refill()
+                if self.tokens >= 0:
+                    break
+                delay = min(-self.tokens / self.rate, 0.1)
+            if should_stop and should_stop():
+                break
+            # Sleep in short slices so rate changes are picked up quickly
+            time.sleep(delay)
+            waited += delay
+        return waited
+
+class ScanThrottle:
+    """Bandwidth (MB/s) and file rate (files/s) limiter for scans"""
+    def __init__(self, max_mb_per_sec=0, max_files_per_sec=0):
+        """
+        Args:
+            max_mb_per_sec: Read bandwidth cap in MB/s (0 means unlimited)
+            max_files_per_sec: File rate cap for tree walks in files/s (0 means unlimited)
+        """
+        self.byte_bucket = TokenBucket()
+        self.file_bucket = TokenBucket()
+        self.stats_lock = threading.Lock()
+        self.set_limits(max_mb_per_sec, max_files_per_sec)
+        self.reset_stats()
+
+    def set_limits(self, max_mb_per_sec=None, max_files_per_sec=None):
+        """Change the caps; may be called while a scan is running"""
+        if max_mb_per_sec is not None:
+            self.max_mb_per_sec = max(0, max_mb_per_sec)
+            self.byte_bucket.set_rate(self.max_mb_per_sec * 1024 * 1024)
+        if max_files_per_sec is not None:
+            self.max_files_per_sec = max(0, max_files_per_sec)
+            self.file_bucket.set_rate(self.max_files_per_sec)
+
+    def reset_stats(self):
+        """Reset the statistics at the start of a scan"""
+        with self.stats_lock:
+            self.bytes_read = 0
+            self.files_seen = 0
+            self.byte_wait = 0.0
+            self.file_wait = 0.0
+            self.started = time.monotonic()
+
+    def throttle_bytes(self, num_bytes, should_stop=None):
+        """Account for bytes read, sleeping if over the bandwidth cap"""
+        waited = self.byte_bucket.consume(num_bytes, should_stop)
+        with self.stats_lock:
+            self.bytes_read += num_bytes
+            self.byte_wait += waited
+
+    def throttle_files(self, count=1, should_stop=None):
+        """Account for files visited by a walker, sleeping if over the file rate cap"""
+        waited = self.file_bucket.consume(count, should_stop)
+        with self.stats_lock:
+            self.files_seen += count
+            self.file_wait += waited
+
+    def get_stats(self):
+        """Get a snapshot of the throttle's effect on the current scan"""
+        with self.stats_lock:
+            elapsed = max(time.monotonic() - self.started, 1e-9)
+            return {
+                'max_mb_per_sec': self.max_mb_per_sec,
+                'max_files_per_sec': self.max_files_per_sec,
+                'bytes_read': self.bytes_read,
+                'files_seen': self.files_seen,
+                'elapsed': elapsed,
+                'bytes_per_sec': self.bytes_read / elapsed,
+                'files_per_sec': self.files_seen / elapsed,
+                'byte_wait': self.byte_wait,
+                'file_wait': self.file_wait
+            }
+
+def set_thread_io_priority_idle():
+    """
+    Move the calling thread to the idle I/O scheduling class (Linux only)
+
+    Threads started afterwards from this thread inherit the priority.
+
+    Returns:
+        True if the priority was changed, False otherwise
+    """
+    if not hasattr(threading, 'get_native_id') or platform.system() != 'Linux':
+        return False
+    syscall_number = IOPRIO_SYSCALLS.get(platform.machine())
+    if syscall_number is None:
+        return False
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        ioprio = IOPRIO_CLASS_IDLE << IOPRIO_CLASS_SHIFT
+        result = libc.syscall(syscall_number, IOPRIO_WHO_PROCESS,
+                              threading.get_native_id(), ioprio)
+        if result != 0:
+            print(f"Error setting I/O priority: {os.strerror(ctypes.get_errno())}")
+            return False
+        return True
+    except Exception as e:
+        print(f"Error setting I/O priority: {e}")
+        return False
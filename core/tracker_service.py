@@ -0,0 +1,385 @@
+import os
+import json
+import socket
+import threading
+import socketserver
+
+# Bumped when requests or responses change incompatibly
+PROTOCOL_VERSION = 1
+
+class TrackerService:
+    """Requests a FileTracker answers over the daemon socket
+
+    Each request is one JSON line {"method": ..., "params": {...}} and is
+    answered by one line {"result": ...} or {"error": "message"}. A
+    connection that sends "subscribe" then receives a line
+    {"event": "changed", "date": ..., "added": [...], "removed": [...]} for
+    every history change, with date None when any date may have changed.
+    """
+    def __init__(self, tracker):
+        """
+        Args:
+            tracker: FileTracker owned by the daemon
+        """
+        self.tracker = tracker
+        self.subscribers = {}  # write stream -> lock serializing writes to it
+        self.lock = threading.Lock()
+        self.methods = {
+            'ping': self.ping,
+            'files_for_date': self.files_for_date,
+            'add_current_files': self.add_current_files,
+            'clean_history': self.clean_history,
+            'get_watch_paths': self.get_watch_paths,
+            'set_watch_paths': self.set_watch_paths,
+            'stats': self.stats,
+            'search': self.search
+        }
+        tracker.add_change_listener(self.on_history_changed)
+
+    def dispatch(self, method, params):
+        """Run a request and get its result"""
+        handler = self.methods.get(method)
+        if handler is None:
+            raise ValueError(f"Unknown method: {method}")
+        return handler(**params)
+
+    def ping(self):
+        return {'version': PROTOCOL_VERSION, 'pid': os.getpid()}
+
+    def files_for_date(self, date, paths=None):
+        return self.tracker.get_files_for_date(date, paths)
+
+    def add_current_files(self, date, path):
+        return self.tracker.add_current_files_for_date(date, path)
+
+    def clean_history(self, path):
+        return self.tracker.clean_history_for_path(path)
+
+    def get_watch_paths(self):
+        return list(self.tracker.watch_paths)
+
+    def set_watch_paths(self, paths):
+        self.tracker.set_watch_paths(paths)
+        return True
+
+    def stats(self):
+        stats = self.tracker.get_history_stats()
+        stats['counters'] = dict(self.tracker.instrumentation.counters)
+        stats['subscribers'] = len(self.subscribers)
+        return stats
+
+    def search(self, query, limit=1000):
+        return self.tracker.search_paths(query, limit)
+
+    def add_subscriber(self, stream, write_lock):
+        """Send history changes to a connection from now on"""
+        with self.lock:
+            self.subscribers[stream] = write_lock
+
+    def remove_subscriber(self, stream):
+        """Stop sending history changes to a connection"""
+        with self.lock:
+            self.subscribers.pop(stream, None)
+
+    def on_history_changed(self, date_str, added, removed):
+        """Push a history change to every subscribed connection"""
+        line = (json.dumps({'event': 'changed', 'date': date_str,
+                            'added': added, 'removed': removed}) + "\n").encode('utf-8')
+        with self.lock:
+            subscribers = list(self.subscribers.items())
+        for stream, write_lock in subscribers:
+            try:
+                with write_lock:
+                    stream.write(line)
+                    stream.flush()
+            except (OSError, ValueError):
+                self.remove_subscriber(stream)
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Serve the JSON line requests of one connection"""
+    def handle(self):
+        service = self.server.service
+        write_lock = threading.Lock()
+        try:
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                    method = request.get('method')
+                    if method == 'subscribe':
+                        service.add_subscriber(self.wfile, write_lock)
+                        response = {'result': True}
+                    else:
+                        response = {'result': service.dispatch(method, request.get('params') or {})}
+                except Exception as e:
+                    response = {'error': str(e)}
+                with write_lock:
+                    self.wfile.write((json.dumps(response) + "\n").encode('utf-8'))
+                    self.wfile.flush()
+        except OSError:
+            pass
+        finally:
+            service.remove_subscriber(self.wfile)
+
+class TrackerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix domain socket server for a FileTracker running without the GUI"""
+    daemon_threads = True
+
+    def __init__(self, tracker, socket_path):
+        """
+        Args:
+            tracker: FileTracker to serve
+            socket_path: Path of the socket; only the current user may connect
+        """
+        self.socket_path = socket_path
+        if os.path.exists(socket_path):
+            client = TrackerClient.connect(socket_path)
+            if client is not None:
+                client.stop()
+                raise OSError(f"A tracker daemon is already listening on {socket_path}")
+            os.remove(socket_path)  # Left behind by a daemon that did not shut down
+        self.service = TrackerService(tracker)
+        old_umask = os.umask(0o077)
+        try:
+            super().__init__(socket_path, _RequestHandler)
+        finally:
+            os.umask(old_umask)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.remove(self.socket_path)
+        except OSError:
+            pass
+
+class TrackerClient:
+    """FileTracker stand-in for the GUI that queries a tracker daemon
+
+    Provides the parts of the FileTracker interface the tabs use, so they
+    work unchanged whether the tracker runs in-process or in the daemon.
+    Only the results the GUI displays cross the socket; the history itself
+    stays in the daemon. Extra handlers (the live duplicate index) get a
+    local observer, started when the first one is added.
+    """
+    def __init__(self, socket_path, timeout=5.0):
+        """
+        Args:
+            socket_path: Path of the daemon's socket
+            timeout: Seconds to wait for connecting; requests themselves may
+                take as long as the daemon needs (e.g. scanning a folder)
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.lock = threading.Lock()  # One request at a time on the connection
+        self.sock = None
+        self.reader = None
+        self.change_listeners = []
+        self.event_sock = None
+        self.event_thread = None
+        self.on_reconciled = None  # The daemon catches up on its own
+        self.handlers = []
+        self.handler_watches = {}
+        self.observer = None
+        self.watch_paths = []
+
+    @classmethod
+    def connect(cls, socket_path, timeout=5.0):
+        """
+        Connect to a running daemon
+
+        Returns:
+            TrackerClient, or None if no daemon answers on the socket
+        """
+        if not os.path.exists(socket_path):
+            return None
+        client = cls(socket_path, timeout)
+        try:
+            client.call('ping')
+            client.watch_paths = client.call('get_watch_paths')
+            return client
+        except Exception:
+            client.stop()
+            return None
+
+    def _open(self):
+        """Open a connection to the daemon"""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        sock.settimeout(None)
+        return sock
+
+    def call(self, method, **params):
+        """
+        Send a request and wait for its result
+
+        Raises:
+            OSError if the daemon cannot be reached, RuntimeError if it
+            reports an error
+        """
+        with self.lock:
+            for attempt in range(2):
+                try:
+                    if self.sock is None:
+                        self.sock = self._open()
+                        self.reader = self.sock.makefile('rb')
+                    self.sock.sendall((json.dumps({'method': method, 'params': params}) + "\n").encode('utf-8'))
+                    line = self.reader.readline()
+                    if not line:
+                        raise ConnectionError("Tracker daemon closed the connection")
+                    break
+                except OSError:
+                    self._close_connection()
+                    if attempt:
+                        raise  # Reconnecting once covers a restarted daemon
+        response = json.loads(line)
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        return response['result']
+
+    def _close_connection(self):
+        """Drop the request connection"""
+        if self.sock is not None:
+            try:
+                self.reader.close()
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+        self.reader = None
+
+    def get_files_for_date(self, date_str, selected_paths=None):
+        """Get files for a specific date from the daemon, filtered by selected paths"""
+        try:
+            return self.call('files_for_date', date=date_str, paths=list(selected_paths or []))
+        except Exception as e:
+            print(f"Error querying tracker daemon: {e}")
+            return []
+
+    def add_current_files_for_date(self, date_str, path):
+        """Have the daemon add currently existing files in the path for a date"""
+        try:
+            return self.call('add_current_files', date=date_str, path=path)
+        except Exception as e:
+            print(f"Error adding current files: {e}")
+            return False
+
+    def clean_history_for_path(self, removed_path):
+        """Have the daemon remove files of a removed folder from history"""
+        try:
+            return self.call('clean_history', path=removed_path)
+        except Exception as e:
+            print(f"Error cleaning history: {e}")
+            return False
+
+    def set_watch_paths(self, watch_paths):
+        """Change the folders the daemon watches"""
+        self.watch_paths = list(watch_paths)
+        try:
+            self.call('set_watch_paths', paths=self.watch_paths)
+        except Exception as e:
+            print(f"Error updating watched folders: {e}")
+
+    def get_history_stats(self):
+        """Get the daemon's history statistics"""
+        try:
+            return self.call('stats')
+        except Exception as e:
+            print(f"Error querying tracker daemon: {e}")
+            return {}
+
+    def search_paths(self, query, limit=1000):
+        """Search the daemon's history for paths matching a substring or glob"""
+        try:
+            return [tuple(result) for result in self.call('search', query=query, limit=limit)]
+        except Exception as e:
+            print(f"Error searching tracker daemon: {e}")
+            return []
+
+    def add_change_listener(self, listener):
+        """Register a function called with (date_str, added, removed) on history changes"""
+        self.change_listeners.append(listener)
+        if self.event_thread is None:
+            self.event_thread = threading.Thread(target=self._read_events, daemon=True)
+            self.event_thread.start()
+
+    def _read_events(self):
+        """Receive pushed history changes and pass them to the listeners"""
+        try:
+            self.event_sock = self._open()
+            self.event_sock.sendall(b'{"method": "subscribe"}\n')
+            with self.event_sock.makefile('rb') as reader:
+                for line in reader:
+                    message = json.loads(line)
+                    if message.get('event') != 'changed':
+                        continue
+                    for listener in list(self.change_listeners):
+                        try:
+                            listener(message['date'], message['added'], message['removed'])
+                        except Exception as e:
+                            print(f"Error in history change listener: {e}")
+        except (OSError, ValueError) as e:
+            if self.event_sock is not None:
+                print(f"Lost connection to tracker daemon: {e}")
+        # Changes may have been missed; have listeners fetch again
+        for listener in list(self.change_listeners):
+            try:
+                listener(None, [], [])
+            except Exception as e:
+                print(f"Error in history change listener: {e}")
+
+    def start(self):
+        """Start watching for the local handlers; the daemon does the tracking"""
+        if self.observer is None and self.handlers:
+            from watchdog.observers import Observer
+            self.observer = Observer()
+            for handler, path in self.handlers:
+                self._schedule_handler(handler, path)
+            self.observer.start()
+
+    def stop(self):
+        """Stop the local observer and disconnect from the daemon, which keeps tracking"""
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer.join()
+            self.observer = None
+            self.handler_watches = {}
+        event_sock, self.event_sock = self.event_sock, None
+        if event_sock is not None:
+            try:
+                event_sock.shutdown(socket.SHUT_RDWR)
+                event_sock.close()
+            except OSError:
+                pass
+        with self.lock:
+            self._close_connection()
+
+    def _schedule_handler(self, handler, path):
+        """Schedule a handler on the local observer"""
+        if self.observer is not None and os.path.exists(path):
+            try:
+                self.handler_watches[(id(handler), path)] = self.observer.schedule(
+                    handler, path, recursive=True)
+            except Exception as e:
+                print(f"Error watching {path}: {e}")
+
+    def add_handler(self, handler, path):
+        """Deliver file system events below a path to a handler"""
+        if (handler, path) not in self.handlers:
+            self.handlers.append((handler, path))
+            if self.observer is None:
+                self.start()
+            else:
+                self._schedule_handler(handler, path)
+
+    def remove_handler(self, handler):
+        """Stop delivering events to a handler added with add_handler()"""
+        for path in [path for h, path in self.handlers if h is handler]:
+            self.handlers.remove((handler, path))
+            watch = self.handler_watches.pop((id(handler), path), None)
+            if watch is not None and self.observer is not None:
+                try:
+                    self.observer.unschedule(watch)
+                except Exception as e:
+                    print(f"Error unwatching {path}: {e}")
@@ -1,41 +1,61 @@
+import time
+
+# Reference point for --profile-startup
+STARTUP_STARTED = time.perf_counter()
+
 import os
-import tkinter as tk
-from tkinter import ttk, messagebox
 import sys
 import json
+import argparse
+import threading
 
 # Ensure the necessary directories are in the Python path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 if current_dir not in sys.path:
     sys.path.append(current_dir)
 
-# Import application modules
-from core.file_tracker import FileTracker
-from ui.file_tracker_tab import FileTrackerTab
-from ui.duplicate_finder_tab import DuplicateFinderTab
+from core.instrumentation import ScanInstrumentation
+
+startup_profile = ScanInstrumentation()
+
+# Import application modules; the tabs, the tracker and the duplicate finder
+# are imported where they are first needed
+with startup_profile.phase('import tkinter'):
+    import tkinter as tk
+    from tkinter import ttk, messagebox
 
 class FileTrackerApp:
     """Main application class for File Tracker with Duplicate Finder"""
     
-    def __init__(self):
-        """Initialize the application"""
-        self.root = tk.Tk()
-        self.root.title("File Activity Tracker 1.2")
-        self.root.geometry("900x650")
-        self.root.minsize(800, 600)
+    def __init__(self, profile_startup=False):
+        """
+        Initialize the application
+        
+        Args:
+            profile_startup: Print import and initialization timings
+        """
+        self.profile_startup = profile_startup
+        
+        with startup_profile.phase('create window'):
+            self.root = tk.Tk()
+            self.root.title("File Activity Tracker 1.2")
+            self.root.geometry("900x650")
+            self.root.minsize(800, 600)
         
         # Configuration files
         self.config_file = "file_tracker_config.json"
         self.history_file = "file_history.json"
         
         # Load configuration
-        self.config = self.load_config()
+        with startup_profile.phase('load config'):
+            self.config = self.load_config()
         
         # Create the main application container
         self.create_main_container()
         
-        # Initialize the file tracker
-        self.tracker = FileTracker(self.config.get('watch_paths', []), self.history_file)
+        # Initialize the file tracker; its history loads after the window appears
+        with startup_profile.phase('create tracker'):
+            self.tracker = self.create_tracker()
         
         # Create and initialize tabs
         self.create_tabs()
@@ -44,7 +64,16 @@ class FileTrackerApp:
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
     
     def load_config(self):
-        """Load application configuration from file"""
+        """
+        Load application configuration from file
+        
+        Besides watch_paths and daemon_socket, the configuration may set:
+            history_retention_days: Days kept in the history file; older dates
+                are moved to the compressed archive. Not set: nothing is archived
+            history_max_age_days: Days after which dates are deleted, archived
+                or not. Not set: history is kept forever
+            history_compression: 'gzip' (default) or 'lzma' for the archive
+        """
         config = {'watch_paths': []}
         try:
             if os.path.exists(self.config_file):
@@ -64,9 +93,27 @@ class FileTrackerApp:
                 json.dump(self.config, f, indent=4)
         except Exception as e:
             print(f"Error saving configuration: {e}")
-            messagebox.showerror("Configuration Error", 
+            messagebox.showerror("Configuration Error",
                                f"Failed to save configuration: {str(e)}")
     
+    def create_tracker(self):
+        """Connect to the tracker daemon if one is running, otherwise track in-process"""
+        from core.tracker_service import TrackerClient
+        tracker = TrackerClient.connect(self.config.get('daemon_socket', "file_tracker.sock"))
+        if tracker is not None:
+            self.config['watch_paths'] = tracker.watch_paths
+            return tracker
+        
+        from core.file_tracker import FileTracker
+        return FileTracker(
+            self.config.get('watch_paths', []),
+            self.history_file,
+            retention_days=self.config.get('history_retention_days'),
+            max_age_days=self.config.get('history_max_age_days'),
+            compression=self.config.get('history_compression', 'gzip'),
+            load=False
+        )
+    
     def create_main_container(self):
         """Create the main application container"""
         # Create main frame to hold everything
@@ -80,18 +127,68 @@ class FileTrackerApp:
     def create_tabs(self):
         """Create and initialize application tabs"""
         # Create File Tracker tab
-        file_tracker_frame = ttk.Frame(self.notebook)
-        self.notebook.add(file_tracker_frame, text="File Tracker")
-        self.file_tracker_tab = FileTrackerTab(
-            file_tracker_frame, 
-            self.tracker, 
-            self.config.get('watch_paths', [])
-        )
+        with startup_profile.phase('file tracker tab'):
+            from ui.file_tracker_tab import FileTrackerTab
+            file_tracker_frame = ttk.Frame(self.notebook)
+            self.notebook.add(file_tracker_frame, text="File Tracker")
+            self.file_tracker_tab = FileTrackerTab(
+                file_tracker_frame,
+                self.tracker,
+                self.config.get('watch_paths', [])
+            )
+        
+        # The Duplicate Finder tab is built when it is first selected
+        self.duplicate_finder_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.duplicate_finder_frame, text="Duplicate Finder")
+        self.duplicate_finder_tab = None
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+    
+    def on_tab_changed(self, event=None):
+        """Build the Duplicate Finder tab the first time it is selected"""
+        if self.duplicate_finder_tab is not None:
+            return
+        if self.notebook.select() != str(self.duplicate_finder_frame):
+            return
+        started = time.perf_counter()
+        from ui.duplicate_finder_tab import DuplicateFinderTab
+        self.duplicate_finder_tab = DuplicateFinderTab(self.duplicate_finder_frame, tracker=self.tracker)
+        if self.profile_startup:
+            print(f"Duplicate Finder tab built in {time.perf_counter() - started:.3f}s")
+    
+    def on_first_paint(self):
+        """Load the history and start tracking once the window is shown"""
+        startup_profile.count('first_paint_ms', int((time.perf_counter() - STARTUP_STARTED) * 1000))
+        if getattr(self.tracker, 'loaded', None) is None:
+            # Tracker daemon: the history lives there
+            self.on_history_loaded()
+            return
+        
+        self.file_tracker_tab.start_processing("Loading history...")
         
-        # Create Duplicate Finder tab
-        duplicate_finder_frame = ttk.Frame(self.notebook)
-        self.notebook.add(duplicate_finder_frame, text="Duplicate Finder")
-        self.duplicate_finder_tab = DuplicateFinderTab(duplicate_finder_frame)
+        def load_history():
+            with startup_profile.phase('load history'):
+                self.tracker.load()
+            self.root.after(0, self.on_history_loaded)
+        
+        threading.Thread(target=load_history, daemon=True).start()
+    
+    def on_history_loaded(self):
+        """Start the observer and show the history (UI thread)"""
+        with startup_profile.phase('start observer'):
+            self.tracker.start()
+        self.file_tracker_tab.on_history_loaded()
+        startup_profile.count('ready_ms', int((time.perf_counter() - STARTUP_STARTED) * 1000))
+        if self.profile_startup:
+            self.print_startup_profile()
+    
+    def print_startup_profile(self):
+        """Print the startup phases in the order they ran"""
+        summary = startup_profile.summary()
+        print("Startup phase            wall (s)    cpu (s)")
+        for name, phase in summary['phases'].items():
+            print(f"{name:22s} {phase['wall']:10.3f} {phase['cpu']:10.3f}")
+        print(f"Window shown after {summary['counters'].get('first_paint_ms', 0) / 1000:.3f}s, "
+              f"ready after {summary['counters'].get('ready_ms', 0) / 1000:.3f}s")
     
     def on_closing(self):
         """Handle application closing event"""
@@ -100,6 +197,10 @@ class FileTrackerApp:
             if hasattr(self, 'tracker'):
                 self.tracker.stop()
             
+            # Stop scans and save the live duplicate index
+            if self.duplicate_finder_tab is not None:
+                self.duplicate_finder_tab.close()
+            
             # Save configuration
             self.save_config()
             
@@ -109,13 +210,18 @@ class FileTrackerApp:
             print(f"Error during application shutdown: {e}")
     
     def run(self):
-        """Start the application main loop"""
-        # Start the file tracker
-        self.tracker.start()
-        
-        # Start the main event loop
+        """Start the main event loop; tracking starts once the window is drawn"""
+        self.root.after_idle(self.on_first_paint)
         self.root.mainloop()
 
-if __name__ == "__main__":
-    app = FileTrackerApp()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="File Activity Tracker")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="Print import and initialization timings")
+    args = parser.parse_args(argv)
+
+    app = FileTrackerApp(profile_startup=args.profile_startup)
     app.run()
+
+if __name__ == "__main__":
+    main()
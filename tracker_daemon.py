@@ -0,0 +1,100 @@
+"""
+Headless file tracker daemon
+
+Runs the FileTracker observer and history store without Tk and answers
+queries over a Unix domain socket, so tracking continues while the GUI is
+closed. When the daemon is running, the GUI connects to it instead of
+loading the history itself.
+
+Usage:
+    python tracker_daemon.py
+    python tracker_daemon.py --socket /run/user/1000/file_tracker.sock
+
+History retention is read from the configuration shared with the GUI:
+history_retention_days moves older dates to the compressed archive,
+history_max_age_days deletes them and history_compression picks 'gzip'
+or 'lzma'. Both day limits are off unless set.
+"""
+import os
+import sys
+import json
+import signal
+import argparse
+import threading
+
+# Allow running as a script from the repository root
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
+
+from core.file_tracker import FileTracker
+from core.tracker_service import TrackerServer
+
+DEFAULT_SOCKET = "file_tracker.sock"
+
+def load_config(config_file):
+    """Load the configuration shared with the GUI"""
+    config = {'watch_paths': []}
+    try:
+        if os.path.exists(config_file):
+            with open(config_file, 'r') as f:
+                config = json.load(f)
+    except Exception as e:
+        print(f"Error loading configuration: {e}")
+    return config
+
+def save_watch_paths(config_file, watch_paths):
+    """Store the watched folders, which clients may have changed, in the configuration"""
+    config = load_config(config_file)
+    config['watch_paths'] = list(watch_paths)
+    try:
+        with open(config_file, 'w') as f:
+            json.dump(config, f, indent=4)
+    except Exception as e:
+        print(f"Error saving configuration: {e}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Track file activity without the GUI")
+    parser.add_argument('--config', default="file_tracker_config.json", help="Configuration file")
+    parser.add_argument('--history', default="file_history.json", help="History file")
+    parser.add_argument('--socket', help=f"Socket path (default: daemon_socket from the configuration or {DEFAULT_SOCKET})")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    socket_path = args.socket or config.get('daemon_socket', DEFAULT_SOCKET)
+    tracker = FileTracker(
+        config.get('watch_paths', []),
+        args.history,
+        retention_days=config.get('history_retention_days'),
+        max_age_days=config.get('history_max_age_days'),
+        compression=config.get('history_compression', 'gzip')
+    )
+    tracker.on_reconciled = lambda count: print(f"Caught up on {count} files changed while not running")
+
+    try:
+        server = TrackerServer(tracker, socket_path)
+    except OSError as e:
+        print(f"Error starting tracker daemon: {e}", file=sys.stderr)
+        return 1
+
+    stopped = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stopped.set())
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopped.set())
+
+    tracker.start()
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    print(f"Tracking {len(tracker.watch_paths)} folders, listening on {socket_path}")
+
+    while not stopped.wait(1):
+        pass
+
+    server.shutdown()
+    server.server_close()
+    tracker.stop()
+    tracker.save_history()
+    save_watch_paths(args.config, tracker.watch_paths)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,59 @@
 import os
-import threading
 import datetime
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 
 from core.duplicate_finder import DuplicateFinder
-from utils.file_utils import format_file_size, open_file_location, safe_delete_file
+from core.scan_jobs import ScanJobManager, JOB_COMPLETED, JOB_FAILED
+from core.checkpoint import ScanCheckpoint
+from core.instrumentation import ScanInstrumentation
+from core.snapshot import ScanSnapshot, diff_snapshots
+from core.duplicate_index import DuplicateIndex
+from core.scan_session import ScanSession
+from utils.file_utils import (format_file_size, open_file_location, safe_delete_file,
+                              safe_delete_directory, safe_link_duplicate)
 
 class DuplicateFinderTab:
     """UI component for the duplicate finder tab"""
     
-    def __init__(self, parent_frame):
-        """Initialize the duplicate finder tab"""
+    def __init__(self, parent_frame, checkpoint_file="duplicate_scan_checkpoint.json",
+                 tracker=None, index_file="duplicate_index.json"):
+        """
+        Initialize the duplicate finder tab
+        
+        Args:
+            parent_frame: Frame to build the tab in
+            checkpoint_file: JSON file for resumable hash scan checkpoints
+            tracker: FileTracker whose observer keeps the live duplicate index current
+            index_file: JSON file of the live duplicate index
+        """
         self.parent = parent_frame
-        self.duplicate_finder = DuplicateFinder()
+        self.tracker = tracker
+        self.checkpoint_file = checkpoint_file
+        # File list of the last walk, shared by the scans of all jobs
+        self.scan_session = ScanSession()
+        self.job_manager = ScanJobManager(DuplicateFinder, 
+                                          finder_kwargs={'checkpoint_file': checkpoint_file,
+                                                         'session': self.scan_session})
+        self.jobs_refresh_pending = False
         self.scan_directories = []
+        self.results_verified = False  # True when results are content-verified
+        self.current_duplicates = {}  # Group key -> paths of the displayed results
+        self.showing_live_index = False
+        self.index_refresh_pending = False
         
         # Create UI elements
         self.create_widgets()
+        
+        # Live duplicate index: show the last results at once, then keep them current
+        self.duplicate_index = DuplicateIndex(index_file, DuplicateFinder())
+        self.duplicate_index.add_listener(
+            lambda: self.parent.after(0, self.on_index_changed))
+        if self.duplicate_index.load():
+            self.watch_index_directories()
+            self.duplicate_index.start()
+            self.duplicate_index.revalidate()
+            self.show_live_index()
     
     def create_widgets(self):
         """Create UI widgets for the duplicate finder tab"""
@@ -56,6 +92,19 @@ class DuplicateFinderTab:
         ttk.Button(folder_btn_frame, text="Add", command=self.add_scan_directory).pack(pady=2)
         ttk.Button(folder_btn_frame, text="Remove", command=self.remove_scan_directory).pack(pady=2)
         
+        # Scan session - later scans of the same folders reuse the last file list
+        session_frame = ttk.Frame(folder_frame)
+        session_frame.pack(fill=tk.X, padx=5, pady=2)
+        
+        self.reuse_file_list_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(session_frame, text="Reuse file list between scans", 
+                      variable=self.reuse_file_list_var).pack(side=tk.LEFT, padx=5)
+        ttk.Button(session_frame, text="Forget File List", 
+                 command=self.forget_file_list).pack(side=tk.LEFT, padx=5)
+        
+        self.session_label = ttk.Label(session_frame, text="No file list kept")
+        self.session_label.pack(side=tk.LEFT, padx=5)
+        
         # Function buttons - grouped into Frame 1 (Content-based methods)
         method_frame1 = ttk.LabelFrame(main_frame, text="Content-Based Detection")
         method_frame1.pack(fill=tk.X, pady=5)
@@ -68,6 +117,12 @@ class DuplicateFinderTab:
                  command=self.find_duplicates_by_name_size,
                  width=40).pack(side=tk.LEFT, padx=5, pady=5)
         
+        ttk.Button(method_frame1, text="Quick Scan (Sampled, Large Files)", 
+                 command=self.find_duplicates_quick).pack(side=tk.LEFT, padx=5, pady=5)
+        
+        ttk.Button(method_frame1, text="Resume Last Scan", 
+                 command=self.resume_last_scan).pack(side=tk.LEFT, padx=5, pady=5)
+        
         # Function buttons - Frame 2 (Advanced methods)
         method_frame2 = ttk.LabelFrame(main_frame, text="Advanced Methods")
         method_frame2.pack(fill=tk.X, pady=5)
@@ -76,12 +131,96 @@ class DuplicateFinderTab:
                  command=self.find_similar_files,
                  width=40).pack(side=tk.LEFT, padx=5, pady=5)
         
+        ttk.Button(method_frame2, text="Find Duplicate Folders (Whole Trees)", 
+                 command=self.find_duplicate_directories,
+                 width=40).pack(side=tk.LEFT, padx=5, pady=5)
+        
         ttk.Button(method_frame2, text="Scan Directories (Statistics)", 
                  command=self.scan_directory_stats,
                  width=40).pack(side=tk.LEFT, padx=5, pady=5)
         
+        ttk.Button(method_frame2, text="Save Snapshot", 
+                 command=self.save_snapshot).pack(side=tk.LEFT, padx=5, pady=5)
+        
+        ttk.Button(method_frame2, text="Compare with Snapshot", 
+                 command=self.compare_with_snapshot).pack(side=tk.LEFT, padx=5, pady=5)
+        
+        # Live duplicate index - updated from file system events
+        index_frame = ttk.LabelFrame(main_frame, text="Live Duplicate Index")
+        index_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Button(index_frame, text="Build Index for Folders", 
+                 command=self.build_live_index).pack(side=tk.LEFT, padx=5, pady=5)
+        ttk.Button(index_frame, text="Show Live Results", 
+                 command=self.show_live_index).pack(side=tk.LEFT, padx=5, pady=5)
+        
+        self.index_label = ttk.Label(index_frame, text="No index")
+        self.index_label.pack(side=tk.LEFT, padx=5, pady=5)
+        
+        # Throttle settings - can be applied while a scan is running
+        throttle_frame = ttk.LabelFrame(main_frame, text="I/O Throttle (0 = unlimited)")
+        throttle_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(throttle_frame, text="Max MB/s:").pack(side=tk.LEFT, padx=5, pady=5)
+        self.max_mb_var = tk.StringVar(value="0")
+        ttk.Entry(throttle_frame, textvariable=self.max_mb_var, width=8).pack(side=tk.LEFT, pady=5)
+        
+        ttk.Label(throttle_frame, text="Max files/s:").pack(side=tk.LEFT, padx=5, pady=5)
+        self.max_files_var = tk.StringVar(value="0")
+        ttk.Entry(throttle_frame, textvariable=self.max_files_var, width=8).pack(side=tk.LEFT, pady=5)
+        
+        self.low_priority_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(throttle_frame, text="Low I/O priority", 
+                      variable=self.low_priority_var).pack(side=tk.LEFT, padx=10, pady=5)
+        
+        ttk.Button(throttle_frame, text="Apply", 
+                 command=self.apply_throttle).pack(side=tk.LEFT, padx=5, pady=5)
+        
+        # Scan jobs - several scans can run at once
+        jobs_frame = ttk.LabelFrame(main_frame, text="Scan Jobs")
+        jobs_frame.pack(fill=tk.X, pady=5)
+        
+        self.jobs_tree = ttk.Treeview(jobs_frame, height=3, 
+                                    columns=("name", "state", "progress"))
+        self.jobs_tree.column("#0", width=50, minwidth=50)
+        self.jobs_tree.column("name", width=300, minwidth=150)
+        self.jobs_tree.column("state", width=100, minwidth=80)
+        self.jobs_tree.column("progress", width=300, minwidth=100)
+        self.jobs_tree.heading("#0", text="Job")
+        self.jobs_tree.heading("name", text="Scan")
+        self.jobs_tree.heading("state", text="State")
+        self.jobs_tree.heading("progress", text="Progress")
+        self.jobs_tree.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5, pady=5)
+        
+        jobs_btn_frame = ttk.Frame(jobs_frame)
+        jobs_btn_frame.pack(side=tk.RIGHT, fill=tk.Y, padx=5)
+        
+        ttk.Button(jobs_btn_frame, text="Pause", command=self.pause_selected_job).pack(pady=1)
+        ttk.Button(jobs_btn_frame, text="Resume", command=self.resume_selected_job).pack(pady=1)
+        ttk.Button(jobs_btn_frame, text="Cancel", command=self.cancel_selected_job).pack(pady=1)
+        
+        # Diagnostics - scan metrics and optional profiling
+        diagnostics_frame = ttk.LabelFrame(main_frame, text="Diagnostics")
+        diagnostics_frame.pack(fill=tk.X, pady=5)
+        
+        self.profile_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(diagnostics_frame, text="Capture profile (cProfile)", 
+                      variable=self.profile_var).pack(side=tk.LEFT, padx=5, pady=5)
+        
+        self.trace_memory_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(diagnostics_frame, text="Trace peak memory", 
+                      variable=self.trace_memory_var).pack(side=tk.LEFT, padx=5, pady=5)
+        
+        ttk.Button(diagnostics_frame, text="Show Metrics", 
+                 command=self.show_job_metrics).pack(side=tk.LEFT, padx=5, pady=5)
+        ttk.Button(diagnostics_frame, text="Save Metrics JSON", 
+                 command=self.save_job_metrics).pack(side=tk.LEFT, padx=5, pady=5)
+        
+        self.metrics_label = ttk.Label(diagnostics_frame, text="")
+        self.metrics_label.pack(side=tk.LEFT, padx=5, pady=5)
+        
         # Stop button
-        ttk.Button(main_frame, text="Stop Current Scan", 
+        ttk.Button(main_frame, text="Stop All Scans", 
                  command=self.stop_current_scan).pack(pady=5)
         
         # Results area
@@ -130,6 +269,8 @@ class DuplicateFinderTab:
                  command=self.keep_newest_duplicates).pack(side=tk.LEFT, padx=5)
         ttk.Button(action_frame, text="Keep Oldest", 
                  command=self.keep_oldest_duplicates).pack(side=tk.LEFT, padx=5)
+        ttk.Button(action_frame, text="Replace with Links", 
+                 command=self.link_duplicates).pack(side=tk.LEFT, padx=5)
     
     def add_scan_directory(self):
         """Add a directory to scan for duplicates"""
@@ -151,6 +292,15 @@ class DuplicateFinderTab:
             self.scan_listbox.delete(index)
             self.status_label.config(text=f"Removed directory: {path}")
     
+    def forget_file_list(self):
+        """Make the next scan walk the folders again"""
+        self.scan_session.clear()
+        self.update_session_label()
+    
+    def update_session_label(self):
+        """Show which file list the next scan of the same folders reuses"""
+        self.session_label.config(text=self.scan_session.describe())
+    
     def update_scan_progress(self, progress, message):
         """Update progress bar and status during scan"""
         # Use after() to update UI from a non-main thread
@@ -161,6 +311,153 @@ class DuplicateFinderTab:
         """Clear the results treeview"""
         for item in self.results_tree.get_children():
             self.results_tree.delete(item)
+        self.current_duplicates = {}
+        self.showing_live_index = False
+    
+    def start_scan_job(self, name, method_name, *args, display=None, **kwargs):
+        """
+        Run a DuplicateFinder scan method as a job
+        
+        Args:
+            name: Job name shown in the jobs list
+            method_name: DuplicateFinder method to run
+            *args: Arguments for the method (before the callback)
+            display: Function called on the UI thread with (result, job) on completion
+            **kwargs: Keyword arguments for the method
+        """
+        self.clear_results_tree()
+        self.progress_bar["value"] = 0
+        if not self.reuse_file_list_var.get():
+            self.forget_file_list()
+        
+        def on_finished(job):
+            self.parent.after(0, lambda: self.on_job_finished(job, display))
+        
+        instrumentation = ScanInstrumentation(trace_memory=self.trace_memory_var.get(),
+                                              profile=self.profile_var.get())
+        job = self.job_manager.submit(name, method_name, *args, 
+                                      limits=self.get_job_limits(),
+                                      on_progress=self.update_job_progress,
+                                      on_finished=on_finished,
+                                      finder_kwargs={'instrumentation': instrumentation},
+                                      **kwargs)
+        self.update_scan_progress(0, f"Started job {job.job_id}: {name}...")
+        self.refresh_jobs_view()
+        return job
+    
+    def on_job_finished(self, job, display):
+        """Handle a finished job on the UI thread"""
+        self.refresh_jobs_view()
+        self.update_session_label()
+        if job.finder is not None:
+            summary = job.finder.instrumentation.summary()
+            self.metrics_label.config(
+                text=f"Job {job.job_id}: {summary['elapsed']:.2f}s, "
+                     f"{summary['files_per_sec']:.0f} files/s, "
+                     f"{summary['bytes_per_sec'] / (1024 * 1024):.1f} MB/s")
+        if job.state == JOB_COMPLETED:
+            if display:
+                display(job.result, job)
+        elif job.state == JOB_FAILED:
+            messagebox.showerror("Error", f"Scan failed: {str(job.error)}")
+        else:
+            self.status_label.config(text=f"Job {job.job_id} ({job.name}) cancelled")
+    
+    def update_job_progress(self, job, progress, message):
+        """Update progress from a job's worker thread"""
+        self.update_scan_progress(progress, f"[Job {job.job_id}] {message}")
+        if not self.jobs_refresh_pending:
+            self.jobs_refresh_pending = True
+            self.parent.after(500, self.refresh_jobs_view)
+    
+    def refresh_jobs_view(self):
+        """Refresh the jobs list from the job manager"""
+        self.jobs_refresh_pending = False
+        selection = self.jobs_tree.selection()
+        for item in self.jobs_tree.get_children():
+            self.jobs_tree.delete(item)
+        
+        for job in self.job_manager.list_jobs():
+            item_id = str(job.job_id)
+            self.jobs_tree.insert("", "end", iid=item_id, text=item_id, 
+                                values=(job.name, job.state, job.message))
+        
+        existing = [item for item in selection if self.jobs_tree.exists(item)]
+        if existing:
+            self.jobs_tree.selection_set(existing)
+    
+    def get_selected_job_ids(self):
+        """Get the IDs of jobs selected in the jobs list"""
+        return [int(item) for item in self.jobs_tree.selection()]
+    
+    def pause_selected_job(self):
+        """Pause the selected jobs"""
+        for job_id in self.get_selected_job_ids():
+            self.job_manager.pause(job_id)
+        self.refresh_jobs_view()
+    
+    def resume_selected_job(self):
+        """Resume the selected jobs"""
+        for job_id in self.get_selected_job_ids():
+            self.job_manager.resume(job_id)
+        self.refresh_jobs_view()
+    
+    def cancel_selected_job(self):
+        """Cancel the selected jobs"""
+        for job_id in self.get_selected_job_ids():
+            self.job_manager.cancel(job_id)
+        self.refresh_jobs_view()
+    
+    def get_metrics_job(self):
+        """Get the selected job, or the most recently finished one, for metrics"""
+        for job_id in self.get_selected_job_ids():
+            job = self.job_manager.get_job(job_id)
+            if job and job.finder is not None:
+                return job
+        finished = [job for job in self.job_manager.list_jobs() 
+                    if job.is_finished() and job.finder is not None]
+        if finished:
+            return max(finished, key=lambda job: job.finished)
+        return None
+    
+    def show_job_metrics(self):
+        """Show the instrumentation summary of a job in a separate window"""
+        job = self.get_metrics_job()
+        if job is None:
+            messagebox.showinfo("No Metrics", "Run a scan first to collect metrics.")
+            return
+        
+        metrics_window = tk.Toplevel(self.parent)
+        metrics_window.title(f"Scan Metrics - Job {job.job_id} ({job.name})")
+        metrics_window.geometry("700x450")
+        
+        text_scroll = ttk.Scrollbar(metrics_window)
+        text_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        metrics_text = tk.Text(metrics_window, wrap=tk.NONE, font=("Courier", 9), 
+                             yscrollcommand=text_scroll.set)
+        metrics_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        text_scroll.config(command=metrics_text.yview)
+        
+        metrics_text.insert(tk.END, job.finder.instrumentation.format_summary())
+        metrics_text.config(state=tk.DISABLED)
+    
+    def save_job_metrics(self):
+        """Save the instrumentation summary of a job as JSON"""
+        job = self.get_metrics_job()
+        if job is None:
+            messagebox.showinfo("No Metrics", "Run a scan first to collect metrics.")
+            return
+        
+        path = filedialog.asksaveasfilename(title="Save Scan Metrics", defaultextension=".json",
+                                          initialfile=f"scan_metrics_job{job.job_id}.json",
+                                          filetypes=[("JSON files", "*.json")])
+        if path:
+            try:
+                job.finder.instrumentation.dump_json(path)
+                self.status_label.config(text=f"Saved metrics to {path}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to save metrics: {str(e)}")
     
     def find_duplicates_by_hash(self):
         """Find duplicates using content hash comparison"""
@@ -168,41 +465,145 @@ class DuplicateFinderTab:
             messagebox.showinfo("No Directories", "Please add at least one directory to scan.")
             return
         
-        self.clear_results_tree()
-        self.progress_bar["value"] = 0
+        self.start_scan_job("Hash-based duplicate scan", "find_duplicates_by_hash",
+                            list(self.scan_directories),
+                            display=lambda result, job: self.display_duplicate_results(
+                                result, verified=True, job=job))
+    
+    def watch_index_directories(self):
+        """Subscribe the live index to file system events of its directories"""
+        if self.tracker is None:
+            return
+        self.tracker.remove_handler(self.duplicate_index)
+        for path in self.duplicate_index.directories:
+            self.tracker.add_handler(self.duplicate_index, path)
+    
+    def build_live_index(self):
+        """Index the scan directories and keep the index current from then on"""
+        if not self.scan_directories:
+            messagebox.showinfo("No Directories", "Please add at least one directory to scan.")
+            return
         
-        def run_scan():
-            try:
-                self.update_scan_progress(0, "Starting hash-based duplicate scan...")
-                duplicates = self.duplicate_finder.find_duplicates_by_hash(
-                    self.scan_directories, self.update_scan_progress)
-                
-                self.parent.after(0, lambda: self.display_duplicate_results(duplicates))
-            except Exception as e:
-                self.parent.after(0, lambda: messagebox.showerror("Error", f"Scan failed: {str(e)}"))
+        directories = list(self.scan_directories)
+        
+        def on_indexed(records, job):
+            if records is None:
+                return
+            self.duplicate_index.replace(directories, records)
+            self.watch_index_directories()
+            self.duplicate_index.start()
+            self.show_live_index()
         
-        threading.Thread(target=run_scan, daemon=True).start()
+        self.start_scan_job("Build live duplicate index", "index_directories",
+                            directories, display=on_indexed)
     
-    def find_duplicates_by_name_size(self):
-        """Find duplicates using name and size comparison"""
+    def show_live_index(self):
+        """Display the current duplicate groups of the live index"""
+        if not self.duplicate_index.directories:
+            messagebox.showinfo("No Index", "Build the index for the scan folders first.")
+            return
+        self.display_duplicate_results(self.duplicate_index.get_duplicates(), verified=True)
+        self.showing_live_index = True
+        self.update_index_label()
+    
+    def update_index_label(self):
+        """Show the size of the live index"""
+        self.index_label.config(
+            text=f"{len(self.duplicate_index.files)} files indexed in "
+                 f"{len(self.duplicate_index.directories)} folders"
+                 f"{'' if self.tracker is not None else ' (not watched)'}")
+    
+    def on_index_changed(self):
+        """Refresh live results shortly after the index changes (UI thread)"""
+        self.update_index_label()
+        if self.showing_live_index and not self.index_refresh_pending:
+            self.index_refresh_pending = True
+            self.parent.after(1000, self.refresh_live_index)
+    
+    def refresh_live_index(self):
+        """Redisplay the live results if they are still shown"""
+        self.index_refresh_pending = False
+        if self.showing_live_index:
+            self.show_live_index()
+    
+    def close(self):
+        """Stop background work and save the live index"""
+        self.job_manager.cancel_all()
+        if self.tracker is not None:
+            self.tracker.remove_handler(self.duplicate_index)
+        self.duplicate_index.stop()
+    
+    def find_duplicates_quick(self):
+        """Find likely duplicates by fingerprinting sampled blocks of large files"""
         if not self.scan_directories:
             messagebox.showinfo("No Directories", "Please add at least one directory to scan.")
             return
         
-        self.clear_results_tree()
-        self.progress_bar["value"] = 0
+        def display(result, job):
+            probable = any(DuplicateFinder.is_probable_group(key) for key in result)
+            self.display_duplicate_results(result, verified=not probable, job=job)
         
-        def run_scan():
-            try:
-                self.update_scan_progress(0, "Starting name/size-based duplicate scan...")
-                duplicates = self.duplicate_finder.find_duplicates_by_name_size(
-                    self.scan_directories, self.update_scan_progress)
-                
-                self.parent.after(0, lambda: self.display_duplicate_results(duplicates))
-            except Exception as e:
-                self.parent.after(0, lambda: messagebox.showerror("Error", f"Scan failed: {str(e)}"))
+        self.start_scan_job("Quick sampled duplicate scan", "find_duplicates_quick",
+                            list(self.scan_directories), display=display)
+    
+    def ensure_verified(self, action):
+        """
+        Make sure no probable groups are displayed before acting on the results
+        
+        If the results contain probable groups, a verification job is started
+        that re-runs the action once the groups are confirmed.
         
-        threading.Thread(target=run_scan, daemon=True).start()
+        Args:
+            action: Method to run again after verification
+            
+        Returns:
+            True if the action can proceed now, False otherwise
+        """
+        probable = [key for key in self.current_duplicates 
+                    if DuplicateFinder.is_probable_group(key)]
+        if not probable:
+            return True
+        
+        confirm = messagebox.askyesno("Verify Duplicates", 
+                                   f"{len(probable)} groups are only probable duplicates "
+                                   "(matched on sampled blocks). Verify them by reading the "
+                                   "full files before continuing?")
+        if confirm:
+            def display(result, job):
+                self.display_duplicate_results(result, verified=True, job=job)
+                action()
+            
+            self.start_scan_job("Verify probable duplicates", "verify_probable_groups",
+                                dict(self.current_duplicates), display=display)
+        return False
+    
+    def resume_last_scan(self):
+        """Resume the last interrupted hash scan from its checkpoint"""
+        checkpoint = ScanCheckpoint.load(self.checkpoint_file)
+        if checkpoint is None:
+            messagebox.showinfo("Nothing to Resume", "There is no interrupted hash scan to resume.")
+            return
+        
+        # Show the directories of the resumed scan
+        for path in checkpoint.directories:
+            if path not in self.scan_directories:
+                self.scan_directories.append(path)
+                self.scan_listbox.insert(tk.END, path)
+        
+        self.start_scan_job("Resumed hash-based duplicate scan", "resume_last_scan",
+                            display=lambda result, job: self.display_duplicate_results(
+                                result, verified=True, job=job))
+    
+    def find_duplicates_by_name_size(self):
+        """Find duplicates using name and size comparison"""
+        if not self.scan_directories:
+            messagebox.showinfo("No Directories", "Please add at least one directory to scan.")
+            return
+        
+        self.start_scan_job("Name/size-based duplicate scan", "find_duplicates_by_name_size",
+                            list(self.scan_directories),
+                            display=lambda result, job: self.display_duplicate_results(
+                                result, job=job))
     
     def find_similar_files(self):
         """Find similar files using fuzzy matching"""
@@ -231,20 +632,11 @@ class DuplicateFinderTab:
                 if 0.1 <= threshold <= 1.0:
                     threshold_dialog.destroy()
                     
-                    self.clear_results_tree()
-                    self.progress_bar["value"] = 0
-                    
-                    def run_scan():
-                        try:
-                            self.update_scan_progress(0, f"Starting similarity scan (threshold: {threshold})...")
-                            similar_files = self.duplicate_finder.find_similar_files(
-                                self.scan_directories, threshold, self.update_scan_progress)
-                            
-                            self.parent.after(0, lambda: self.display_duplicate_results(similar_files))
-                        except Exception as e:
-                            self.parent.after(0, lambda: messagebox.showerror("Error", f"Scan failed: {str(e)}"))
-                    
-                    threading.Thread(target=run_scan, daemon=True).start()
+                    self.start_scan_job(f"Similarity scan (threshold: {threshold})", 
+                                        "find_similar_files",
+                                        list(self.scan_directories), threshold,
+                                        display=lambda result, job: self.display_duplicate_results(
+                                            result, job=job))
                 else:
                     messagebox.showerror("Invalid Input", "Threshold must be between 0.1 and 1.0")
             except ValueError:
@@ -257,36 +649,120 @@ class DuplicateFinderTab:
         ttk.Button(button_frame, text="Cancel", 
                  command=threshold_dialog.destroy).pack(side=tk.LEFT, padx=10)
     
+    def find_duplicate_directories(self):
+        """Find identical directory trees using directory hashes"""
+        if not self.scan_directories:
+            messagebox.showinfo("No Directories", "Please add at least one directory to scan.")
+            return
+        
+        self.start_scan_job("Duplicate folder scan", "find_duplicate_directories",
+                            list(self.scan_directories),
+                            display=self.display_duplicate_directories)
+    
     def scan_directory_stats(self):
         """Scan directories for file statistics"""
         if not self.scan_directories:
             messagebox.showinfo("No Directories", "Please add at least one directory to scan.")
             return
         
-        self.clear_results_tree()
-        self.progress_bar["value"] = 0
+        self.start_scan_job("Directory statistics", "scan_directories",
+                            list(self.scan_directories),
+                            display=self.display_directory_stats)
+    
+    def save_snapshot(self):
+        """Save a snapshot of the scan directories for later comparison"""
+        if not self.scan_directories:
+            messagebox.showinfo("No Directories", "Please add at least one directory to scan.")
+            return
         
-        def run_scan():
-            try:
-                self.update_scan_progress(0, "Scanning directories for statistics...")
-                stats = self.duplicate_finder.scan_directories(
-                    self.scan_directories, self.update_scan_progress)
-                
-                self.parent.after(0, lambda: self.display_directory_stats(stats))
-            except Exception as e:
-                self.parent.after(0, lambda: messagebox.showerror("Error", f"Scan failed: {str(e)}"))
+        path = filedialog.asksaveasfilename(title="Save Snapshot", defaultextension=".snap",
+                                          initialfile=f"snapshot_{datetime.datetime.now():%Y%m%d_%H%M%S}.snap",
+                                          filetypes=[("Snapshots", "*.snap")])
+        if not path:
+            return
+        digests = messagebox.askyesno("Content Digests", 
+                                    "Record content digests? This reads every file but lets "
+                                    "comparisons detect content changes and moves by content.")
+        
+        def on_snapshot(snapshot, job):
+            if snapshot is not None and snapshot.save(path):
+                self.status_label.config(
+                    text=f"Saved snapshot of {snapshot.file_count()} files to {path}")
+            else:
+                messagebox.showerror("Error", f"Failed to save snapshot to {path}")
+        
+        self.start_scan_job("Snapshot", "create_snapshot", list(self.scan_directories), 
+                            digests=digests, display=on_snapshot)
+    
+    def compare_with_snapshot(self):
+        """Compare the current state of a snapshot's directories with the snapshot"""
+        path = filedialog.askopenfilename(title="Open Snapshot", 
+                                        filetypes=[("Snapshots", "*.snap"), ("All files", "*.*")])
+        if not path:
+            return
+        old_snapshot = ScanSnapshot.load(path)
+        if old_snapshot is None:
+            messagebox.showerror("Error", f"Not a valid snapshot: {path}")
+            return
+        
+        def on_snapshot(snapshot, job):
+            if snapshot is not None:
+                self.display_snapshot_diff(diff_snapshots(old_snapshot, snapshot), old_snapshot, job)
         
-        threading.Thread(target=run_scan, daemon=True).start()
+        self.start_scan_job("Snapshot comparison", "create_snapshot", old_snapshot.directories,
+                            digests=old_snapshot.has_digests, display=on_snapshot)
+    
+    def apply_throttle(self):
+        """Apply the throttle settings, including to a scan in progress"""
+        try:
+            max_mb = float(self.max_mb_var.get() or 0)
+            max_files = float(self.max_files_var.get() or 0)
+            if max_mb < 0 or max_files < 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Invalid Input", "Throttle limits must be non-negative numbers")
+            return
+        
+        self.job_manager.set_limits(max_mb, max_files)
+        self.status_label.config(
+            text=f"Throttle set to {max_mb:g} MB/s, {max_files:g} files/s "
+                 "(priority change applies to the next scan)")
+    
+    def get_job_limits(self):
+        """Get resource limits for a new job from the throttle settings"""
+        try:
+            max_mb = max(0.0, float(self.max_mb_var.get() or 0))
+            max_files = max(0.0, float(self.max_files_var.get() or 0))
+        except ValueError:
+            max_mb = max_files = 0
+        return {
+            'max_mb_per_sec': max_mb,
+            'max_files_per_sec': max_files,
+            'low_io_priority': self.low_priority_var.get()
+        }
+    
+    @staticmethod
+    def get_throttle_summary(job):
+        """Describe the throttle's effect on a job, or an empty string"""
+        if job is None:
+            return ""
+        throttle_stats = job.throttle.get_stats()
+        waited = throttle_stats['byte_wait'] + throttle_stats['file_wait']
+        if waited <= 0:
+            return ""
+        return f" Throttled for {waited:.1f}s."
     
     def stop_current_scan(self):
-        """Stop the current scanning operation"""
-        if hasattr(self, 'duplicate_finder'):
-            self.duplicate_finder.stop_scan()
-            self.status_label.config(text="Scan stopped by user")
+        """Stop all running scans"""
+        self.job_manager.cancel_all()
+        self.refresh_jobs_view()
+        self.status_label.config(text="Scans stopped by user")
     
-    def display_duplicate_results(self, duplicates):
+    def display_duplicate_results(self, duplicates, verified=False, job=None):
         """Display duplicate/similar file results in the treeview"""
         self.clear_results_tree()
+        self.results_verified = verified
+        self.current_duplicates = dict(duplicates or {})
         
         if not duplicates:
             self.status_label.config(text="No duplicates or similar files found")
@@ -298,28 +774,37 @@ class DuplicateFinderTab:
         
         group_num = 1
         for group_id, file_list in duplicates.items():
-            # Calculate potential wasted space
-            if file_list:
-                try:
-                    file_size = os.path.getsize(file_list[0])
-                    wasted_space += file_size * (len(file_list) - 1)
-                except Exception:
-                    pass
-            
-            # Create group node
-            group_node = self.results_tree.insert("", "end", text=f"Group {group_num}", 
+            # Create group node; quick scan groups matched on samples are probable
+            if DuplicateFinder.is_probable_group(group_id):
+                group_text = f"Group {group_num} (probable)"
+            elif verified:
+                group_text = f"Group {group_num} (confirmed)"
+            else:
+                group_text = f"Group {group_num}"
+            group_node = self.results_tree.insert("", "end", text=group_text, 
                                               values=("", "", ""))
             
-            # Add files to group
+            # Add files to group; hardlinks to an inode already listed in the
+            # group are marked as links and do not count as wasted space
+            seen_inodes = set()
             for file_path in file_list:
                 try:
-                    size = os.path.getsize(file_path)
+                    stat_info = os.stat(file_path)
+                    size = stat_info.st_size
                     modified = datetime.datetime.fromtimestamp(
-                        os.path.getmtime(file_path)).strftime('%Y-%m-%d %H:%M:%S')
+                        stat_info.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
                     
                     size_str = format_file_size(size)
                     
-                    self.results_tree.insert(group_node, "end", text="", 
+                    inode_key = (stat_info.st_dev, stat_info.st_ino)
+                    is_alias = bool(stat_info.st_ino) and inode_key in seen_inodes
+                    if not is_alias:
+                        # Calculate potential wasted space
+                        if seen_inodes:
+                            wasted_space += size
+                        seen_inodes.add(inode_key if stat_info.st_ino else file_path)
+                    
+                    self.results_tree.insert(group_node, "end", text="Link" if is_alias else "", 
                                           values=(file_path, size_str, modified))
                 except Exception as e:
                     self.results_tree.insert(group_node, "end", text="", 
@@ -334,12 +819,102 @@ class DuplicateFinderTab:
         # Update status
         wasted_space_str = format_file_size(wasted_space)
         self.status_label.config(
-            text=f"Found {total_groups} groups ({total_files} files). Potential wasted space: {wasted_space_str}")
+            text=f"Found {total_groups} groups ({total_files} files). "
+                 f"Potential wasted space: {wasted_space_str}.{self.get_throttle_summary(job)}")
+        self.progress_bar["value"] = 100
+    
+    def display_duplicate_directories(self, duplicates, job=None):
+        """Display groups of identical directory trees in the treeview"""
+        self.clear_results_tree()
+        self.results_verified = False  # Linking works on files only
+        
+        if not duplicates:
+            self.status_label.config(text="No duplicated folders found")
+            return
+        
+        wasted_space = 0
+        total_dirs = 0
+        
+        group_num = 1
+        for group in duplicates.values():
+            group_node = self.results_tree.insert("", "end", text=f"Group {group_num} (folder)", 
+                                              values=("", f"{group['files']} files", ""))
+            
+            size_str = format_file_size(group['size'])
+            for dirpath in group['paths']:
+                try:
+                    modified = datetime.datetime.fromtimestamp(
+                        os.path.getmtime(dirpath)).strftime('%Y-%m-%d %H:%M:%S')
+                except Exception as e:
+                    modified = str(e)
+                self.results_tree.insert(group_node, "end", text="", 
+                                      values=(dirpath, size_str, modified))
+            
+            wasted_space += group['size'] * (len(group['paths']) - 1)
+            total_dirs += len(group['paths'])
+            group_num += 1
+        
+        # Expand all groups for better visibility
+        for item in self.results_tree.get_children():
+            self.results_tree.item(item, open=True)
+        
+        self.status_label.config(
+            text=f"Found {len(duplicates)} groups of identical folders ({total_dirs} folders). "
+                 f"Potential wasted space: {format_file_size(wasted_space)}."
+                 f"{self.get_throttle_summary(job)}")
         self.progress_bar["value"] = 100
     
-    def display_directory_stats(self, stats):
+    def display_snapshot_diff(self, diff, old_snapshot, job=None):
+        """Display the changes since a snapshot in the treeview"""
+        self.clear_results_tree()
+        self.results_verified = False
+        
+        def add_file_row(parent, file_path, note=""):
+            try:
+                stat_info = os.stat(file_path)
+                size_str = format_file_size(stat_info.st_size)
+                modified = note or datetime.datetime.fromtimestamp(
+                    stat_info.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+            except OSError:
+                size_str, modified = "", note
+            self.results_tree.insert(parent, "end", text="", values=(file_path, size_str, modified))
+        
+        for title, key in (("Added", 'added'), ("Removed", 'removed'), ("Modified", 'modified')):
+            if diff[key]:
+                node = self.results_tree.insert("", "end", text=f"{title} ({len(diff[key])})", 
+                                             values=("", "", ""))
+                for file_path in diff[key]:
+                    add_file_row(node, file_path)
+        
+        if diff['moved']:
+            node = self.results_tree.insert("", "end", text=f"Moved ({len(diff['moved'])})", 
+                                         values=("", "", ""))
+            for old_path, new_path in diff['moved']:
+                add_file_row(node, new_path, f"from {old_path}")
+        
+        for item in self.results_tree.get_children():
+            self.results_tree.item(item, open=True)
+        
+        snapshot_time = datetime.datetime.fromtimestamp(old_snapshot.created).strftime('%Y-%m-%d %H:%M')
+        self.status_label.config(
+            text=f"Since snapshot of {snapshot_time}: {len(diff['added'])} added, "
+                 f"{len(diff['removed'])} removed, {len(diff['modified'])} modified, "
+                 f"{len(diff['moved'])} moved ({diff['skipped_dirs']} unchanged folders skipped)."
+                 f"{self.get_throttle_summary(job)}")
+        self.progress_bar["value"] = 100
+    
+    def delete_path(self, path):
+        """Delete a file, or a whole directory for folder results"""
+        # The kept file list would still contain the deleted files
+        self.forget_file_list()
+        if os.path.isdir(path) and not os.path.islink(path):
+            return safe_delete_directory(path)
+        return safe_delete_file(path)
+    
+    def display_directory_stats(self, stats, job=None):
         """Display directory statistics in the treeview"""
         self.clear_results_tree()
+        self.results_verified = False
         
         # Add summary node
         summary_node = self.results_tree.insert("", "end", text="Summary", 
@@ -377,13 +952,26 @@ class DuplicateFinderTab:
                 self.results_tree.insert(largest_node, "end", text="", 
                                       values=(filepath, size_str, modified))
         
+        # Add throttle node
+        throttle_stats = stats.get('throttle')
+        if throttle_stats:
+            throttle_node = self.results_tree.insert("", "end", text="Throttle", 
+                                                  values=("", "", ""))
+            
+            self.results_tree.insert(throttle_node, "end", text="", 
+                                  values=(f"Limits: {throttle_stats['max_mb_per_sec']:g} MB/s, "
+                                          f"{throttle_stats['max_files_per_sec']:g} files/s", 
+                                          f"Rate: {throttle_stats['files_per_sec']:.0f} files/s", 
+                                          f"Waited: {throttle_stats['file_wait']:.1f}s"))
+        
         # Expand all nodes
         for item in self.results_tree.get_children():
             self.results_tree.item(item, open=True)
         
         # Update status
         self.status_label.config(
-            text=f"Scanned {stats['total_files']} files, total size: {total_size_str}")
+            text=f"Scanned {stats['total_files']} files, total size: {total_size_str}."
+                 f"{self.get_throttle_summary(job)}")
         self.progress_bar["value"] = 100
     
     def open_selected_file(self):
@@ -394,7 +982,7 @@ class DuplicateFinderTab:
             values = self.results_tree.item(item, "values")
             
             # Check if this is a file entry (not a group)
-            if values and values[0] and not values[0].startswith("Total") and not values[0].startswith("Extension"):
+            if values and values[0] and not values[0].startswith("Total") and not values[0].startswith("Extension") and not values[0].startswith("Limits"):
                 file_path = values[0]
                 try:
                     if open_file_location(file_path):
@@ -412,13 +1000,16 @@ class DuplicateFinderTab:
             values = self.results_tree.item(item, "values")
             
             # Check if this is a file entry (not a group)
-            if values and values[0] and not values[0].startswith("Total") and not values[0].startswith("Extension"):
+            if values and values[0] and not values[0].startswith("Total") and not values[0].startswith("Extension") and not values[0].startswith("Limits"):
                 file_path = values[0]
                 
-                confirm = messagebox.askyesno("Confirm Delete", 
-                                           f"Are you sure you want to delete:\n{file_path}?")
+                if os.path.isdir(file_path):
+                    prompt = f"Are you sure you want to delete this folder and everything in it:\n{file_path}?"
+                else:
+                    prompt = f"Are you sure you want to delete:\n{file_path}?"
+                confirm = messagebox.askyesno("Confirm Delete", prompt)
                 if confirm:
-                    if safe_delete_file(file_path):
+                    if self.delete_path(file_path):
                         self.status_label.config(text=f"Deleted: {file_path}")
                         self.results_tree.delete(item)
                     else:
@@ -431,6 +1022,9 @@ class DuplicateFinderTab:
         if not groups:
             return
         
+        if not self.ensure_verified(self.keep_newest_duplicates):
+            return
+        
         # Confirm action
         confirm = messagebox.askyesno("Confirm Action", 
                                    "This will keep only the newest file in each group and delete all others. Continue?")
@@ -472,7 +1066,7 @@ class DuplicateFinderTab:
                     if item != newest_item:
                         values = self.results_tree.item(item, "values")
                         file_path = values[0]
-                        if safe_delete_file(file_path):
+                        if self.delete_path(file_path):
                             self.results_tree.delete(item)
                             total_deleted += 1
                         else:
@@ -487,6 +1081,9 @@ class DuplicateFinderTab:
         if not groups:
             return
         
+        if not self.ensure_verified(self.keep_oldest_duplicates):
+            return
+        
         # Confirm action
         confirm = messagebox.askyesno("Confirm Action", 
                                    "This will keep only the oldest file in each group and delete all others. Continue?")
@@ -528,10 +1125,94 @@ class DuplicateFinderTab:
                     if item != oldest_item:
                         values = self.results_tree.item(item, "values")
                         file_path = values[0]
-                        if safe_delete_file(file_path):
+                        if self.delete_path(file_path):
                             self.results_tree.delete(item)
                             total_deleted += 1
                         else:
                             total_failed += 1
         
         self.status_label.config(text=f"Deleted {total_deleted} files, {total_failed} failed")
+
+    
+    def link_duplicates(self):
+        """Replace duplicates with hardlinks/reflinks to the oldest file in each group"""
+        # Get all groups
+        groups = self.results_tree.get_children()
+        if not groups:
+            return
+        
+        if not self.ensure_verified(self.link_duplicates):
+            return
+        
+        # Linking only makes sense for files with identical content
+        if not self.results_verified:
+            messagebox.showinfo("Not Available", 
+                              "Linking requires content-verified results. Please run "
+                              "\"Find Duplicates by Hash\" first.")
+            return
+        
+        # Confirm action
+        confirm = messagebox.askyesno("Confirm Action", 
+                                   "This will replace every file in each group with a link to "
+                                   "the oldest copy (reflink where supported, hardlink otherwise). "
+                                   "Continue?")
+        if not confirm:
+            return
+        
+        total_linked = 0
+        total_shared = 0
+        total_failed = 0
+        reclaimed_space = 0
+        
+        for group_id in groups:
+            # Skip non-duplicate groups (Summary, Extensions, etc.)
+            group_text = self.results_tree.item(group_id, "text")
+            if not group_text.startswith("Group"):
+                continue
+            
+            # Get all files in the group
+            files = self.results_tree.get_children(group_id)
+            if len(files) <= 1:
+                continue
+            
+            # Find oldest file to act as the link source
+            oldest_path = None
+            oldest_time = datetime.datetime.max
+            
+            for item in files:
+                file_path = self.results_tree.item(item, "values")[0]
+                try:
+                    mod_time = datetime.datetime.fromtimestamp(os.path.getmtime(file_path))
+                    if mod_time < oldest_time:
+                        oldest_time = mod_time
+                        oldest_path = file_path
+                except Exception:
+                    continue
+            
+            if not oldest_path:
+                continue
+            
+            # Replace all other copies with links to the oldest one
+            for item in files:
+                file_path = self.results_tree.item(item, "values")[0]
+                if file_path == oldest_path:
+                    continue
+                try:
+                    file_size = os.path.getsize(file_path)
+                except Exception:
+                    file_size = 0
+                
+                result = safe_link_duplicate(oldest_path, file_path)
+                if result and result != 'shared':
+                    self.forget_file_list()  # Inodes in the kept file list changed
+                if result == 'shared':
+                    total_shared += 1
+                elif result:
+                    total_linked += 1
+                    reclaimed_space += file_size
+                else:
+                    total_failed += 1
+        
+        self.status_label.config(
+            text=f"Linked {total_linked} files ({format_file_size(reclaimed_space)} reclaimed), "
+                 f"{total_shared} already linked, {total_failed} skipped (changed since the scan or not linkable)")
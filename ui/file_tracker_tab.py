@@ -5,6 +5,15 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from tkcalendar import Calendar
 
+from core.history_query import HistoryQuery
+from ui.virtual_list import VirtualListbox
+from utils.file_utils import format_file_size
+
+# Sort choices of the file list
+SORT_PATH = "Path"
+SORT_SIZE = "Size (largest first)"
+SORT_TIME = "Time (newest first)"
+
 class FileTrackerTab:
     """UI component for the file tracker tab"""
     
@@ -15,10 +24,24 @@ class FileTrackerTab:
         self.watch_paths = watch_paths
         self.path_vars = {}  # Dictionary to store checkbox variables
         self.is_processing = False
+        self.query = HistoryQuery(tracker)
+        self.subscription = None   # (subscription id, query key) shown in the listbox
+        self.all_files = []        # Paths of the subscribed query
+        self.lower_paths = {}      # Path -> lowercase path, the filter's index
+        self.sorted_files = None   # all_files in the selected order, None when stale
+        self.filter_state = None   # (filter text, matching paths in order)
+        self.shown_files = []      # Paths in the file list, in row order
+        self.stat_cache = {}       # Path -> (size, mtime) for sorting by size or time
+        self.stat_thread = None
+        self.view_update_pending = False
+        self.filter_after_id = None
         
         # Create UI elements
         self.create_widgets()
         self.update_paths_listbox()
+        
+        # Show changes found by the tracker's startup catch-up
+        self.tracker.on_reconciled = lambda count: self.parent.after(0, self.on_reconciled, count)
     
     def create_widgets(self):
         """Create UI widgets for the file tracker tab"""
@@ -83,19 +106,43 @@ class FileTrackerTab:
         self.date_label = ttk.Label(cal_frame, text="Selected Date: None")
         self.date_label.pack(pady=2)
         
+        # Search across all dates
+        search_frame = ttk.LabelFrame(main_frame, text="Search History")
+        search_frame.pack(fill=tk.X, pady=5)
+        
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
+        search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5, pady=5)
+        search_entry.bind('<Return>', lambda e: self.search_history())
+        ttk.Button(search_frame, text="Search", command=self.search_history).pack(side=tk.LEFT, padx=5)
+        ttk.Label(search_frame, text="Text or glob, e.g. invoice_2024 or *.pdf").pack(side=tk.LEFT, padx=5)
+        
         # Files Frame
         files_frame = ttk.LabelFrame(main_frame, text="Files for Selected Date")
         files_frame.pack(fill=tk.BOTH, expand=True, pady=5)
         
-        files_scroll = ttk.Scrollbar(files_frame)
-        files_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        filter_frame = ttk.Frame(files_frame)
+        filter_frame.pack(fill=tk.X, padx=5, pady=(5, 0))
+        
+        ttk.Label(filter_frame, text="Filter:").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add('write', lambda *args: self.on_filter_changed())
+        ttk.Entry(filter_frame, textvariable=self.filter_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         
-        self.files_listbox = tk.Listbox(files_frame, yscrollcommand=files_scroll.set)
-        self.files_listbox.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        files_scroll.config(command=self.files_listbox.yview)
-        self.files_listbox.bind('<Double-Button-1>', self.open_file_location)
+        ttk.Label(filter_frame, text="Sort by:").pack(side=tk.LEFT)
+        self.sort_var = tk.StringVar(value=SORT_PATH)
+        sort_box = ttk.Combobox(filter_frame, textvariable=self.sort_var, state='readonly', width=18,
+                                values=[SORT_PATH, SORT_SIZE, SORT_TIME])
+        sort_box.pack(side=tk.LEFT, padx=5)
+        sort_box.bind('<<ComboboxSelected>>', lambda e: self.on_sort_changed())
+        
+        # Only the visible rows are rendered, so busy days do not freeze the UI
+        self.files_view = VirtualListbox(files_frame, format_item=self.format_file_row)
+        self.files_view.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.files_view.listbox.bind('<Double-Button-1>', self.open_file_location)
 
-        ttk.Button(main_frame, text="Refresh Files", command=self.refresh_files).pack(pady=5)
+        ttk.Button(main_frame, text="Refresh Files", 
+                 command=lambda: self.refresh_files(force=True)).pack(pady=5)
     
     def get_watch_paths(self):
         """Get the current watch paths"""
@@ -177,9 +224,7 @@ class FileTrackerTab:
                 threading.Thread(target=scan_path).start()
                 
                 # Restart the tracker with the new path
-                self.tracker.stop()
-                self.tracker.watch_paths = self.watch_paths
-                self.tracker.start()
+                self.tracker.set_watch_paths(self.watch_paths)
             else:
                 self.status_label.config(text="This folder is already being monitored")
     
@@ -203,9 +248,7 @@ class FileTrackerTab:
             threading.Thread(target=clean_path).start()
             
             # Restart the tracker without the removed path
-            self.tracker.stop()
-            self.tracker.watch_paths = self.watch_paths
-            self.tracker.start()
+            self.tracker.set_watch_paths(self.watch_paths)
     
     def start_processing(self, message="Processing..."):
         """Show processing indicator"""
@@ -221,6 +264,17 @@ class FileTrackerTab:
         self.progress_bar.stop()
         self.parent.update()
     
+    def on_history_loaded(self):
+        """Show the selected date once the history has loaded in the background"""
+        self.stop_processing("Ready")
+        self.refresh_files(force=True)
+    
+    def on_reconciled(self, count):
+        """Handle the end of the tracker's startup catch-up"""
+        if count:
+            self.status_label.config(text=f"Caught up on {count} files changed while the tracker was closed")
+            self.refresh_files()
+    
     def on_date_select(self, event=None):
         """Handle date selection event"""
         selected_date = self.cal.get_date()
@@ -244,42 +298,237 @@ class FileTrackerTab:
         
         threading.Thread(target=scan_folders).start()
     
-    def refresh_files(self):
-        """Refresh the files listbox"""
+    def refresh_files(self, force=False):
+        """
+        Show the files of the selected date and folders
+        
+        The file list subscribes to the query, so later history changes arrive
+        as deltas and only update the in-memory list.
+        
+        Args:
+            force: Fetch the result again even if the query is unchanged
+        """
         try:
-            if self.is_processing:
-                self.parent.after(100, self.refresh_files)
-                return
-
             selected_date = self.cal.get_date()
             date_obj = datetime.datetime.strptime(selected_date, '%m/%d/%y')
             date_str = date_obj.strftime('%Y-%m-%d')
             
             selected_paths = self.get_selected_paths()
+            key = HistoryQuery.make_key(date_str, selected_paths)
+            if self.subscription is not None:
+                if self.subscription[1] == key and not force:
+                    return
+                self.query.unsubscribe(self.subscription[0])
             
-            self.files_listbox.delete(0, tk.END)
-            files = self.tracker.get_files_for_date(date_str, selected_paths)
+            def on_change(added, removed, key=key):
+                self.parent.after(0, self.apply_files_delta, key, added, removed)
             
-            if files:
-                for file in files:
-                    self.files_listbox.insert(tk.END, file)
-                self.status_label.config(
-                    text=f"Found {len(files)} files for {selected_date} in {len(selected_paths)} selected folders")
-            else:
-                self.files_listbox.insert(tk.END, "No files found for this date in selected folders")
-                self.status_label.config(
-                    text=f"No files found for {selected_date} in {len(selected_paths)} selected folders")
+            subscription_id, files = self.query.subscribe(date_str, selected_paths, on_change)
+            self.subscription = (subscription_id, key)
+            self.set_files(files)
             
         except Exception as e:
-            self.files_listbox.delete(0, tk.END)
-            self.files_listbox.insert(tk.END, f"Error processing date: {str(e)}")
+            self.subscription = None
+            self.set_files([], f"Error processing date: {str(e)}")
             self.status_label.config(text="Error processing date")
     
+    def set_files(self, files, placeholder=None):
+        """Replace the files of the list and rebuild the filter index"""
+        self.all_files = list(files)
+        self.lower_paths = {f: f.lower() for f in self.all_files}
+        self.stat_cache = {f: self.stat_cache[f] for f in self.all_files if f in self.stat_cache}
+        self.sorted_files = None
+        self.update_view(placeholder)
+    
+    def apply_files_delta(self, key, added, removed):
+        """Apply a pushed history change to the file list (UI thread)"""
+        if self.subscription is None or self.subscription[1] != key:
+            return  # The query changed since the push was queued
+        if added is None:
+            self.refresh_files(force=True)
+            return
+        
+        added = [f for f in added if f not in self.lower_paths]
+        if removed:
+            removed_set = set(removed)
+            self.all_files = [f for f in self.all_files if f not in removed_set]
+            for f in removed:
+                self.lower_paths.pop(f, None)
+        self.all_files.extend(added)
+        self.lower_paths.update((f, f.lower()) for f in added)
+        
+        # Event bursts arrive one delta at a time; sort and filter once for all of them
+        self.sorted_files = None
+        if not self.view_update_pending:
+            self.view_update_pending = True
+            self.parent.after(200, self.update_view)
+    
+    def on_filter_changed(self):
+        """Update the file list shortly after typing in the filter box"""
+        if self.filter_after_id is not None:
+            self.parent.after_cancel(self.filter_after_id)
+        self.filter_after_id = self.parent.after(100, self.update_view)
+    
+    def on_sort_changed(self):
+        """Sort the file list by the selected key"""
+        self.sorted_files = None
+        self.update_view()
+    
+    def sort_files(self, files):
+        """Sort paths by the selected key, loading sizes and times in the background"""
+        sort_by = self.sort_var.get()
+        if sort_by == SORT_PATH:
+            return sorted(files)
+        self.load_file_stats(files)
+        column = 0 if sort_by == SORT_SIZE else 1
+        unknown = (-1, -1)
+        return sorted(files, key=lambda f: self.stat_cache.get(f, unknown)[column], reverse=True)
+    
+    def load_file_stats(self, files):
+        """Stat files missing from the cache in a background thread"""
+        missing = [f for f in files if f not in self.stat_cache]
+        if not missing or self.stat_thread is not None:
+            return
+        
+        def stat_files():
+            stats = {}
+            for path in missing:
+                try:
+                    stat_info = os.stat(path)
+                    stats[path] = (stat_info.st_size, stat_info.st_mtime)
+                except OSError:
+                    stats[path] = (-1, -1)  # Deleted since it was recorded
+            self.parent.after(0, self.on_file_stats, stats)
+        
+        self.status_label.config(text=f"Reading sizes and times of {len(missing)} files...")
+        self.stat_thread = threading.Thread(target=stat_files, daemon=True)
+        self.stat_thread.start()
+    
+    def on_file_stats(self, stats):
+        """Sort again once sizes and times have been read (UI thread)"""
+        self.stat_thread = None
+        self.stat_cache.update(stats)
+        if self.sort_var.get() != SORT_PATH:
+            self.sorted_files = None
+            self.update_view()
+    
+    def format_file_row(self, path):
+        """Get the row text of a path, led by the sort column"""
+        sort_by = self.sort_var.get()
+        info = self.stat_cache.get(path)
+        if sort_by == SORT_PATH or info is None:
+            return path
+        if info[0] < 0:
+            return f"{'(missing)':>19}  {path}"
+        if sort_by == SORT_SIZE:
+            return f"{format_file_size(info[0]):>10}  {path}"
+        modified = datetime.datetime.fromtimestamp(info[1]).strftime('%Y-%m-%d %H:%M:%S')
+        return f"{modified}  {path}"
+    
+    def update_view(self, placeholder=None):
+        """
+        Show the files matching the filter in the selected order
+        
+        A filter that extends the previous one (more characters typed) only
+        narrows the previous matches instead of going through all files.
+        """
+        self.view_update_pending = False
+        self.filter_after_id = None
+        
+        text = self.filter_var.get().strip().lower()
+        if self.sorted_files is None:
+            self.sorted_files = self.sort_files(self.all_files)
+            self.filter_state = None
+        
+        if self.filter_state is not None and self.filter_state[0] in text:
+            base_text, base_files = self.filter_state
+        else:
+            base_text, base_files = "", self.sorted_files
+        if text == base_text:
+            matches = base_files
+        else:
+            lower_paths = self.lower_paths
+            matches = [f for f in base_files if text in lower_paths[f]]
+        self.filter_state = (text, matches)
+        self.shown_files = matches
+        
+        selected_date = self.cal.get_date()
+        selected_paths = self.get_selected_paths()
+        if placeholder is None:
+            if not self.all_files:
+                placeholder = "No files found for this date in selected folders"
+            else:
+                placeholder = "No files match the filter"
+        self.files_view.set_items(matches, placeholder)
+        
+        if self.stat_thread is not None:
+            return  # Keep the progress message until sizes and times are read
+        if self.all_files:
+            status = f"Found {len(self.all_files)} files for {selected_date} in {len(selected_paths)} selected folders"
+            if text:
+                status += f", {len(matches)} match the filter"
+            self.status_label.config(text=status)
+        else:
+            self.status_label.config(
+                text=f"No files found for {selected_date} in {len(selected_paths)} selected folders")
+    
+    def search_history(self):
+        """Find paths matching the search text on any date, in the background"""
+        query = self.search_var.get().strip()
+        if not query:
+            return
+        
+        def search():
+            self.parent.after(0, self.start_processing, f"Searching history for {query}...")
+            results = self.tracker.search_paths(query)
+            self.parent.after(0, self.stop_processing, f"Found {len(results)} files matching {query}")
+            self.parent.after(0, self.show_search_results, query, results)
+        
+        threading.Thread(target=search, daemon=True).start()
+    
+    def show_search_results(self, query, results):
+        """Show search results; double-clicking one shows its most recent date"""
+        results_window = tk.Toplevel(self.parent)
+        results_window.title(f"Search History - {query}")
+        results_window.geometry("800x400")
+        
+        tree_scroll = ttk.Scrollbar(results_window)
+        tree_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        results_tree = ttk.Treeview(results_window, columns=("last", "count", "dates"),
+                                    yscrollcommand=tree_scroll.set)
+        results_tree.heading("#0", text="Path")
+        results_tree.heading("last", text="Last Changed")
+        results_tree.heading("count", text="Days")
+        results_tree.heading("dates", text="Dates")
+        results_tree.column("#0", width=400)
+        results_tree.column("last", width=90)
+        results_tree.column("count", width=50)
+        results_tree.column("dates", width=250)
+        results_tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        tree_scroll.config(command=results_tree.yview)
+        
+        for path, dates in results:
+            results_tree.insert("", tk.END, text=path,
+                                values=(dates[-1], len(dates), ", ".join(reversed(dates))))
+        
+        def show_date(event=None):
+            selection = results_tree.selection()
+            if not selection:
+                return
+            item = results_tree.item(selection[0])
+            date_obj = datetime.datetime.strptime(item['values'][0], '%Y-%m-%d')
+            self.cal.selection_set(date_obj)
+            self.date_label.config(text=f"Selected Date: {self.cal.get_date()}")
+            self.filter_var.set(os.path.basename(item['text']))
+            self.refresh_files()
+        
+        results_tree.bind('<Double-Button-1>', show_date)
+    
     def open_file_location(self, event=None):
         """Open the location of the selected file"""
-        selection = self.files_listbox.curselection()
-        if selection:
-            file_path = self.files_listbox.get(selection[0])
+        file_path = self.files_view.get_selected()
+        if file_path:
             try:
                 # Get the directory path
                 dir_path = os.path.dirname(file_path)
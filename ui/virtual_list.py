@@ -0,0 +1,132 @@
+import tkinter as tk
+import tkinter.font as tkfont
+from tkinter import ttk
+
+class VirtualListbox(ttk.Frame):
+    """Listbox that only renders the rows currently visible
+
+    The items stay in a Python list; the inner tk.Listbox holds just one
+    screenful of rows, which is refilled when scrolling. Setting a list of a
+    million items therefore costs the same as setting one of fifty.
+    """
+    def __init__(self, parent, format_item=str, **kwargs):
+        """
+        Args:
+            parent: Parent widget
+            format_item: Function turning an item into its row text
+        """
+        super().__init__(parent, **kwargs)
+        self.format_item = format_item
+        self.items = []
+        self.placeholder = ""
+        self.top = 0           # Index of the first rendered item
+        self.selected = None   # Index of the selected item
+        self.row_height = None
+
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox = tk.Listbox(self, activestyle='none', exportselection=False)
+        self.listbox.pack(fill=tk.BOTH, expand=True)
+
+        self.listbox.bind('<Configure>', lambda e: self.render())
+        self.listbox.bind('<<ListboxSelect>>', self.on_select)
+        self.listbox.bind('<MouseWheel>', lambda e: self.scroll(-1 if e.delta > 0 else 1, 'units', 3))
+        self.listbox.bind('<Button-4>', lambda e: self.scroll(-1, 'units', 3))
+        self.listbox.bind('<Button-5>', lambda e: self.scroll(1, 'units', 3))
+        self.listbox.bind('<Up>', lambda e: self.move_selection(-1))
+        self.listbox.bind('<Down>', lambda e: self.move_selection(1))
+        self.listbox.bind('<Prior>', lambda e: self.move_selection(-self.visible_rows()))
+        self.listbox.bind('<Next>', lambda e: self.move_selection(self.visible_rows()))
+        self.listbox.bind('<Home>', lambda e: self.move_selection(-len(self.items)))
+        self.listbox.bind('<End>', lambda e: self.move_selection(len(self.items)))
+
+    def set_items(self, items, placeholder=""):
+        """
+        Show a new list of items, keeping the scroll position where possible
+
+        Args:
+            items: List of items; kept by reference until the next call
+            placeholder: Text shown while the list is empty
+        """
+        selected_item = self.get_selected()
+        self.items = items
+        self.placeholder = placeholder
+        self.selected = None
+        if selected_item is not None:
+            # Cheap when the selection is near the top, which is the common case
+            try:
+                self.selected = items.index(selected_item)
+            except ValueError:
+                pass
+        self.top = max(0, min(self.top, len(items) - self.visible_rows()))
+        self.render()
+
+    def visible_rows(self):
+        """Get the number of rows that fit in the listbox"""
+        if self.row_height is None:
+            font = tkfont.Font(font=self.listbox.cget('font'))
+            self.row_height = font.metrics('linespace') + 1
+        return max(1, self.listbox.winfo_height() // self.row_height)
+
+    def render(self):
+        """Fill the listbox with the visible slice of the items"""
+        rows = self.visible_rows()
+        self.listbox.delete(0, tk.END)
+        if not self.items:
+            if self.placeholder:
+                self.listbox.insert(tk.END, self.placeholder)
+            self.scrollbar.set(0.0, 1.0)
+            return
+
+        visible = self.items[self.top:self.top + rows]
+        self.listbox.insert(tk.END, *[self.format_item(item) for item in visible])
+        if self.selected is not None and self.top <= self.selected < self.top + rows:
+            self.listbox.selection_set(self.selected - self.top)
+        total = len(self.items)
+        self.scrollbar.set(self.top / total, min(1.0, (self.top + rows) / total))
+
+    def yview(self, *args):
+        """Scrollbar command: 'moveto fraction' or 'scroll n units|pages'"""
+        if args[0] == 'moveto':
+            self.scroll_to(int(float(args[1]) * len(self.items)))
+        elif args[0] == 'scroll':
+            self.scroll(int(args[1]), args[2])
+
+    def scroll(self, amount, what='units', step=1):
+        """Scroll by rows ('units') or screenfuls ('pages')"""
+        rows = self.visible_rows() if what == 'pages' else step
+        self.scroll_to(self.top + amount * rows)
+        return "break"  # Keep the inner listbox from scrolling itself
+
+    def scroll_to(self, top):
+        """Make an item the first visible row"""
+        top = max(0, min(top, len(self.items) - self.visible_rows()))
+        if top != self.top:
+            self.top = top
+            self.render()
+
+    def on_select(self, event=None):
+        """Remember which item the clicked row shows"""
+        selection = self.listbox.curselection()
+        if selection and self.items:
+            self.selected = self.top + selection[0]
+
+    def move_selection(self, amount):
+        """Move the selection by some rows, scrolling to keep it visible"""
+        if not self.items:
+            return "break"
+        current = self.selected if self.selected is not None else self.top - 1
+        self.selected = max(0, min(len(self.items) - 1, current + amount))
+        rows = self.visible_rows()
+        if self.selected < self.top:
+            self.top = self.selected
+        elif self.selected >= self.top + rows:
+            self.top = self.selected - rows + 1
+        self.render()
+        return "break"
+
+    def get_selected(self):
+        """Get the selected item, or None"""
+        if self.selected is None or self.selected >= len(self.items):
+            return None
+        return self.items[self.selected]
@@ -1,6 +1,27 @@
 import os
+import sys
+import errno
 import shutil
 import datetime
+import threading
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows has no fcntl, so reflinks are unavailable there
+    fcntl = None
+
+try:
+    import ctypes
+except ImportError:
+    ctypes = None
+
+# ioctl request number for cloning a whole file (Linux: btrfs, XFS, bcachefs...)
+FICLONE = 0x40049409
+
+# renameat2() arguments (Linux): paths relative to the working directory, fail if the target exists
+AT_FDCWD = -100
+RENAME_NOREPLACE = 1
 
 def format_file_size(size_bytes):
     """Format file size in human-readable format"""
@@ -44,6 +65,17 @@ def safe_delete_file(filepath):
         print(f"Error deleting file {filepath}: {e}")
         return False
 
+def safe_delete_directory(dirpath):
+    """Safely delete a directory and everything in it"""
+    try:
+        if os.path.isdir(dirpath) and not os.path.islink(dirpath):
+            shutil.rmtree(dirpath)
+            return True
+        return False
+    except Exception as e:
+        print(f"Error deleting directory {dirpath}: {e}")
+        return False
+
 def safe_move_file(source, destination_dir):
     """Safely move a file to a destination directory"""
     try:
@@ -102,6 +134,415 @@ def safe_copy_file(source, destination_dir):
         print(f"Error copying file {source}: {e}")
         return False
 
+class DirectoryNameReserver:
+    """Hand out conflict-free file names in a directory from one cached listing
+
+    The directory is listed once; names handed out are added to the cached
+    set, so many files can be placed in it without checking the disk for
+    every '_1', '_2', ... candidate. Safe to use from several threads.
+    """
+    def __init__(self, directory):
+        """
+        Args:
+            directory: Destination directory (created if missing)
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.names = {os.path.normcase(name) for name in os.listdir(directory)}
+        self.next_counter = {}  # Requested name -> next counter to try
+        self.lock = threading.Lock()
+
+    def reserve(self, filename):
+        """Get a name not used in the directory yet, adding _1, _2, ... on conflicts"""
+        with self.lock:
+            if os.path.normcase(filename) not in self.names:
+                self.names.add(os.path.normcase(filename))
+                return filename
+            name, ext = os.path.splitext(filename)
+            counter = self.next_counter.get(filename, 1)
+            while os.path.normcase(f"{name}_{counter}{ext}") in self.names:
+                counter += 1
+            self.next_counter[filename] = counter + 1
+            new_name = f"{name}_{counter}{ext}"
+            self.names.add(os.path.normcase(new_name))
+            return new_name
+
+    def release(self, filename):
+        """Give back a reserved name that ended up unused"""
+        with self.lock:
+            self.names.discard(os.path.normcase(filename))
+
+# Errors meaning the kernel copy call cannot be used for this pair of files
+_KERNEL_COPY_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP,
+                            errno.ENOTSUP, errno.EBADF, errno.EPERM}
+
+def copy_file_data(fsrc, fdst):
+    """
+    Copy the remaining data of one open file to another inside the kernel
+    
+    Tries copy_file_range (which lets the filesystem reflink or copy
+    server-side), then sendfile, then falls back to a userspace copy.
+    
+    Returns:
+        'copy_file_range', 'sendfile' or 'copy'
+    """
+    src, dst = fsrc.fileno(), fdst.fileno()
+    if hasattr(os, 'copy_file_range'):
+        copied = 0
+        try:
+            while True:
+                count = os.copy_file_range(src, dst, 1 << 30)
+                if count == 0:
+                    return 'copy_file_range'
+                copied += count
+        except OSError as e:
+            if copied or e.errno not in _KERNEL_COPY_UNSUPPORTED:
+                raise
+    if hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+        # Other platforms only allow sockets as the sendfile target
+        copied = 0
+        try:
+            while True:
+                count = os.sendfile(dst, src, None, 1 << 30)
+                if count == 0:
+                    return 'sendfile'
+                copied += count
+        except OSError as e:
+            if copied or e.errno not in _KERNEL_COPY_UNSUPPORTED:
+                raise
+    shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+    return 'copy'
+
+# Errors meaning the filesystem cannot hard link, so moves have to copy
+_LINK_UNSUPPORTED = {errno.EXDEV, errno.EPERM, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EMLINK}
+
+# Attempts at finding a free name when other programs keep taking them
+_MAX_NAME_ATTEMPTS = 100
+
+def _load_renameat2():
+    """Find renameat2() in the C library (Linux, glibc 2.28 or later), or None"""
+    if ctypes is None or not sys.platform.startswith('linux'):
+        return None
+    try:
+        renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+    except (OSError, AttributeError):
+        return None
+    renameat2.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+    renameat2.restype = ctypes.c_int
+    return renameat2
+
+_renameat2 = _load_renameat2()
+
+def _copy_file_exclusive(source, destination):
+    """
+    Copy data and metadata to a new file; returns the copy method
+    
+    Raises:
+        FileExistsError if the destination exists; it is left untouched
+    """
+    created = False
+    try:
+        with open(source, 'rb') as fsrc:
+            with open(destination, 'xb') as fdst:
+                created = True
+                method = copy_file_data(fsrc, fdst)
+        shutil.copystat(source, destination)
+        return method
+    except BaseException:
+        if created:
+            try:
+                os.remove(destination)  # Partial copy
+            except OSError:
+                pass
+        raise
+
+def _remove_moved_source(source, destination):
+    """Remove the source of a copied or linked file, undoing the copy if that fails"""
+    try:
+        os.remove(source)
+    except BaseException:
+        os.remove(destination)  # Keep the file in one place only
+        raise
+
+def _rename_noreplace(source, destination):
+    """
+    Rename with renameat2(RENAME_NOREPLACE), which fails instead of replacing
+    
+    Returns:
+        True if renamed, False if the C library, kernel or filesystem lacks
+        the call
+        
+    Raises:
+        FileExistsError if the destination exists, OSError (EXDEV) across
+        filesystems
+    """
+    if _renameat2 is None:
+        return False
+    if _renameat2(AT_FDCWD, os.fsencode(source), AT_FDCWD, os.fsencode(destination), RENAME_NOREPLACE) == 0:
+        return True
+    err = ctypes.get_errno()
+    if err in (errno.ENOSYS, errno.EINVAL):
+        return False
+    raise OSError(err, os.strerror(err), destination)
+
+def _rename_over_placeholder(source, destination):
+    """
+    Reserve the destination with an empty file created exclusively, then
+    rename the source over it; returns the method
+    
+    Only the placeholder this call created can be replaced. Filesystems that
+    refuse to rename over a file fall back to a hard link and unlink.
+    """
+    os.close(os.open(destination, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600))
+    try:
+        os.replace(source, destination)
+        return 'rename'
+    except OSError as e:
+        try:
+            os.remove(destination)  # Our placeholder
+        except OSError:
+            pass
+        if e.errno == errno.EXDEV or not os.path.lexists(source):
+            raise
+    try:
+        if os.link in os.supports_follow_symlinks:
+            os.link(source, destination, follow_symlinks=False)  # Move symlinks, not their targets
+        else:
+            os.link(source, destination)
+        method = 'link'
+    except FileExistsError:
+        raise
+    except OSError as e:
+        if e.errno not in _LINK_UNSUPPORTED:
+            raise
+        method = _copy_file_exclusive(source, destination)
+    _remove_moved_source(source, destination)
+    return method
+
+def _move_file_exclusive(source, destination):
+    """
+    Move a file without ever replacing the destination; returns the method
+    
+    Within a filesystem the file is renamed: with renameat2(RENAME_NOREPLACE)
+    where available, otherwise over an exclusively created placeholder, so
+    the file always has exactly one name (a crash in between leaves at most
+    the empty placeholder). Across filesystems the file is copied and the
+    source removed.
+    
+    Raises:
+        FileExistsError if the destination exists; it is left untouched
+    """
+    try:
+        if _rename_noreplace(source, destination):
+            return 'rename'
+        return _rename_over_placeholder(source, destination)
+    except FileExistsError:
+        raise
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    method = _copy_file_exclusive(source, destination)
+    _remove_moved_source(source, destination)
+    return method
+
+def _transfer_file(source, reserver, move):
+    """
+    Copy or move one file to a reserved name in the destination directory
+    
+    Names taken since the directory was listed are skipped, never replaced.
+    
+    Returns:
+        (destination path, method) tuple; method is 'rename' for moves within
+        a filesystem ('link' where renaming over a file is refused), otherwise
+        the method of copy_file_data()
+    """
+    if not os.path.isfile(source):
+        raise FileNotFoundError(f"Not a file: {source}")
+    for _ in range(_MAX_NAME_ATTEMPTS):
+        filename = reserver.reserve(os.path.basename(source))
+        destination = os.path.join(reserver.directory, filename)
+        try:
+            if move:
+                return destination, _move_file_exclusive(source, destination)
+            return destination, _copy_file_exclusive(source, destination)
+        except FileExistsError:
+            continue  # Created after the listing; the name stays reserved
+        except BaseException:
+            reserver.release(filename)
+            raise
+    raise FileExistsError(f"No free name found for {source} in {reserver.directory}")
+
+def batch_transfer_files(sources, destination_dir, move=False, workers=4, callback=None, should_stop=None):
+    """
+    Copy or move many files into one directory using a pool of worker threads
+    
+    Name conflicts are resolved against one listing of destination_dir with
+    the same _1, _2, ... suffixes as safe_copy_file(); files that appear in
+    it meanwhile are never replaced. Moves within a filesystem rename the file
+    without replacing anything; copies, and moves across filesystems, copy
+    the data in the kernel where possible and keep the metadata like
+    shutil.copy2.
+    
+    Args:
+        sources: File paths to transfer
+        destination_dir: Directory to place them in (created if missing)
+        move: Move instead of copy
+        workers: Number of files transferred at the same time
+        callback: Function called with (progress percent, message) after each
+            file, from the worker threads
+        should_stop: Optional function returning True to skip the remaining files
+        
+    Returns:
+        List with one dictionary per source, in the order of sources, with
+        'source', 'destination' (None on failure), 'method' and 'error'
+        (None on success)
+    """
+    sources = list(sources)
+    results = [{'source': source, 'destination': None, 'method': None, 'error': 'Cancelled'}
+               for source in sources]
+    if not sources:
+        return results
+    try:
+        reserver = DirectoryNameReserver(destination_dir)
+    except OSError as e:
+        print(f"Error preparing destination {destination_dir}: {e}")
+        for result in results:
+            result['error'] = str(e)
+        return results
+    
+    pending = iter(enumerate(sources))
+    lock = threading.Lock()
+    done = [0]
+    action = "Moved" if move else "Copied"
+    
+    def worker():
+        while not (should_stop and should_stop()):
+            with lock:
+                item = next(pending, None)
+            if item is None:
+                return
+            index, source = item
+            result = results[index]
+            try:
+                result['destination'], result['method'] = _transfer_file(source, reserver, move)
+                result['error'] = None
+            except Exception as e:
+                print(f"Error {'moving' if move else 'copying'} file {source}: {e}")
+                result['error'] = str(e)
+            with lock:
+                done[0] += 1
+                if callback:
+                    callback(done[0] / len(sources) * 100, f"{action} {done[0]}/{len(sources)} files")
+    
+    threads = [threading.Thread(target=worker, daemon=True)
+               for _ in range(max(1, min(workers, len(sources))))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def batch_copy_files(sources, destination_dir, **kwargs):
+    """Copy many files into one directory; see batch_transfer_files()"""
+    return batch_transfer_files(sources, destination_dir, move=False, **kwargs)
+
+def batch_move_files(sources, destination_dir, **kwargs):
+    """Move many files into one directory; see batch_transfer_files()"""
+    return batch_transfer_files(sources, destination_dir, move=True, **kwargs)
+
+def get_file_identity(filepath):
+    """Return the (device, inode) pair identifying the data behind a path"""
+    stat_info = os.stat(filepath)
+    return (stat_info.st_dev, stat_info.st_ino)
+
+def reflink_file(source, destination):
+    """Create destination as a copy-on-write clone of source using FICLONE"""
+    if fcntl is None:
+        raise OSError("Reflinks are not supported on this platform")
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+def files_identical(path1, path2, blocksize=1024 * 1024):
+    """Compare two files byte by byte"""
+    if os.path.getsize(path1) != os.path.getsize(path2):
+        return False
+    with open(path1, 'rb') as file1, open(path2, 'rb') as file2:
+        while True:
+            block1 = file1.read(blocksize)
+            if block1 != file2.read(blocksize):
+                return False
+            if not block1:
+                return True
+
+def _stat_signature(filepath):
+    """Get the stat fields that change when a file is rewritten or replaced"""
+    stat_info = os.stat(filepath)
+    return (stat_info.st_size, stat_info.st_mtime_ns, stat_info.st_dev, stat_info.st_ino)
+
+def safe_link_duplicate(source, target, method='auto'):
+    """
+    Replace target with a hardlink or reflink to source
+    
+    The two files are compared byte by byte first, so a file edited since
+    the scan is never replaced; a file changing during the comparison or
+    while linking also cancels the replacement. The link is first created
+    under a temporary name next to target and then renamed over it, so
+    target is never missing or partially written.
+    
+    Args:
+        source: Path of the copy to keep
+        target: Path of the duplicate to replace
+        method: 'hardlink', 'reflink' or 'auto' (reflink, falling back to hardlink)
+        
+    Returns:
+        'hardlink' or 'reflink' on success, 'shared' if both paths already
+        point to the same inode, False on failure
+    """
+    temp_path = None
+    try:
+        if not os.path.isfile(source) or not os.path.isfile(target):
+            return False
+        if get_file_identity(source) == get_file_identity(target):
+            return 'shared'
+        
+        source_signature = _stat_signature(source)
+        target_signature = _stat_signature(target)
+        if not files_identical(source, target):
+            raise ValueError("contents differ; one of the files changed since the scan")
+        
+        target_dir, target_name = os.path.split(target)
+        temp_path = os.path.join(target_dir, f".{target_name}.{uuid.uuid4().hex}.tmp")
+        
+        used_method = None
+        if method in ('auto', 'reflink'):
+            try:
+                reflink_file(source, temp_path)
+                # A reflink is an independent file, so keep the target's own metadata
+                shutil.copystat(target, temp_path)
+                used_method = 'reflink'
+            except OSError:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                if method == 'reflink':
+                    raise
+        
+        if used_method is None:
+            os.link(source, temp_path)
+            used_method = 'hardlink'
+        
+        if _stat_signature(source) != source_signature or _stat_signature(target) != target_signature:
+            raise ValueError("a file changed while it was being linked")
+        os.replace(temp_path, target)
+        return used_method
+    except Exception as e:
+        print(f"Error linking {target} to {source}: {e}")
+        if temp_path and os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+        return False
+
 def open_file_location(filepath):
     """Open the directory containing the file"""
     try: